@@ -0,0 +1,153 @@
+import bz2
+import gzip
+import io
+import mmap
+import os
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".zst")
+
+ZSTD_MAGIC = 0xFD2FB528
+# Skippable frames use the magic numbers 0x184D2A50 to 0x184D2A5F
+ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+ZSTD_SKIPPABLE_MASK = 0xFFFFFFF0
+
+
+def is_compressed(file_path):
+    """Whether the dataset file is compressed (by file extension)."""
+    return file_path.endswith(COMPRESSED_SUFFIXES)
+
+
+def zstd_frames(data):
+    """
+    Locate the zstd frames of a buffer without decompressing them.
+
+    Only the frame and block headers are read, so scanning a multi-GB file is cheap. Skippable frames
+    are ignored.
+
+    :param data: bytes-like object with the content of a .zst file, e.g. an mmap.
+    :return: Generator of (start, end) byte ranges, one per frame.
+    """
+    position, size = 0, len(data)
+    while position < size:
+        magic, = struct.unpack_from("<I", data, position)
+        if magic & ZSTD_SKIPPABLE_MASK == ZSTD_SKIPPABLE_MAGIC:
+            frame_size, = struct.unpack_from("<I", data, position + 4)
+            position += 8 + frame_size
+            continue
+        if magic != ZSTD_MAGIC:
+            raise ValueError(f"Invalid zstd frame at byte {position}.")
+
+        start = position
+        descriptor = data[position + 4]
+        content_size_flag = descriptor >> 6
+        single_segment = descriptor & 0x20
+        has_checksum = descriptor & 0x04
+        dictionary_id_size = (0, 1, 2, 4)[descriptor & 0x03]
+        content_size_size = (1 if single_segment else 0, 2, 4, 8)[content_size_flag]
+        position += 5 + (0 if single_segment else 1) + dictionary_id_size + content_size_size
+
+        last_block = False
+        while not last_block:
+            header = int.from_bytes(data[position:position + 3], "little")
+            last_block = header & 1
+            block_type = (header >> 1) & 3
+            # RLE blocks store a single byte, repeated Block_Size times
+            position += 3 + (1 if block_type == 1 else header >> 3)
+        if has_checksum:
+            position += 4
+        yield start, position
+
+
+def _decompress_frame(frame):
+    import zstandard
+    return zstandard.ZstdDecompressor().decompressobj().decompress(frame)
+
+
+class ParallelZstdReader(io.RawIOBase):
+    """
+    Binary stream of a multi-frame .zst file whose frames are decompressed by a thread pool.
+
+    Files written by `pzstd` (or any tool that writes independent frames) decompress in parallel;
+    up to `2 * workers` frames are decompressed ahead of the reader, and the output stays in order.
+    """
+
+    def __init__(self, file_path, workers):
+        self._file = open(file_path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._workers = workers
+        self._chunks = self._decompressed_frames()
+        self._buffer = memoryview(b"")
+
+    def _decompressed_frames(self):
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            try:
+                for start, end in zstd_frames(self._data):
+                    pending.append(executor.submit(_decompress_frame, self._data[start:end]))
+                    if len(pending) >= 2 * self._workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not len(self._buffer):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._chunks.close()
+            self._buffer.release()
+            self._data.close()
+            self._file.close()
+        super().close()
+
+
+def _open_zstd(file_path, workers):
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Reading .zst datasets requires the 'zstandard' package.") from None
+
+    if workers > 1 and os.path.getsize(file_path):
+        with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            multi_frame = len(list(islice(zstd_frames(data), 2))) > 1
+        if multi_frame:
+            return io.BufferedReader(ParallelZstdReader(file_path, workers), buffer_size=1024 * 1024)
+    # A single frame can only be decompressed sequentially
+    return zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+
+
+def open_dataset(file_path, decompress_workers=None):
+    """
+    Open a dataset file as text, decompressing .gz, .bz2 and .zst files on the fly.
+
+    :param file_path: Path of the (possibly compressed) dataset file.
+    :param decompress_workers: Threads decompressing the frames of a multi-frame .zst file in parallel,
+                               defaults to the number of CPUs.
+    :return: Text stream of the file, decoded as UTF-8 with invalid bytes replaced.
+    """
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, 'rt', encoding='utf-8', errors='replace')
+    if file_path.endswith(".bz2"):
+        return bz2.open(file_path, 'rt', encoding='utf-8', errors='replace')
+    if file_path.endswith(".zst"):
+        binary = _open_zstd(file_path, decompress_workers or os.cpu_count() or 1)
+        return io.TextIOWrapper(binary, encoding='utf-8', errors='replace')
+    return open(file_path, 'r', encoding='utf-8', errors='replace')
@@ -1,18 +1,108 @@
+import mmap
 import os
+import random
+import re
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
+import numpy as np
 
-def read_movies_file(file_path, max_records):
+from data.compressed import is_compressed, open_dataset
+
+# A blank (or whitespace-only) line ends a record
+RECORD_SEPARATOR = re.compile(rb"\n[ \t\r\f\v]*\n")
+# First byte of a record: the start of the file or the end of a run of blank lines, followed by text
+RECORD_START = re.compile(rb"(?:\A|\n[ \t\r\f\v]*\n)\s*(?=\S)")
+
+# Sidecar index header: magic, indexed file size, indexed file mtime (ns), number of records
+INDEX_HEADER = struct.Struct("<8sQqQ")
+INDEX_MAGIC = b"MOVIEIDX"
+INDEX_SUFFIX = ".idx"
+
+
+def _add_line(record, line):
+    """Add a stripped, non-empty line to the record being parsed."""
+    if ": " in line:
+        key, value = line.split(": ", 1)
+        record[key] = value
+    else:
+        if "review/text" in record:
+            record["review/text"] += " " + line
+        else:
+            record["review/text"] = line
+
+
+def parse_records(text):
+    """
+    Parse a block of movies.txt text made of whole records into a list of records.
+    """
+    records = []
+    record = {}
+    # Split on "\n" only, like iterating over the file; str.splitlines also breaks on characters
+    # such as \u2028 that may appear inside review text
+    for line in text.split("\n"):
+        line = line.strip()
+        if line == "":
+            if record:
+                records.append(record)
+            record = {}
+        else:
+            _add_line(record, line)
+    if record:
+        records.append(record)
+    return records
+
+
+def read_movies_file(file_path, max_records, workers=1, start=0, step=1, sample_size=None, seed=None):
     """
     Read and parse the movies.txt file. Each record is separated by an empty line.
     Stop reading once max_records is reached.
+
+    With `workers` > 1 the file is parsed by `read_movies_file_parallel`. Selecting records with `start`,
+    `step` or `sample_size` seeks through the sidecar offset index (see `load_record_index`) instead of
+    reading the file from the beginning.
+
+    .gz, .bz2 and .zst files are decompressed on the fly (see `data.compressed.open_dataset`). They cannot
+    be memory-mapped, so they are parsed sequentially, `workers` threads decompress the frames of a .zst
+    file, and `start`/`step` skip records while reading.
+
+    :param start: Index of the first record to read.
+    :param step: Read every `step`-th record from `start`.
+    :param sample_size: Read this many records chosen at random (in file order) instead of a range.
+    :param seed: Seed of the random sample.
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"The file {file_path} does not exist.")
+    if is_compressed(file_path):
+        if sample_size is not None:
+            raise ValueError("Random samples need an uncompressed dataset with a record offset index.")
+        records = _read_records(open_dataset(file_path, decompress_workers=workers), start + max_records * step)
+        yield from islice(records, start, None, step)
+        return
+    if start > 0 or step > 1 or sample_size is not None:
+        offsets = load_record_index(file_path)
+        if sample_size is not None:
+            count = min(sample_size, max_records, len(offsets))
+            indices = sorted(random.Random(seed).sample(range(len(offsets)), count))
+        else:
+            indices = range(start, len(offsets), step)[:max(max_records, 0)]
+        yield from read_indexed_records(file_path, indices, offsets)
+        return
+    if workers > 1:
+        yield from read_movies_file_parallel(file_path, max_records, workers)
+        return
+
+    yield from _read_records(open(file_path, 'r', encoding='utf-8', errors='replace'), max_records)
+
 
+def _read_records(file, max_records):
+    """Parse records line by line from an open text file, closing it when done."""
     record = {}
     record_count = 0
 
-    with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+    with file:
         for line in file:
             line = line.strip()
             if line == "":
@@ -24,15 +114,178 @@ def read_movies_file(file_path, max_records):
                     break
                 record = {}
             else:
-                if ": " in line:
-                    key, value = line.split(": ", 1)
-                    record[key] = value
-                else:
-                    if "review/text" in record:
-                        record["review/text"] += " " + line
-                    else:
-                        record["review/text"] = line
+                _add_line(record, line)
 
         # Yield the last record if it exists and hasn't exceeded max_records
         if record and record_count < max_records:
             yield record
+
+
+class MoviesFile:
+    """
+    Re-iterable view of the records of a movies.txt file.
+
+    Every iteration streams the file again through `read_movies_file`, so several benchmarks can consume
+    the same records without holding them all in memory.
+    """
+
+    def __init__(self, file_path, max_records, **options):
+        """
+        :param options: Keyword arguments of `read_movies_file` (workers, start, step, sample_size, seed).
+        """
+        if options.get("sample_size") is not None and options.get("seed") is None:
+            # Fix the seed so that every iteration yields the same sample
+            options["seed"] = random.randrange(2 ** 32)
+        self.file_path = file_path
+        self.max_records = max_records
+        self.options = options
+
+    def __iter__(self):
+        return read_movies_file(self.file_path, self.max_records, **self.options)
+
+
+def record_ranges(data, chunk_bytes):
+    """
+    Split a buffer of movies.txt data into byte ranges of roughly `chunk_bytes` that end on record boundaries.
+
+    :param data: bytes-like object, e.g. an mmap of the file.
+    :param chunk_bytes: Target size of a range.
+    :return: Generator of (start, end) tuples covering the whole buffer.
+    """
+    start, size = 0, len(data)
+    while start < size:
+        match = RECORD_SEPARATOR.search(data, min(start + chunk_bytes, size))
+        end = match.end() if match else size
+        yield start, end
+        start = end
+
+
+def _parse_range(file_path, start, end):
+    """Parse the records in a byte range of the file (runs in a worker process)."""
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_records(data[start:end].decode('utf-8', errors='replace'))
+
+
+def read_movies_file_parallel(file_path, max_records, workers=None, chunk_bytes=8 * 1024 * 1024):
+    """
+    Parse the movies.txt file in a process pool.
+
+    The file is memory-mapped and split into byte ranges at blank lines; each range is parsed by a
+    worker process. Records are yielded in file order, and only about `2 * workers` ranges are parsed
+    ahead of the consumer, so small `max_records` values do not parse the whole file.
+
+    :param file_path: Path of the movies.txt file.
+    :param max_records: Maximum number of records to yield.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param chunk_bytes: Target size of the byte range parsed by one task.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"The file {file_path} does not exist.")
+    if max_records <= 0 or os.path.getsize(file_path) == 0:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    record_count = 0
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def parsed_ranges():
+            for start, end in record_ranges(data, chunk_bytes):
+                pending.append(executor.submit(_parse_range, file_path, start, end))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+        try:
+            for records in parsed_ranges():
+                for record in records:
+                    yield record
+                    record_count += 1
+                    if record_count >= max_records:
+                        return
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def index_path(file_path):
+    """Path of the sidecar offset index of a dataset file."""
+    return file_path + INDEX_SUFFIX
+
+
+def build_record_index(file_path):
+    """
+    Scan the dataset once and write the start byte of every record to the sidecar index.
+
+    :return: Array of record start offsets.
+    """
+    stat = os.stat(file_path)
+    with open(file_path, 'rb') as file:
+        if stat.st_size:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                offsets = np.fromiter((match.end() for match in RECORD_START.finditer(data)), dtype=np.uint64)
+        else:
+            offsets = np.empty(0, dtype=np.uint64)
+    temporary_path = index_path(file_path) + ".tmp"
+    with open(temporary_path, 'wb') as index_file:
+        index_file.write(INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, len(offsets)))
+        index_file.write(offsets.astype("<u8").tobytes())
+    os.replace(temporary_path, index_path(file_path))
+    return offsets
+
+
+def load_record_index(file_path):
+    """
+    Return the record start offsets of the dataset, building the sidecar index if it is missing or
+    was built for a different file size or modification time.
+
+    :return: Array (memory-mapped when loaded from disk) of record start offsets.
+    """
+    stat = os.stat(file_path)
+    try:
+        with open(index_path(file_path), 'rb') as index_file:
+            magic, size, mtime_ns, count = INDEX_HEADER.unpack(index_file.read(INDEX_HEADER.size))
+    except (OSError, struct.error):
+        magic = None
+    if magic != INDEX_MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+        print(f"Building record offset index for {file_path}...")
+        return build_record_index(file_path)
+    if count == 0:
+        return np.empty(0, dtype=np.uint64)
+    return np.memmap(index_path(file_path), dtype="<u8", mode="r", offset=INDEX_HEADER.size, shape=(count,))
+
+
+def _index_runs(indices, max_run=1000):
+    """Group increasing indices into (first, last) runs of consecutive indices."""
+    first = last = None
+    for index in indices:
+        if first is not None and index == last + 1 and index - first < max_run:
+            last = index
+            continue
+        if first is not None:
+            yield first, last
+        first = last = index
+    if first is not None:
+        yield first, last
+
+
+def read_indexed_records(file_path, indices, offsets=None):
+    """
+    Read records by index, seeking to each one through the offset index.
+
+    Runs of consecutive indices are read with a single slice of the memory-mapped file.
+
+    :param indices: Increasing record indices.
+    :param offsets: Record start offsets, loaded with `load_record_index` when not given.
+    """
+    if offsets is None:
+        offsets = load_record_index(file_path)
+    if not len(offsets):
+        return
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for first, last in _index_runs(indices):
+            end = int(offsets[last + 1]) if last + 1 < len(offsets) else len(data)
+            yield from parse_records(data[int(offsets[first]):end].decode('utf-8', errors='replace'))
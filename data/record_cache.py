@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import shutil
+from array import array
+from collections.abc import Sequence
+
+import numpy as np
+from tqdm import tqdm
+
+from data.data_utils import read_movies_file
+from utils.db_utils import REVIEW_COLUMNS, ReviewRecord
+
+DEFAULT_CACHE_DIR = "data/cache"
+CACHE_VERSION = 1
+
+NUMERIC_COLUMNS = {"score": np.float64, "review_time": np.int64}
+DICTIONARY_COLUMNS = ("product_id", "user_id")
+TEXT_COLUMNS = ("profile_name", "helpfulness", "summary", "review_text")
+
+
+def file_fingerprint(file_path, samples=64, block_size=64 * 1024):
+    """
+    Hash a file's size, modification time and `samples` evenly spaced blocks of its content.
+
+    Sampling keeps fingerprinting a multi-GB dataset well under a second, while any rewrite of the
+    file still changes its mtime.
+    """
+    stat = os.stat(file_path)
+    digest = hashlib.blake2b(f"{stat.st_size}:{stat.st_mtime_ns}".encode(), digest_size=16)
+    with open(file_path, 'rb') as file:
+        for i in range(samples):
+            file.seek(stat.st_size * i // samples)
+            digest.update(file.read(block_size))
+    return digest.hexdigest()
+
+
+def cache_path(file_path, total_rows, cache_dir=DEFAULT_CACHE_DIR, **selection):
+    """Directory of the cache for a dataset file, row count and record selection (see `read_movies_file`)."""
+    key = hashlib.blake2b(f"{file_fingerprint(file_path)}:{sorted(selection.items())}".encode(),
+                          digest_size=8).hexdigest()
+    return os.path.join(cache_dir, f"{key}_{total_rows}")
+
+
+class _TextColumnWriter:
+    """Append strings (or None) to a UTF-8 blob file, tracking their end offsets and null flags."""
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+        self.blob = open(os.path.join(path, f"{name}.blob"), 'wb')
+        self.offsets = array('q', [0])
+        self.nulls = array('b')
+
+    def append(self, value):
+        self.nulls.append(value is None)
+        if value is not None:
+            self.blob.write(value.encode('utf-8'))
+        self.offsets.append(self.blob.tell())
+
+    def close(self):
+        self.blob.close()
+        np.save(os.path.join(self.path, f"{self.name}.offsets.npy"), np.frombuffer(self.offsets, dtype=np.int64))
+        np.save(os.path.join(self.path, f"{self.name}.nulls.npy"), np.frombuffer(self.nulls, dtype=np.bool_))
+
+
+def build_record_cache(file_path, total_rows, path, workers=1, **selection):
+    """
+    Parse and normalize up to `total_rows` records and write them to `path` in columnar form.
+
+    Numeric columns are numpy arrays, `product_id`/`user_id` are dictionary-encoded (int32 codes into a
+    text column of distinct values) and the other text columns are end offsets into a UTF-8 blob.
+    The directory is written under a temporary name and renamed once complete.
+    """
+    temporary_path = path + ".tmp"
+    shutil.rmtree(temporary_path, ignore_errors=True)
+    os.makedirs(temporary_path)
+
+    numeric = {column: array('d' if dtype is np.float64 else 'q') for column, dtype in NUMERIC_COLUMNS.items()}
+    dictionaries = {column: {} for column in DICTIONARY_COLUMNS}
+    codes = {column: array('i') for column in DICTIONARY_COLUMNS}
+    texts = {column: _TextColumnWriter(temporary_path, column) for column in TEXT_COLUMNS}
+
+    count = 0
+    for record in tqdm(read_movies_file(file_path, total_rows, workers=workers, **selection),
+                       desc="Caching Records", unit="record"):
+        record = ReviewRecord.from_record(record)
+        for column in NUMERIC_COLUMNS:
+            numeric[column].append(getattr(record, column))
+        for column in DICTIONARY_COLUMNS:
+            value = getattr(record, column)
+            dictionary = dictionaries[column]
+            codes[column].append(-1 if value is None else dictionary.setdefault(value, len(dictionary)))
+        for column in TEXT_COLUMNS:
+            texts[column].append(getattr(record, column))
+        count += 1
+
+    for column, dtype in NUMERIC_COLUMNS.items():
+        np.save(os.path.join(temporary_path, f"{column}.npy"), np.frombuffer(numeric[column], dtype=dtype))
+    for column in DICTIONARY_COLUMNS:
+        np.save(os.path.join(temporary_path, f"{column}.codes.npy"), np.frombuffer(codes[column], dtype=np.int32))
+        values = _TextColumnWriter(temporary_path, f"{column}.dict")
+        for value in dictionaries[column]:
+            values.append(value)
+        values.close()
+    for writer in texts.values():
+        writer.close()
+    with open(os.path.join(temporary_path, "meta.json"), 'w') as meta_file:
+        json.dump({"version": CACHE_VERSION, "count": count, "source": os.path.abspath(file_path),
+                   "total_rows": total_rows}, meta_file)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(temporary_path, path)
+    return RecordCache(path)
+
+
+def load_record_cache(file_path, total_rows, cache_dir=DEFAULT_CACHE_DIR, workers=1, **selection):
+    """
+    Return the cached normalized records of a dataset, building the cache on first use.
+
+    :param file_path: Path of the movies.txt file.
+    :param total_rows: Maximum number of records, part of the cache key.
+    :param cache_dir: Directory holding one sub-directory per cached dataset.
+    :param workers: Parser processes used when the cache has to be built.
+    :param selection: Record selection passed to `read_movies_file` (start, step, sample_size, seed).
+    :return: RecordCache.
+    """
+    if selection.get("sample_size") is not None and selection.get("seed") is None:
+        raise ValueError("A random sample can only be cached when it has a seed.")
+    path = cache_path(file_path, total_rows, cache_dir, **selection)
+    try:
+        return RecordCache(path)
+    except (OSError, ValueError, KeyError):
+        print(f"Building record cache {path}...")
+        return build_record_cache(file_path, total_rows, path, workers, **selection)
+
+
+class RecordCache(Sequence):
+    """
+    Read-only sequence of normalized records backed by a columnar cache directory.
+
+    Columns are memory-mapped; indexing or slicing materializes ReviewRecords, so it can be passed to the
+    simulators in place of a list of records. Records of the same product or user share one id string.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as meta_file:
+            meta = json.load(meta_file)
+        if meta["version"] != CACHE_VERSION:
+            raise ValueError(f"Unsupported record cache version {meta['version']}.")
+        self.path = path
+        self.count = meta["count"]
+        self.numeric = {column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r")
+                        for column in NUMERIC_COLUMNS}
+        self.codes = {column: np.load(os.path.join(path, f"{column}.codes.npy"), mmap_mode="r")
+                      for column in DICTIONARY_COLUMNS}
+        self.dictionaries = {column: self._decode_text(self._load_text(f"{column}.dict"), 0, None)
+                             for column in DICTIONARY_COLUMNS}
+        self.texts = {column: self._load_text(column) for column in TEXT_COLUMNS}
+
+    def _load_text(self, name):
+        blob_path = os.path.join(self.path, f"{name}.blob")
+        if os.path.getsize(blob_path):
+            blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            blob = np.empty(0, dtype=np.uint8)
+        return (np.load(os.path.join(self.path, f"{name}.offsets.npy"), mmap_mode="r"),
+                np.load(os.path.join(self.path, f"{name}.nulls.npy"), mmap_mode="r"),
+                blob)
+
+    @staticmethod
+    def _decode_text(text_column, start, stop):
+        """Decode the values `start:stop` of a loaded text column."""
+        offsets, nulls, blob = text_column
+        bounds = offsets[start:None if stop is None else stop + 1].tolist()
+        data = blob[bounds[0]:bounds[-1]].tobytes()
+        base = bounds[0]
+        return [None if null else data[begin - base:end - base].decode('utf-8')
+                for null, begin, end in zip(nulls[start:stop].tolist(), bounds, bounds[1:])]
+
+    def _records(self, start, stop):
+        columns = {column: values[start:stop].tolist() for column, values in self.numeric.items()}
+        for column in DICTIONARY_COLUMNS:
+            dictionary = self.dictionaries[column]
+            columns[column] = [None if code < 0 else dictionary[code]
+                               for code in self.codes[column][start:stop].tolist()]
+        for column in TEXT_COLUMNS:
+            columns[column] = self._decode_text(self.texts[column], start, stop)
+        return [ReviewRecord._make(values) for values in zip(*(columns[column] for column in REVIEW_COLUMNS))]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            if step == 1:
+                return self._records(start, max(start, stop))
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("record cache index out of range")
+        return self._records(index, index + 1)[0]
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
+
+    def batches(self, batch_size=10000):
+        """Yield lists of up to `batch_size` normalized records."""
+        for start in range(0, self.count, batch_size):
+            yield self._records(start, min(start + batch_size, self.count))
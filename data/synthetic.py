@@ -0,0 +1,126 @@
+import numpy as np
+
+from utils.db_utils import ReviewRecord
+
+WORDS = (
+    "movie film great story acting plot character scene director watch good bad love funny classic "
+    "ending music dvd series season picture quality sound boring recommend worth time family action "
+    "drama comedy horror performance cast script original version price buy gift favorite"
+).split()
+
+# Share of 1-5 star scores in the Amazon movie reviews
+DEFAULT_SCORE_WEIGHTS = (0.06, 0.06, 0.12, 0.22, 0.54)
+
+
+def zipf_cdf(size, skew):
+    """Cumulative distribution of a Zipf law with exponent `skew` over ranks 1..size."""
+    weights = np.arange(1, size + 1, dtype=np.float64) ** -skew
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+class SyntheticReviews:
+    """
+    Re-iterable source of synthetic `reviews` records, generated in numpy-vectorized batches.
+
+    Product and user popularity follow Zipf laws, scores a categorical distribution, summary and text
+    lengths log-normal distributions and review times a uniform range. The same seed always yields the
+    same records, so it can replace `MoviesFile` for datasets of any size without a source file.
+    """
+
+    def __init__(self, total_rows, seed=0, num_products=250000, num_users=1000000, product_skew=1.1,
+                 user_skew=0.9, score_weights=DEFAULT_SCORE_WEIGHTS, text_length=(700, 0.9),
+                 summary_length=(30, 0.5), time_range=(946684800, 1356998400), batch_size=100000):
+        """
+        :param total_rows: Number of records to generate.
+        :param seed: Seed of the random generator.
+        :param num_products: Number of distinct products.
+        :param num_users: Number of distinct users.
+        :param product_skew: Zipf exponent of product popularity (0 for uniform).
+        :param user_skew: Zipf exponent of user activity (0 for uniform).
+        :param score_weights: Probabilities of the scores 1 to 5.
+        :param text_length: (median, sigma) of the log-normal review text length in characters.
+        :param summary_length: (median, sigma) of the log-normal summary length in characters.
+        :param time_range: (start, end) Unix timestamps of the review times.
+        :param batch_size: Records generated per vectorized batch.
+        """
+        self.total_rows = total_rows
+        self.seed = seed
+        self.num_products = num_products
+        self.num_users = num_users
+        self.product_skew = product_skew
+        self.user_skew = user_skew
+        self.score_weights = np.asarray(score_weights, dtype=np.float64) / np.sum(score_weights)
+        self.text_length = text_length
+        self.summary_length = summary_length
+        self.time_range = time_range
+        self.batch_size = batch_size
+        self._product_cdf = zipf_cdf(num_products, product_skew)
+        self._user_cdf = zipf_cdf(num_users, user_skew)
+        self._product_ids = {}
+        self._user_ids = {}
+        self._profile_names = {}
+        self._helpfulness = {}
+
+    def __len__(self):
+        return self.total_rows
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
+
+    def _text_pool(self, rng, size):
+        """A long string of random words that review texts and summaries are sliced from."""
+        words = rng.choice(np.array(WORDS), size=size // 6)
+        return " ".join(words.tolist())
+
+    @staticmethod
+    def _lengths(rng, size, median_sigma, limit):
+        median, sigma = median_sigma
+        return np.clip(rng.lognormal(np.log(median), sigma, size), 1, limit).astype(np.int64)
+
+    @staticmethod
+    def _labels(codes, cache, label):
+        """Format codes as strings, reusing one string per distinct code."""
+        strings = []
+        for code in codes.tolist():
+            value = cache.get(code)
+            if value is None:
+                value = cache[code] = label(code)
+            strings.append(value)
+        return strings
+
+    def batches(self):
+        """Yield lists of up to `batch_size` ReviewRecords."""
+        rng = np.random.default_rng(self.seed)
+        pool = self._text_pool(rng, 1 << 20)
+        # Permute ranks so that the most popular products and users are not simply the lowest ids
+        product_order = rng.permutation(self.num_products)
+        user_order = rng.permutation(self.num_users)
+        start_time, end_time = self.time_range
+
+        for start in range(0, self.total_rows, self.batch_size):
+            size = min(self.batch_size, self.total_rows - start)
+            products = product_order[np.searchsorted(self._product_cdf, rng.random(size))]
+            users = user_order[np.searchsorted(self._user_cdf, rng.random(size))]
+            scores = (rng.choice(5, size=size, p=self.score_weights) + 1).astype(np.float64)
+            times = rng.integers(start_time, end_time, size=size)
+            total_votes = rng.geometric(0.3, size=size) - 1
+            helpful_votes = rng.binomial(total_votes, 0.7)
+
+            text_lengths = self._lengths(rng, size, self.text_length, len(pool) // 2)
+            text_starts = rng.integers(0, len(pool) - text_lengths)
+            summary_lengths = self._lengths(rng, size, self.summary_length, 200)
+            summary_starts = rng.integers(0, len(pool) - summary_lengths)
+
+            product_ids = self._labels(products, self._product_ids, lambda code: f"B{code:09d}")
+            user_ids = self._labels(users, self._user_ids, lambda code: f"A{code:013d}")
+            profile_names = self._labels(users, self._profile_names, lambda code: f"Reviewer {code}")
+            helpfulness = self._labels(total_votes * 100000 + helpful_votes, self._helpfulness,
+                                       lambda code: f"{code % 100000}/{code // 100000}")
+            summaries = [pool[begin:begin + length]
+                         for begin, length in zip(summary_starts.tolist(), summary_lengths.tolist())]
+            texts = [pool[begin:begin + length] for begin, length in zip(text_starts.tolist(), text_lengths.tolist())]
+
+            yield list(map(ReviewRecord._make, zip(product_ids, user_ids, profile_names, helpfulness,
+                                                   scores.tolist(), times.tolist(), summaries, texts)))
@@ -0,0 +1,125 @@
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    raise ImportError("The asyncio MongoDB workload (--async_driver) requires the 'motor' package.") from None
+from pymongo.errors import PyMongoError
+
+from db.handler.mongodb_handler import WRITE_CONCERNS
+from utils.db_utils import review_document
+
+
+class AsyncMongoDBHandler:
+    """
+    asyncio counterpart of `MongoDBHandler` built on Motor.
+
+    The client is created inside the running event loop by `connect` and shares its connection pool
+    between all in-flight operations. Ids are kept as native ObjectIds.
+    """
+
+    def __init__(self, config, pool_max_size=100, write_concern=None):
+        self.host = config['host']
+        self.port = config['port']
+        self.database = config['database']
+        self.pool_max_size = pool_max_size
+        self.write_concern = write_concern
+        self.client = None
+        self.db = None
+
+    async def connect(self):
+        """Create the Motor client."""
+        if self.client is None:
+            self.client = AsyncIOMotorClient(host=self.host, port=self.port, maxPoolSize=self.pool_max_size)
+            if self.write_concern is None:
+                self.db = self.client[self.database]
+            else:
+                self.db = self.client.get_database(self.database, write_concern=WRITE_CONCERNS[self.write_concern])
+
+    async def close(self):
+        """Close the Motor client."""
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.db = None
+
+    async def insert_one(self, collection_name, document):
+        """Insert a single document into a collection and return its `_id` (None on error)."""
+        try:
+            return (await self.db[collection_name].insert_one(review_document(document))).inserted_id
+        except PyMongoError as e:
+            print(f"Error inserting one document: {e}")
+            return None
+
+    async def insert_many(self, collection_name, documents):
+        """Insert multiple documents into a collection."""
+        try:
+            await self.db[collection_name].insert_many([review_document(document) for document in documents])
+        except PyMongoError as e:
+            print(f"Error inserting many documents: {e}")
+        finally:
+            return len(documents)
+
+    async def read_one_by_id(self, collection_name, doc_id):
+        """Fetch a single document by `_id`."""
+        try:
+            return await self.db[collection_name].find_one({"_id": doc_id})
+        except PyMongoError as e:
+            print(f"Error reading document with id {doc_id}: {e}")
+            return None
+
+    async def update_one(self, collection_name, filter_query, update_query):
+        """Update a single document in a collection."""
+        try:
+            result = await self.db[collection_name].update_one(filter_query, update_query)
+            return result.modified_count if result.acknowledged else 0
+        except PyMongoError as e:
+            print(f"Error updating one document: {e}")
+            return 0
+
+    async def update_many_bulk(self, collection_name, ids, increment=0.123):
+        """Increment the score of multiple documents using the `$in` operator."""
+        try:
+            result = await self.db[collection_name].update_many({"_id": {"$in": list(ids)}},
+                                                                {"$inc": {"score": increment}})
+            return result.modified_count if result.acknowledged else 0
+        except PyMongoError as e:
+            print(f"Error updating many documents in bulk: {e}")
+            return 0
+
+    async def delete_one(self, collection_name, filter_query):
+        """Delete a single document in MongoDB."""
+        try:
+            result = await self.db[collection_name].delete_one(filter_query)
+            return result.deleted_count if result.acknowledged else 0
+        except PyMongoError as e:
+            print(f"Error deleting one document: {e}")
+            return 0
+
+    async def delete_many_bulk(self, collection_name, ids):
+        """Delete multiple documents in bulk using the `$in` operator."""
+        try:
+            result = await self.db[collection_name].delete_many({"_id": {"$in": list(ids)}})
+            return result.deleted_count if result.acknowledged else 0
+        except PyMongoError as e:
+            print(f"Error deleting many documents in bulk: {e}")
+            return 0
+
+    async def iter_id_chunks(self, collection_name, chunk_size=10000):
+        """Stream the `_id` values of a collection as ObjectIds in chunks through a batched projection cursor."""
+        chunk = []
+        async for doc in self.db[collection_name].find({}, {"_id": 1}, batch_size=chunk_size):
+            chunk.append(doc["_id"])
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def get_all_ids(self, collection_name):
+        """Retrieve all `_id` values from a collection as ObjectIds."""
+        try:
+            ids = [doc["_id"] async for doc in self.db[collection_name].find({}, {"_id": 1})]
+            print(f"Retrieved {len(ids)} IDs from the '{collection_name}' collection.")
+            return ids
+        except PyMongoError as e:
+            print(f"Error fetching IDs from '{collection_name}': {e}")
+            return []
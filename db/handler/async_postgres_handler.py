@@ -0,0 +1,148 @@
+try:
+    import asyncpg
+except ImportError:
+    raise ImportError("The asyncio PostgreSQL workload (--async_driver) requires the 'asyncpg' package.") from None
+
+from utils.db_utils import REVIEW_COLUMNS, review_row
+
+INSERT_REVIEW_SQL = f"INSERT INTO reviews ({', '.join(REVIEW_COLUMNS)}) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)"
+INSERT_REVIEW_RETURNING_SQL = INSERT_REVIEW_SQL + " RETURNING id"
+
+
+class AsyncPostgresDBHandler:
+    """
+    asyncio counterpart of `PostgresDBHandler` built on asyncpg.
+
+    All operations run on connections acquired from the handler's own asyncpg pool, which also caches the
+    prepared statement of every query per connection.
+    """
+
+    def __init__(self, config, pool_min_size=1, pool_max_size=100, synchronous_commit=None):
+        self.host = config['host']
+        self.port = config['port']
+        self.user = config['user']
+        self.password = config['password']
+        self.database = config['database']
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.synchronous_commit = synchronous_commit
+        self.pool = None
+
+    async def connect(self):
+        """Create the connection pool."""
+        if self.pool is None:
+            self.pool = await asyncpg.create_pool(
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                database=self.database,
+                min_size=self.pool_min_size,
+                max_size=self.pool_max_size,
+                server_settings={"synchronous_commit": self.synchronous_commit} if self.synchronous_commit else None
+            )
+
+    async def close(self):
+        """Close all connections in the pool."""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def insert_one(self, record):
+        """Insert a single record into the `reviews` table and return its id (None on error)."""
+        try:
+            return await self.pool.fetchval(INSERT_REVIEW_RETURNING_SQL, *review_row(record))
+        except Exception as e:
+            print(f"Error inserting record into PostgreSQL: {e}")
+            return None
+
+    async def insert_many(self, records):
+        """Insert multiple records into the `reviews` table."""
+        try:
+            await self.pool.executemany(INSERT_REVIEW_SQL, [review_row(record) for record in records])
+        except Exception as e:
+            print(f"Error inserting multiple records: {e}")
+        finally:
+            return len(records)
+
+    async def copy_many(self, records):
+        """Bulk load records into the `reviews` table with asyncpg's binary COPY."""
+        rows = [review_row(record) for record in records]
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.copy_records_to_table("reviews", records=rows, columns=list(REVIEW_COLUMNS))
+        except Exception as e:
+            print(f"Error copying records into PostgreSQL: {e}")
+        finally:
+            return len(rows)
+
+    async def read_one_by_id(self, record_id):
+        """Fetch a single record by id."""
+        try:
+            return await self.pool.fetchrow("SELECT * FROM reviews WHERE id = $1", record_id)
+        except Exception as e:
+            print(f"Error reading record with id {record_id}: {e}")
+            return None
+
+    async def update_one(self, update_query, *params):
+        """Update a single record in the `reviews` table."""
+        try:
+            await self.pool.execute(update_query, *params)
+        except Exception as e:
+            print(f"Error updating one record: {e}")
+
+    async def update_score(self, record_id, increment=0.123):
+        """Increment the score of a single record."""
+        try:
+            await self.pool.execute("UPDATE reviews SET score = score + $1 WHERE id = $2", increment, record_id)
+        except Exception as e:
+            print(f"Error updating score of record with id {record_id}: {e}")
+
+    async def update_many_bulk(self, ids, increment=0.123):
+        """Increment the score of multiple records with a single query."""
+        try:
+            await self.pool.execute("UPDATE reviews SET score = score + $1 WHERE id = ANY($2::int[])",
+                                    increment, list(ids))
+        except Exception as e:
+            print(f"Error updating many records in bulk: {e}")
+        finally:
+            return len(ids)
+
+    async def delete_one(self, record_id):
+        """Delete a single record from the `reviews` table."""
+        try:
+            await self.pool.execute("DELETE FROM reviews WHERE id = $1", record_id)
+        except Exception as e:
+            print(f"Error deleting record with id {record_id}: {e}")
+
+    async def delete_many_bulk(self, bulk_ids):
+        """Delete multiple records in bulk from the `reviews` table."""
+        try:
+            await self.pool.execute("DELETE FROM reviews WHERE id = ANY($1::int[])", list(bulk_ids))
+        except Exception as e:
+            print(f"Error deleting records in bulk: {e}")
+        finally:
+            return len(bulk_ids)
+
+    async def iter_review_ids(self, chunk_size=10000):
+        """Stream the IDs of the `reviews` table in ascending chunks using keyset pagination."""
+        last_id = 0
+        while True:
+            rows = await self.pool.fetch("SELECT id FROM reviews WHERE id > $1 ORDER BY id LIMIT $2",
+                                         last_id, chunk_size)
+            if not rows:
+                return
+            chunk = [row[0] for row in rows]
+            yield chunk
+            last_id = chunk[-1]
+
+    async def get_all_review_ids(self):
+        """Retrieve all IDs from the `reviews` table."""
+        try:
+            rows = await self.pool.fetch("SELECT id FROM reviews;")
+            id_list = [row[0] for row in rows]
+            print(f"Retrieved {len(id_list)} IDs from the `reviews` table.")
+            return id_list
+        except Exception as e:
+            print(f"Error retrieving IDs from `reviews`: {e}")
+            return []
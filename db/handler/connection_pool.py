@@ -0,0 +1,161 @@
+import threading
+import time
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import PoolError
+
+DEFAULT_CHECKOUT_TIMEOUT = 30.0
+
+
+class InstrumentedConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool that records how it is used.
+
+    Unlike `SimpleConnectionPool`, checkouts are guarded by a lock and block until a connection is returned
+    when all `maxconn` connections are in use. The pool keeps track of checkout wait time, saturation and
+    how many connections were created versus reused, so pool contention can be told apart from database latency.
+    """
+
+    def __init__(self, connect, minconn=1, maxconn=20, timeout=DEFAULT_CHECKOUT_TIMEOUT, on_close=None):
+        """
+        :param connect: Callable returning a new psycopg2 connection.
+        :param minconn: Number of connections opened up front.
+        :param maxconn: Maximum number of connections open at the same time.
+        :param timeout: Seconds to wait for a free connection before raising `PoolError` (None waits forever).
+                        A finite timeout turns a leaked connection into an error instead of a hang.
+        :param on_close: Callable run with every connection the pool closes, e.g. to drop per-connection state
+                         kept by `id(conn)` before the id can be reused.
+        """
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Invalid pool size: minconn={minconn}, maxconn={maxconn}.")
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.on_close = on_close
+        self.closed = False
+        self._condition = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._in_use = 0
+        self.reset_stats()
+
+        for _ in range(minconn):
+            self._idle.append(self._connect())
+            self._size += 1
+            self.connections_created += 1
+
+    def reset_stats(self):
+        """Reset the usage counters, e.g. before a new benchmark phase."""
+        self.checkouts = 0
+        self.waited_checkouts = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.peak_in_use = getattr(self, "_in_use", 0)
+
+    def getconn(self):
+        """Check out a connection, blocking while the pool is exhausted."""
+        start = time.perf_counter()
+        waited = False
+        conn = None
+        created = False
+
+        with self._condition:
+            if self.closed:
+                raise PoolError("connection pool is closed")
+            while not self._idle and self._size >= self.maxconn:
+                waited = True
+                remaining = None if self.timeout is None else self.timeout - (time.perf_counter() - start)
+                if remaining is not None and remaining <= 0:
+                    raise PoolError(f"no connection available within {self.timeout} seconds")
+                self._condition.wait(remaining)
+                if self.closed:
+                    raise PoolError("connection pool is closed")
+
+            if self._idle:
+                conn = self._idle.pop()
+                self.connections_reused += 1
+            else:
+                # Reserve the slot now; the connection itself is opened outside the lock
+                self._size += 1
+                created = True
+            self._in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self._in_use)
+
+        if created:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._condition.notify()
+                raise
+
+        wait_time = time.perf_counter() - start
+        with self._condition:
+            if created:
+                self.connections_created += 1
+            self.checkouts += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+            if waited:
+                self.waited_checkouts += 1
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Return a connection to the pool, rolling back any transaction left open."""
+        if not close and not conn.closed:
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                close = True
+
+        with self._condition:
+            self._in_use -= 1
+            if close or conn.closed or self.closed:
+                self._size -= 1
+                self._close(conn)
+            else:
+                self._idle.append(conn)
+            self._condition.notify()
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts."""
+        with self._condition:
+            self.closed = True
+            for conn in self._idle:
+                self._close(conn)
+            self._size -= len(self._idle)
+            self._idle = []
+            self._condition.notify_all()
+
+    def _close(self, conn):
+        """Close a connection leaving the pool and report it to `on_close`."""
+        if self.on_close is not None:
+            self.on_close(conn)
+        if not conn.closed:
+            conn.close()
+
+    def stats(self):
+        """Return a snapshot of the pool usage counters."""
+        with self._condition:
+            return {
+                "minconn": self.minconn,
+                "maxconn": self.maxconn,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "peak_in_use": self.peak_in_use,
+                "saturation": self.peak_in_use / self.maxconn,
+                "checkouts": self.checkouts,
+                "waited_checkouts": self.waited_checkouts,
+                "total_wait_time": self.total_wait_time,
+                "mean_wait_time": self.total_wait_time / self.checkouts if self.checkouts else 0.0,
+                "max_wait_time": self.max_wait_time,
+                "connections_created": self.connections_created,
+                "connections_reused": self.connections_reused,
+            }
@@ -0,0 +1,85 @@
+import struct
+
+from utils.db_utils import REVIEW_COLUMNS, review_row
+
+COPY_FORMATS = ("text", "binary")
+
+# Wire types of the `reviews` columns, in REVIEW_COLUMNS order, for the binary COPY format
+_BINARY_COLUMN_TYPES = ("text", "text", "text", "text", "float8", "int8", "text", "text")
+_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_BINARY_TRAILER = struct.pack("!h", -1)
+_BINARY_NULL = struct.pack("!i", -1)
+
+_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\n": "\\n", "\r": "\\r", "\t": "\\t"})
+
+
+def encode_text_row(row):
+    """Encode a row as one line of the COPY text format."""
+    fields = ["\\N" if value is None else str(value).translate(_TEXT_ESCAPES) for value in row]
+    return ("\t".join(fields) + "\n").encode("utf-8")
+
+
+def encode_binary_row(row):
+    """Encode a row as one tuple of the COPY binary format."""
+    parts = [struct.pack("!h", len(row))]
+    for value, column_type in zip(row, _BINARY_COLUMN_TYPES):
+        if value is None:
+            parts.append(_BINARY_NULL)
+        elif column_type == "float8":
+            parts.append(struct.pack("!id", 8, value))
+        elif column_type == "int8":
+            parts.append(struct.pack("!iq", 8, value))
+        else:
+            data = value.encode("utf-8")
+            parts.append(struct.pack("!i", len(data)))
+            parts.append(data)
+    return b"".join(parts)
+
+
+class CopyRecordStream:
+    """
+    File-like object feeding normalized records to `COPY ... FROM STDIN`.
+
+    Records are pulled from the source iterable and encoded into the in-memory buffer only when
+    psycopg2 asks for more data, so a bulk is never materialized as a whole.
+    """
+
+    def __init__(self, records, copy_format="text"):
+        if copy_format not in COPY_FORMATS:
+            raise ValueError(f"Unsupported COPY format '{copy_format}'. Expected one of {COPY_FORMATS}.")
+        self.copy_format = copy_format
+        self.rows = 0
+        self._records = iter(records)
+        self._buffer = bytearray()
+        self._exhausted = False
+
+        if copy_format == "binary":
+            self._encode = encode_binary_row
+            self._buffer += _BINARY_HEADER
+        else:
+            self._encode = encode_text_row
+
+    def copy_sql(self, table="reviews"):
+        """Build the `COPY` statement matching this stream's columns and format."""
+        return f"COPY {table} ({', '.join(REVIEW_COLUMNS)}) FROM STDIN WITH (FORMAT {self.copy_format})"
+
+    def _fill(self):
+        """Encode the next record into the buffer, or the trailer once the source is exhausted."""
+        try:
+            record = next(self._records)
+        except StopIteration:
+            self._exhausted = True
+            if self.copy_format == "binary":
+                self._buffer += _BINARY_TRAILER
+            return
+        self._buffer += self._encode(review_row(record))
+        self.rows += 1
+
+    def read(self, size=-1):
+        while not self._exhausted and (size is None or size < 0 or len(self._buffer) < size):
+            self._fill()
+        if size is None or size < 0:
+            size = len(self._buffer)
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
@@ -1,41 +1,247 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import bson
 from bson import ObjectId
-from pymongo import MongoClient, ASCENDING
-from pymongo.errors import PyMongoError
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient, ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from pymongo.write_concern import WriteConcern
+
+from utils.db_utils import CONNECTION_MODES, MONGO_WRITE_CONCERNS, review_document
+from utils.query_plans import summarize_mongo_plan
+
+WRITE_CONCERNS = {
+    "w0": WriteConcern(w=0),
+    "w1": WriteConcern(w=1, j=False),
+    "journaled": WriteConcern(w=1, j=True),
+}
+
+
+def split_by_size(documents, max_batch_bytes):
+    """
+    Encode documents to BSON and split them into consecutive sub-batches whose size stays within `max_batch_bytes`.
+
+    The sub-batches hold `RawBSONDocument`s, which pymongo sends without encoding them a second time; the
+    server assigns their `_id`. A single document larger than the limit still gets a sub-batch of its own.
+    """
+    batch, batch_bytes = [], 0
+    for document in documents:
+        encoded = RawBSONDocument(bson.encode(document))
+        size = len(encoded.raw)
+        if batch and batch_bytes + size > max_batch_bytes:
+            yield batch, batch_bytes
+            batch, batch_bytes = [], 0
+        batch.append(encoded)
+        batch_bytes += size
+    if batch:
+        yield batch, batch_bytes
 
 
 class MongoDBHandler:
-    def __init__(self, config, use_persistent_connection=True):
+    def __init__(self, config, use_persistent_connection=True, connection_mode=None, pool_max_size=100,
+                 write_concern=None, capture_plans=False):
+        """
+        :param connection_mode: "per_op" (new `MongoClient` per operation), "persistent" (one client holding a
+                                single connection per thread, like the persistent PostgreSQL connections) or
+                                "pooled" (one client with up to `pool_max_size` connections).
+        :param write_concern: "w0", "w1" or "journaled" write concern applied to the written collections,
+                              None keeps the server default.
+        :param capture_plans: Record an `explain` with "executionStats" verbosity of the queries passed to
+                              `capture_find_plan` and `capture_aggregate_plan`, see `take_plans`.
+        """
+        if write_concern is not None and write_concern not in MONGO_WRITE_CONCERNS:
+            raise ValueError(f"Unknown write concern '{write_concern}'. Expected one of {MONGO_WRITE_CONCERNS}.")
+        self.write_concern = write_concern
+        if connection_mode is None:
+            connection_mode = "pooled" if use_persistent_connection else "per_op"
+        elif connection_mode not in CONNECTION_MODES:
+            raise ValueError(f"Unknown connection mode '{connection_mode}'. Expected one of {CONNECTION_MODES}.")
+        self.connection_mode = connection_mode
         self.host = config['host']
         self.port = config['port']
         self.database = config['database']
-        self.use_persistent_connection = use_persistent_connection
-        self.client = None
-        self.db = None
+        self.use_persistent_connection = connection_mode != "per_op"
+        self.pool_max_size = 1 if connection_mode == "persistent" else pool_max_size
+
+        # Only the pooled client is shared: per-operation clients are thread-local so concurrent operations never
+        # close each other's client, and each thread keeps its own persistent client
+        self._state = SimpleNamespace() if connection_mode == "pooled" else threading.local()
+        self._persistent_clients = []
+        self._persistent_lock = threading.Lock()
+
+        self.capture_plans = capture_plans
+        self.captured_plans = []
+        self._session = None
+        self._commit_every = 1
+        self._pending_commits = 0
+        self._pending_ids = []
+        self.discarded_writes = 0
+        self.discarded_groups = 0
+        self.discarded_ids = []
 
         if self.use_persistent_connection:
             self._connect()
 
+    @property
+    def client(self):
+        return getattr(self._state, "client", None)
+
+    @client.setter
+    def client(self, value):
+        self._state.client = value
+
+    @property
+    def db(self):
+        return getattr(self._state, "db", None)
+
+    @db.setter
+    def db(self, value):
+        self._state.db = value
+
     def _connect(self):
         """Establish a connection to the MongoDB server."""
         if not self.client:
-            self.client = MongoClient(host=self.host, port=self.port)
+            self.client = MongoClient(host=self.host, port=self.port, maxPoolSize=self.pool_max_size)
             self.db = self.client[self.database]
+            if self.connection_mode == "persistent":
+                with self._persistent_lock:
+                    self._persistent_clients.append(self.client)
+
+    def _collection(self, collection_name):
+        """Return a collection configured with the handler's write concern."""
+        if self.write_concern is None:
+            return self.db[collection_name]
+        return self.db.get_collection(collection_name, write_concern=WRITE_CONCERNS[self.write_concern])
 
     def _get_connection(self):
-        """Ensure a connection is available."""
-        if not self.use_persistent_connection:
-            self._connect()
+        """Ensure a connection is available, opening the client of the calling thread if needed."""
+        self._connect()
 
     def _close_connection(self):
         """Close the connection if not using persistent mode."""
+        if self._session is not None:
+            return
         if not self.use_persistent_connection and self.client:
             self.client.close()
             self.client = None
             self.db = None
 
+    def _start_group(self):
+        """
+        Start the session transaction of the next group with the handler's write concern: inside a transaction
+        MongoDB ignores the write concern of the collections and applies the transaction's one at commit.
+        """
+        write_concern = WRITE_CONCERNS[self.write_concern] if self.write_concern is not None else None
+        self._session.start_transaction(write_concern=write_concern)
+
+    def _after_write(self, document_id=None):
+        """
+        Count a write towards the open session transaction and commit it every `commit_every` writes.
+
+        A write is only counted once it can be reported as successful: when the commit that closes a group
+        fails, the write itself fails and only the earlier writes of the group are discarded.
+
+        :param document_id: `_id` reported for the write, listed in `discarded_ids` if its group is aborted.
+        """
+        if self._session is None:
+            return
+        if self._pending_commits + 1 >= self._commit_every:
+            self._session.commit_transaction()
+            self._start_group()
+            self._pending_commits = 0
+            self._pending_ids = []
+        else:
+            self._pending_commits += 1
+            if document_id is not None:
+                self._pending_ids.append(document_id)
+
+    def _discard_group(self):
+        """
+        Abort the open session transaction after a failed write and start a new group.
+
+        The writes of the aborted group that were already reported as successful are counted in
+        `discarded_writes` and `discarded_groups`, and their ids are added to `discarded_ids`.
+        """
+        if self._session is None:
+            return
+        if self._pending_commits:
+            self.discarded_writes += self._pending_commits
+            self.discarded_groups += 1
+            self.discarded_ids.extend(self._pending_ids)
+            self._pending_commits = 0
+            self._pending_ids = []
+        try:
+            if self._session.in_transaction:
+                self._session.abort_transaction()
+        except PyMongoError as e:
+            print(f"Error aborting the failed group of operations: {e}")
+        self._start_group()
+
+    @contextmanager
+    def batched_commits(self, commit_every):
+        """
+        Group the single-document writes made inside the block into session transactions of `commit_every`
+        operations. Multi-document transactions require a replica set or sharded cluster.
+        With `commit_every` <= 1 every write stays individually acknowledged.
+
+        A failed write aborts the whole open transaction. The writes lost this way that had been reported as
+        successful are counted in `discarded_writes` (the groups in `discarded_groups`, the returned ids in
+        `discarded_ids`), all reset when the block starts, and the next writes start a new transaction.
+
+        :raises ValueError: With the "w0" write concern, which MongoDB transactions do not accept.
+        """
+        if self.write_concern == "w0" and commit_every > 1:
+            raise ValueError(f"The 'w0' write concern cannot be used with group commits (commit_every={commit_every}): "
+                             "MongoDB transactions require acknowledged writes.")
+        self.discarded_writes = 0
+        self.discarded_groups = 0
+        self.discarded_ids = []
+        if commit_every <= 1:
+            yield
+            return
+
+        self._get_connection()
+        self._session = self.client.start_session()
+        self._commit_every = commit_every
+        self._pending_commits = 0
+        self._pending_ids = []
+        self._start_group()
+        try:
+            yield
+        finally:
+            session = self._session
+            self._session = None
+            try:
+                if session.in_transaction:
+                    session.commit_transaction()
+            except PyMongoError as e:
+                print(f"Error committing the last group of operations: {e}")
+                if self._pending_commits:
+                    self.discarded_writes += self._pending_commits
+                    self.discarded_groups += 1
+                    self.discarded_ids.extend(self._pending_ids)
+            finally:
+                session.end_session()
+                self._pending_commits = 0
+                self._pending_ids = []
+                self._close_connection()
+            if self.discarded_writes:
+                print(f"Discarded {self.discarded_writes} write(s) of {self.discarded_groups} failed group "
+                      f"commit(s).")
+
     def close_persistent_connection(self):
-        """Close the persistent connection."""
-        if self.use_persistent_connection and self.client:
+        """Close the persistent connection, or in "persistent" mode the client of every thread."""
+        if self.connection_mode == "persistent":
+            with self._persistent_lock:
+                clients, self._persistent_clients = self._persistent_clients, []
+                self._state = threading.local()
+            for client in clients:
+                client.close()
+        elif self.use_persistent_connection and self.client:
             self.client.close()
             self.client = None
             self.db = None
@@ -67,21 +273,87 @@ class MongoDBHandler:
         finally:
             self._close_connection()
 
+    def _copy_collection(self, source, target):
+        """Replace `target` with a server-side copy of `source` made by an `$out` aggregation."""
+        if source not in self.db.list_collection_names():
+            raise ValueError(f"Collection '{source}' does not exist.")
+        # $out swaps the new collection in atomically and keeps the indexes of an existing target
+        self.db[source].aggregate([{"$out": target}], allowDiskUse=True)
+
+    def snapshot_collection(self, collection_name, snapshot_name=None):
+        """
+        Save a copy of a collection, made on the server without reading the documents back.
+
+        :param snapshot_name: Name of the snapshot collection, defaults to "<collection>_snapshot".
+        :return: True if the snapshot was created.
+        """
+        snapshot_name = snapshot_name or f"{collection_name}_snapshot"
+        try:
+            self._get_connection()
+            self._copy_collection(collection_name, snapshot_name)
+            print(f"Collection '{collection_name}' saved as snapshot '{snapshot_name}'.")
+            return True
+        except (PyMongoError, ValueError) as e:
+            print(f"Error creating snapshot '{snapshot_name}': {e}")
+            return False
+        finally:
+            self._close_connection()
+
+    def restore_collection(self, collection_name, snapshot_name=None):
+        """
+        Replace a collection with the documents of a snapshot taken with `snapshot_collection`.
+
+        The collection keeps its indexes; they are rebuilt for the restored documents.
+
+        :param snapshot_name: Name of the snapshot collection, defaults to "<collection>_snapshot".
+        :return: True if the collection was restored.
+        """
+        snapshot_name = snapshot_name or f"{collection_name}_snapshot"
+        try:
+            self._get_connection()
+            self._copy_collection(snapshot_name, collection_name)
+            print(f"Collection '{collection_name}' restored from snapshot '{snapshot_name}'.")
+            return True
+        except (PyMongoError, ValueError) as e:
+            print(f"Error restoring snapshot '{snapshot_name}': {e}")
+            return False
+        finally:
+            self._close_connection()
+
+    def count_documents(self, collection_name):
+        """Return the number of documents of a collection from its metadata, or None on error."""
+        try:
+            self._get_connection()
+            return self.db[collection_name].estimated_document_count()
+        except PyMongoError as e:
+            print(f"Error counting the documents of '{collection_name}': {e}")
+            return None
+        finally:
+            self._close_connection()
+
     def insert_one(self, collection_name, document):
-        """Insert a single document into a collection."""
+        """Insert a single document into a collection and return its `_id` (None on error)."""
+        inserted_id = None
         try:
             self._get_connection()
-            self.db[collection_name].insert_one(document)
+            new_id = self._collection(collection_name).insert_one(review_document(document),
+                                                                  session=self._session).inserted_id
+            self._after_write(new_id)
+            # No id if the commit closing its group failed; an id returned while its group is still open is
+            # listed in `discarded_ids` if that transaction is aborted later
+            inserted_id = new_id
         except PyMongoError as e:
             print(f"Error inserting one document: {e}")
+            self._discard_group()
         finally:
             self._close_connection()
+            return inserted_id
 
     def insert_many(self, collection_name, documents):
         """Insert multiple documents into a collection."""
         try:
             self._get_connection()
-            self.db[collection_name].insert_many(documents)
+            self._collection(collection_name).insert_many([review_document(document) for document in documents])
             # print(f"Inserted {len(documents)} documents into '{collection_name}'.")
         except PyMongoError as e:
             print(f"Error inserting many documents: {e}")
@@ -89,6 +361,49 @@ class MongoDBHandler:
             self._close_connection()
             return len(documents)
 
+    def _insert_sub_batch(self, collection_name, documents, batch_bytes):
+        """Insert one sub-batch with `ordered=False` and return its size, byte size and time."""
+        inserted = 0
+        start = time.perf_counter()
+        try:
+            self._get_connection()
+            result = self._collection(collection_name).insert_many(documents, ordered=False)
+            inserted = len(result.inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            errors = len(e.details.get("writeErrors", []))
+            print(f"Unordered insert of {len(documents)} documents partially failed with {errors} errors.")
+        except PyMongoError as e:
+            print(f"Error inserting sub-batch: {e}")
+        finally:
+            self._close_connection()
+        return {"documents": len(documents), "inserted": inserted, "bytes": batch_bytes,
+                "time": time.perf_counter() - start}
+
+    @staticmethod
+    def prepare_sub_batches(documents, max_batch_bytes=1024 * 1024):
+        """
+        Encode documents into the sub-batches of at most `max_batch_bytes` taken by `insert_many_parallel`.
+
+        :return: List of (encoded documents, BSON size) tuples.
+        """
+        return list(split_by_size((review_document(document) for document in documents), max_batch_bytes))
+
+    def insert_many_parallel(self, collection_name, sub_batches, workers=4):
+        """
+        Insert sub-batches from `prepare_sub_batches` unordered, sent in parallel.
+
+        The sub-batches share the client's connection pool, so up to `workers` of them are in flight at once.
+
+        :return: Tuple of inserted count and a list of per-sub-batch stats (documents, inserted, bytes, time).
+        """
+        if workers <= 1 or len(sub_batches) == 1:
+            stats = [self._insert_sub_batch(collection_name, batch, size) for batch, size in sub_batches]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                stats = list(executor.map(lambda item: self._insert_sub_batch(collection_name, *item), sub_batches))
+        return sum(stat["inserted"] for stat in stats), stats
+
     def query_one_field(self, collection_name, field, value, use_index=False):
         """Query documents based on one field."""
         try:
@@ -103,18 +418,62 @@ class MongoDBHandler:
         finally:
             self._close_connection()
 
+    def _capture_plan(self, command, label):
+        """
+        Explain a find or aggregate command with execution statistics and keep the plan with a summary when
+        `capture_plans` is enabled.
+
+        The explain command executes the query once more, so call this after the timed run, never inside it.
+        """
+        if not self.capture_plans:
+            return
+        try:
+            self._get_connection()
+            plan = self.db.command("explain", command, verbosity="executionStats")
+            self.captured_plans.append({"label": label, "command": command, "summary": summarize_mongo_plan(plan),
+                                        "plan": plan})
+        except PyMongoError as e:
+            print(f"Error capturing the plan of query '{label}': {e}")
+        finally:
+            self._close_connection()
+
+    def capture_find_plan(self, collection_name, filter_query, label=None):
+        """Capture the plan of a find query, see `_capture_plan`."""
+        self._capture_plan({"find": collection_name, "filter": filter_query}, label)
+
+    def capture_aggregate_plan(self, collection_name, pipeline, label=None):
+        """Capture the plan of an aggregation pipeline, see `_capture_plan`."""
+        self._capture_plan({"aggregate": collection_name, "pipeline": pipeline, "cursor": {}}, label)
+
+    def take_plans(self):
+        """Return the plans captured since the last call and forget them."""
+        plans, self.captured_plans = self.captured_plans, []
+        return plans
+
     def query_multiple_fields(self, collection_name, filter_query):
         """Query documents based on multiple fields."""
         try:
             self._get_connection()
-            results = self.db[collection_name].find(filter_query)
-            return list(results)
+            results = list(self.db[collection_name].find(filter_query))
+            return results
         except PyMongoError as e:
             print(f"Error querying on multiple fields: {e}")
             return []
         finally:
             self._close_connection()
 
+    def aggregate(self, collection_name, pipeline):
+        """Run an aggregation pipeline and return its documents."""
+        try:
+            self._get_connection()
+            results = list(self.db[collection_name].aggregate(pipeline))
+            return results
+        except PyMongoError as e:
+            print(f"Error executing aggregation pipeline: {e}")
+            return []
+        finally:
+            self._close_connection()
+
     def create_single_field_index(self, collection_name, field, order=ASCENDING):
         """Create an index on a single field."""
         try:
@@ -140,6 +499,94 @@ class MongoDBHandler:
         finally:
             self._close_connection()
 
+    def create_indexes(self, collection_name, indexes):
+        """
+        Build several ascending indexes with a single `createIndexes` command.
+
+        The server builds all the indexes of one command in a single scan of the collection, which is how
+        secondary indexes are rebuilt after a bulk load.
+
+        :param indexes: Field tuples, one per index.
+        :return: Names of the created indexes, None on error.
+        """
+        names = []
+        try:
+            self._get_connection()
+            if indexes:
+                names = self.db[collection_name].create_indexes(
+                    [IndexModel([(field, ASCENDING) for field in fields]) for fields in indexes])
+            print(f"Indexes {names} created in collection '{collection_name}'.")
+        except PyMongoError as e:
+            print(f"Error creating indexes: {e}")
+            names = None
+        finally:
+            self._close_connection()
+            return names
+
+    def create_index(self, collection_name, keys, name, **options):
+        """
+        Create a named index.
+
+        :param keys: List of (field, direction) pairs, e.g. [("product_id", "hashed")].
+        :param options: Index options such as `partialFilterExpression`.
+        :return: True if the index was created.
+        """
+        created = False
+        try:
+            self._get_connection()
+            self.db[collection_name].create_index(keys, name=name, **options)
+            created = True
+            print(f"Index '{name}' created on {keys} in collection '{collection_name}'.")
+        except PyMongoError as e:
+            print(f"Error creating index '{name}': {e}")
+        finally:
+            self._close_connection()
+            return created
+
+    def drop_index(self, collection_name, name):
+        """Drop an index if it exists."""
+        try:
+            self._get_connection()
+            if name in self.db[collection_name].index_information():
+                self.db[collection_name].drop_index(name)
+        except PyMongoError as e:
+            print(f"Error dropping index '{name}': {e}")
+        finally:
+            self._close_connection()
+
+    def index_size(self, collection_name, name):
+        """Return the storage size of an index in bytes, or None on error."""
+        size = None
+        try:
+            self._get_connection()
+            stats = next(self.db[collection_name].aggregate([{"$collStats": {"storageStats": {}}}]))
+            size = stats["storageStats"]["indexSizes"].get(name)
+        except (PyMongoError, StopIteration, KeyError) as e:
+            print(f"Error reading the size of index '{name}': {e}")
+        finally:
+            self._close_connection()
+            return size
+
+    def sample_documents(self, collection_name, fields, count):
+        """
+        Sample `count` documents with a `$sample` stage.
+
+        :param fields: Fields to return.
+        :return: List of tuples of the sampled fields.
+        """
+        samples = []
+        try:
+            self._get_connection()
+            projection = {field: 1 for field in fields}
+            projection["_id"] = 0
+            documents = self.db[collection_name].aggregate([{"$sample": {"size": count}}, {"$project": projection}])
+            samples = [tuple(document.get(field) for field in fields) for document in documents]
+        except PyMongoError as e:
+            print(f"Error sampling documents of '{collection_name}': {e}")
+        finally:
+            self._close_connection()
+            return samples
+
     def list_indexes(self, collection_name):
         """List all indexes in a collection."""
         try:
@@ -170,13 +617,16 @@ class MongoDBHandler:
         result = None
         try:
             self._get_connection()
-            result = self.db[collection_name].update_one(filter_query, update_query)
+            result = self._collection(collection_name).update_one(filter_query, update_query, session=self._session)
+            self._after_write()
             # print(f"Updated {result.modified_count} document in '{collection_name}'.")
         except PyMongoError as e:
             print(f"Error updating one document: {e}")
+            result = None
+            self._discard_group()
         finally:
             self._close_connection()
-            return result.modified_count
+            return result.modified_count if result is not None and result.acknowledged else 0
 
     def update_many_bulk(self, collection_name, bulk_queries):
         """Update multiple documents in bulk in MongoDB using the `$in` operator."""
@@ -192,27 +642,48 @@ class MongoDBHandler:
             update_query = {"$inc": {"score": 0.123}}
 
             # Perform the bulk update
-            result = self.db[collection_name].update_many(filter_query, update_query)
+            result = self._collection(collection_name).update_many(filter_query, update_query)
             # print(f"Updated {result.modified_count} documents in '{collection_name}'.")
 
         except PyMongoError as e:
             print(f"Error updating many documents in bulk: {e}")
         finally:
             self._close_connection()
-            return result.modified_count
+            return result.modified_count if result is not None and result.acknowledged else 0
+
+    def update_many_values(self, collection_name, updates):
+        """
+        Set a different score on each document of a bulk with one unordered `bulk_write`.
+
+        :param updates: List of (document_id, new_score) tuples.
+        :return: Number of documents modified.
+        """
+        result = None
+        try:
+            self._get_connection()
+            operations = [UpdateOne({"_id": doc_id}, {"$set": {"score": score}}) for doc_id, score in updates]
+            result = self._collection(collection_name).bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            print(f"Error updating many documents with per-document values: {e}")
+        finally:
+            self._close_connection()
+            return result.modified_count if result is not None and result.acknowledged else 0
 
     def delete_one(self, collection_name, filter_query):
         """Delete a single document in MongoDB."""
         result = None
         try:
             self._get_connection()
-            result = self.db[collection_name].delete_one(filter_query)
+            result = self._collection(collection_name).delete_one(filter_query, session=self._session)
+            self._after_write()
             # print(f"Deleted {result.deleted_count} document from '{collection_name}'.")
         except PyMongoError as e:
             print(f"Error deleting one document: {e}")
+            result = None
+            self._discard_group()
         finally:
             self._close_connection()
-            return result.deleted_count
+            return result.deleted_count if result is not None and result.acknowledged else 0
 
     def delete_many_bulk(self, collection_name, bulk_queries):
         """Delete multiple documents in bulk in MongoDB using the `$in` operator."""
@@ -227,14 +698,43 @@ class MongoDBHandler:
             filter_query = {"_id": {"$in": ids}}
 
             # Perform the bulk delete
-            result = self.db[collection_name].delete_many(filter_query)
+            result = self._collection(collection_name).delete_many(filter_query)
             # print(f"Deleted {result.deleted_count} documents in '{collection_name}'.")
 
         except PyMongoError as e:
             print(f"Error deleting many documents in bulk: {e}")
         finally:
             self._close_connection()
-            return result.deleted_count
+            return result.deleted_count if result is not None and result.acknowledged else 0
+
+    def iter_id_chunks(self, collection_name, chunk_size=10000):
+        """
+        Stream the `_id` values of a collection in chunks through a batched projection cursor.
+
+        IDs are yielded as native ObjectIds, so they can be used in filters without conversion.
+
+        :param collection_name: Name of the collection.
+        :param chunk_size: Number of IDs per yielded list, also used as the cursor batch size.
+        :return: Generator of lists of ObjectIds.
+        """
+        # Per-operation clients are closed after every operation, so the cursor gets a client of its own
+        client = None if self.use_persistent_connection else MongoClient(host=self.host, port=self.port)
+        if client is None:
+            self._get_connection()
+        db = self.db if client is None else client[self.database]
+        try:
+            cursor = db[collection_name].find({}, {"_id": 1}, batch_size=chunk_size)
+            chunk = []
+            for doc in cursor:
+                chunk.append(doc["_id"])
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            if client is not None:
+                client.close()
 
     def get_all_ids(self, collection_name):
         """Retrieve all `_id` values from a MongoDB collection."""
@@ -1,10 +1,51 @@
+import io
+import random
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
 from psycopg2 import sql
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.extras import execute_values
+
+from db.handler.connection_pool import DEFAULT_CHECKOUT_TIMEOUT, InstrumentedConnectionPool
+from db.handler.copy_stream import CopyRecordStream
+from db.handler.prepared_statements import PreparedStatementCache
+from utils.db_utils import CONNECTION_MODES, PG_SYNCHRONOUS_COMMIT_LEVELS, REVIEW_COLUMNS, review_row
+from utils.query_plans import summarize_postgres_plan
+
+INSERT_STRATEGIES = ("executemany", "values", "copy")
+BULK_UPDATE_METHODS = ("values", "temp_table")
+ID_SOURCES = ("keyset", "server_cursor")
 
 
 class PostgresDBHandler:
-    def __init__(self, config, use_persistent_connection=True, use_connection_pooling=True, pool_size=100):
+    def __init__(self, config, use_persistent_connection=True, use_connection_pooling=True, pool_min_size=1,
+                 pool_max_size=100, use_prepared_statements=False, statement_cache_size=16, connection_mode=None,
+                 synchronous_commit=None, capture_plans=False, pool_timeout=DEFAULT_CHECKOUT_TIMEOUT):
+        """
+        :param connection_mode: "per_op" (new connection per operation), "persistent" (one connection kept open
+                                per thread) or "pooled". When given, it overrides the two connection flags.
+        :param synchronous_commit: `synchronous_commit` ("off", "local" or "on") set on every session,
+                                   None keeps the server default.
+        :param capture_plans: Record an `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)` plan of the queries run with
+                              `capture_plan`, see `take_plans`.
+        :param pool_timeout: Seconds to wait for a free pooled connection before raising `PoolError`.
+        """
+        if synchronous_commit is not None and synchronous_commit not in PG_SYNCHRONOUS_COMMIT_LEVELS:
+            raise ValueError(f"Unknown synchronous_commit '{synchronous_commit}'. "
+                             f"Expected one of {PG_SYNCHRONOUS_COMMIT_LEVELS}.")
+        self.synchronous_commit = synchronous_commit
+        if connection_mode is not None:
+            if connection_mode not in CONNECTION_MODES:
+                raise ValueError(f"Unknown connection mode '{connection_mode}'. Expected one of {CONNECTION_MODES}.")
+            use_persistent_connection = connection_mode == "persistent"
+            use_connection_pooling = connection_mode == "pooled"
+        elif use_connection_pooling:
+            connection_mode = "pooled"
+        else:
+            connection_mode = "persistent" if use_persistent_connection else "per_op"
+        self.connection_mode = connection_mode
         self.host = config['host']
         self.port = config['port']
         self.user = config['user']
@@ -13,62 +54,213 @@ class PostgresDBHandler:
         self.use_persistent_connection = use_persistent_connection
         self.use_connection_pooling = use_connection_pooling
         self.pool = None
-
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.pool_timeout = pool_timeout
+        self.use_prepared_statements = use_prepared_statements
+        self.statement_cache = PreparedStatementCache(max_size=statement_cache_size)
+        self._pinned_connection = None
+        self._commit_every = 1
+        self._pending_commits = 0
+        self._pending_ids = []
+        self.discarded_writes = 0
+        self.discarded_groups = 0
+        self.discarded_ids = []
+        self.capture_plans = capture_plans
+        self.captured_plans = []
+        # Persistent connections are per thread: threads sharing one psycopg2 connection would share its
+        # transaction, so one thread's commit or rollback would end the others' work
+        self._local = threading.local()
+        self._persistent_connections = []
+        self._persistent_lock = threading.Lock()
+        self._open_connections()
+
+    def _open_connections(self):
+        """Open the persistent connection or the connection pool, depending on the connection mode."""
         if self.use_persistent_connection:
-            self.connection = self._connect()
-        else:
-            self.connection = None
-
+            self._thread_connection()
         if self.use_connection_pooling:
-            self.pool = SimpleConnectionPool(
-                minconn=1,
-                maxconn=pool_size,
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database
+            self.pool = InstrumentedConnectionPool(
+                self._connect,
+                minconn=self.pool_min_size,
+                maxconn=self.pool_max_size,
+                timeout=self.pool_timeout,
+                on_close=self.statement_cache.forget
             )
 
     def _connect(self):
         """Establish a connection to the PostgreSQL database."""
+        options = f"-c synchronous_commit={self.synchronous_commit}" if self.synchronous_commit else None
         return psycopg2.connect(
             host=self.host,
             port=self.port,
             user=self.user,
             password=self.password,
-            database=self.database
+            database=self.database,
+            options=options
         )
 
+    @property
+    def connection(self):
+        """Persistent connection of the calling thread, None until the thread used one."""
+        return getattr(self._local, "connection", None)
+
+    def _thread_connection(self):
+        """Return the persistent connection of the calling thread, opening it on first use."""
+        conn = self.connection
+        if conn is None:
+            conn = self._connect()
+            self._local.connection = conn
+            with self._persistent_lock:
+                self._persistent_connections.append(conn)
+        return conn
+
     def _get_connection(self):
         """Get a connection, either from the pool, persistent, or temporary."""
+        if self._pinned_connection is not None:
+            return self._pinned_connection
         if self.use_connection_pooling and self.pool:
             return self.pool.getconn()
         elif self.use_persistent_connection:
-            return self.connection
+            return self._thread_connection()
         else:
             return self._connect()
 
     def _close_connection(self, conn):
         """Close the connection if not using persistent mode or return it to the pool."""
+        if conn is self._pinned_connection:
+            return
         if self.use_connection_pooling and self.pool:
             self.pool.putconn(conn)
         elif not self.use_persistent_connection:
+            self.statement_cache.forget(conn)
             conn.close()
 
+    def _rollback(self, conn):
+        """
+        Roll back the transaction of a connection after a failed operation.
+
+        On the connection pinned by `batched_commits` this discards the writes of the open group that were
+        already reported as successful: they are counted in `discarded_writes`, their ids are added to
+        `discarded_ids` and the group restarts empty.
+        """
+        if conn is self._pinned_connection and self._pending_commits:
+            self.discarded_writes += self._pending_commits
+            self.discarded_groups += 1
+            self.discarded_ids.extend(self._pending_ids)
+            self._pending_commits = 0
+            self._pending_ids = []
+        try:
+            conn.rollback()
+        except Exception as e:
+            print(f"Error rolling back the failed operation: {e}")
+
+    @contextmanager
+    def _connection(self):
+        """
+        Check out a connection for one operation and always release it.
+
+        If the operation raises, its transaction is rolled back before the connection is released, so a failed
+        operation neither leaks a pooled connection nor leaves the connection in an aborted transaction.
+        """
+        conn = self._get_connection()
+        try:
+            yield conn
+        except Exception:
+            self._rollback(conn)
+            raise
+        finally:
+            self._close_connection(conn)
+
+    def _commit(self, conn, record_id=None):
+        """
+        Commit the current operation, or count it towards the open group commit.
+
+        An operation is only counted once it can be reported as successful: when the commit that closes a
+        group fails, the operation itself fails and only the earlier writes of the group are discarded.
+
+        :param record_id: Id reported for the operation, listed in `discarded_ids` if its group is rolled back.
+        """
+        if conn is self._pinned_connection:
+            if self._pending_commits + 1 >= self._commit_every:
+                conn.commit()
+                self._pending_commits = 0
+                self._pending_ids = []
+            else:
+                self._pending_commits += 1
+                if record_id is not None:
+                    self._pending_ids.append(record_id)
+        else:
+            conn.commit()
+
+    @contextmanager
+    def batched_commits(self, commit_every):
+        """
+        Group the single-row writes made inside the block into transactions of `commit_every` operations.
+
+        A single connection is pinned for the whole block so the open transaction spans operations.
+        With `commit_every` <= 1 every operation keeps committing on its own.
+
+        A failed operation rolls back the whole open group. The writes lost this way that had been reported
+        as successful are counted in `discarded_writes` (the groups in `discarded_groups`, the returned ids
+        in `discarded_ids`), all reset when the block starts, and the next operations start a new group.
+        """
+        self.discarded_writes = 0
+        self.discarded_groups = 0
+        self.discarded_ids = []
+        if commit_every <= 1:
+            yield
+            return
+
+        conn = self._get_connection()
+        self._pinned_connection = conn
+        self._commit_every = commit_every
+        self._pending_commits = 0
+        self._pending_ids = []
+        try:
+            yield
+        finally:
+            try:
+                conn.commit()
+                self._pending_commits = 0
+                self._pending_ids = []
+            except Exception as e:
+                print(f"Error committing the last group of operations: {e}")
+                self._rollback(conn)
+            self._pinned_connection = None
+            if self.discarded_writes:
+                print(f"Discarded {self.discarded_writes} write(s) of {self.discarded_groups} failed group "
+                      f"commit(s).")
+            self._close_connection(conn)
+
     def close_persistent_connection(self):
-        """Close the persistent connection if it is open."""
-        if self.use_persistent_connection and self.connection:
-            self.connection.close()
-            self.connection = None
+        """Close the persistent connections of every thread."""
+        with self._persistent_lock:
+            connections, self._persistent_connections = self._persistent_connections, []
+            self._local = threading.local()
+        for conn in connections:
+            self.statement_cache.forget(conn)
+            conn.close()
 
     def close_connection_pool(self):
         """Close all connections in the connection pool."""
         if self.use_connection_pooling and self.pool:
             self.pool.closeall()
             self.pool = None
+            self.statement_cache.clear()
             print("Connection pool closed successfully.")
 
+    def pool_stats(self):
+        """Return the connection pool usage counters, or None when pooling is disabled."""
+        if self.use_connection_pooling and self.pool:
+            return self.pool.stats()
+        return None
+
+    def reset_pool_stats(self):
+        """Reset the connection pool usage counters."""
+        if self.use_connection_pooling and self.pool:
+            self.pool.reset_stats()
+
     def create_database(self):
         """Delete and recreate the database."""
         try:
@@ -142,14 +334,107 @@ class PostgresDBHandler:
             except Exception as cleanup_error:
                 print(f"Error during cleanup: {cleanup_error}")
 
-    def create_reviews_table(self):
-        """Create the `reviews` table with an `id` column as the primary key."""
+    def snapshot_name(self):
+        """Default name of the template database holding a snapshot of the benchmark database."""
+        return f"{self.database}_snapshot"
+
+    def _clone_database(self, source, target):
+        """
+        Replace `target` with a copy of `source` made by `CREATE DATABASE ... TEMPLATE`.
+
+        The handler's own connections are closed first and any other session on either database is terminated,
+        since a template database cannot have open connections while it is copied.
+        """
+        self.close_persistent_connection()
+        self.close_connection_pool()
+        conn = psycopg2.connect(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            dbname="postgres"
+        )
         try:
-            conn = self._get_connection()
+            conn.autocommit = True
             cursor = conn.cursor()
-            create_table_sql = """
-            CREATE TABLE IF NOT EXISTS reviews (
-                id SERIAL PRIMARY KEY,
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s;", [source])
+            if not cursor.fetchone():
+                raise ValueError(f"Database '{source}' does not exist.")
+            cursor.execute(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                "WHERE datname IN (%s, %s) AND pid <> pg_backend_pid();",
+                [source, target]
+            )
+            cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {};").format(sql.Identifier(target)))
+            cursor.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {};").format(sql.Identifier(target),
+                                                                             sql.Identifier(source)))
+            cursor.close()
+        finally:
+            conn.close()
+            self._open_connections()
+
+    def snapshot_database(self, snapshot_name=None):
+        """
+        Save the current state of the database as a template database.
+
+        :param snapshot_name: Name of the snapshot database, defaults to `snapshot_name()`.
+        :return: True if the snapshot was created.
+        """
+        snapshot_name = snapshot_name or self.snapshot_name()
+        try:
+            self._clone_database(self.database, snapshot_name)
+            print(f"Database '{self.database}' saved as snapshot '{snapshot_name}'.")
+            return True
+        except Exception as e:
+            print(f"Error creating snapshot '{snapshot_name}': {e}")
+            return False
+
+    def restore_database(self, snapshot_name=None):
+        """
+        Drop the database and recreate it from a snapshot taken with `snapshot_database`.
+
+        Copying the template is a file-level copy, so restoring a loaded database is much faster than
+        reloading its records.
+
+        :param snapshot_name: Name of the snapshot database, defaults to `snapshot_name()`.
+        :return: True if the database was restored.
+        """
+        snapshot_name = snapshot_name or self.snapshot_name()
+        try:
+            self._clone_database(snapshot_name, self.database)
+            print(f"Database '{self.database}' restored from snapshot '{snapshot_name}'.")
+            return True
+        except Exception as e:
+            print(f"Error restoring snapshot '{snapshot_name}': {e}")
+            return False
+
+    def count_rows(self, table_name="reviews"):
+        """Return the number of rows of a table, or None on error."""
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql.SQL("SELECT COUNT(*) FROM {};").format(sql.Identifier(table_name)))
+                count = cursor.fetchone()[0]
+                conn.commit()
+                cursor.close()
+            return count
+        except Exception as e:
+            print(f"Error counting the rows of '{table_name}': {e}")
+            return None
+
+    def create_reviews_table(self, bulk_profile=False):
+        """
+        Create the `reviews` table with an `id` column as the primary key.
+
+        :param bulk_profile: Create an UNLOGGED table without the primary key constraint, for a bulk load
+                             followed by `finish_bulk_load`.
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                create_table_sql = """
+            CREATE {unlogged}TABLE IF NOT EXISTS reviews (
+                id SERIAL{primary_key},
                 product_id TEXT,
                 user_id TEXT,
                 profile_name TEXT,
@@ -159,211 +444,520 @@ class PostgresDBHandler:
                 summary TEXT,
                 review_text TEXT
             );
-            """
-            cursor.execute(create_table_sql)
-            conn.commit()
-            print("Table `reviews` created successfully with an `id` column as the primary key.")
-            cursor.close()
-            self._close_connection(conn)
+            """.format(unlogged="UNLOGGED " if bulk_profile else "", primary_key="" if bulk_profile else " PRIMARY KEY")
+                cursor.execute(create_table_sql)
+                conn.commit()
+                cursor.close()
+            if bulk_profile:
+                print("Unlogged table `reviews` created without its primary key for a bulk load.")
+            else:
+                print("Table `reviews` created successfully with an `id` column as the primary key.")
         except Exception as e:
             print(f"Error creating table `reviews`: {e}")
 
-    def insert_one(self, record):
-        """Insert a single record into the `reviews` table."""
+    def finish_bulk_load(self, indexes=(), maintenance_work_mem="1GB"):
+        """
+        Make a table created with `create_reviews_table(bulk_profile=True)` query-ready.
+
+        Adds the primary key, builds the secondary indexes, switches the table back to LOGGED and analyzes it,
+        in one session with a raised `maintenance_work_mem` so that each index is sorted in memory.
+
+        :param indexes: Column tuples of the secondary indexes to build.
+        :param maintenance_work_mem: `maintenance_work_mem` of the rebuild session.
+        :return: Dictionary of the time in seconds of each rebuild step, None if a step failed.
+        """
+        steps = {}
+        conn = None
         try:
-            conn = self._get_connection()
+            conn = self._connect()
+            conn.autocommit = True
             cursor = conn.cursor()
-            cursor.execute("""
-            INSERT INTO reviews (
-                product_id, user_id, profile_name, helpfulness, score, review_time, summary, review_text
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
-            """, (
-                record.get("product_id"),
-                record.get("user_id"),
-                record.get("profile_name"),
-                record.get("helpfulness"),
-                float(record.get("score", 0)),
-                int(record.get("review_time", 0)),
-                record.get("summary"),
-                record.get("review_text")
-            ))
-            conn.commit()
+            cursor.execute("SELECT set_config('maintenance_work_mem', %s, false);", [maintenance_work_mem])
+
+            def timed(step, statement):
+                start_time = time.time()
+                cursor.execute(statement)
+                steps[step] = time.time() - start_time
+
+            timed("primary_key", "ALTER TABLE reviews ADD PRIMARY KEY (id);")
+            for columns in indexes:
+                index_name = f"reviews_{'_'.join(columns)}_idx"
+                timed(index_name, sql.SQL("CREATE INDEX IF NOT EXISTS {} ON reviews ({})").format(
+                    sql.Identifier(index_name), sql.SQL(', ').join(sql.Identifier(column) for column in columns)))
+            timed("set_logged", "ALTER TABLE reviews SET LOGGED;")
+            timed("analyze", "ANALYZE reviews;")
+            print(f"Table `reviews` is query-ready: primary key and {len(indexes)} secondary index(es) built, "
+                  f"logging restored.")
             cursor.close()
-            self._close_connection(conn)
+        except Exception as e:
+            print(f"Error finishing the bulk load of `reviews`: {e}")
+            steps = None
+        finally:
+            if conn:
+                conn.close()
+            return steps
+
+    def _execute_prepared(self, conn, cursor, name, params):
+        """Execute a prepared statement, resetting the connection's statements if it fails."""
+        try:
+            self.statement_cache.execute(conn, cursor, name, params)
+        except Exception:
+            # The aborted transaction must end before the statements can be deallocated
+            self._rollback(conn)
+            self.statement_cache.reset(conn)
+            raise
+
+    def insert_one(self, record):
+        """Insert a single record into the `reviews` table and return its id (None on error)."""
+        record_id = None
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                if self.use_prepared_statements:
+                    self._execute_prepared(conn, cursor, "reviews_insert_one", review_row(record))
+                else:
+                    cursor.execute("""
+                    INSERT INTO reviews (
+                        product_id, user_id, profile_name, helpfulness, score, review_time, summary, review_text
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id;
+                    """, review_row(record))
+                new_id = cursor.fetchone()[0]
+                self._commit(conn, new_id)
+                cursor.close()
+            # Not reported if the commit closing its group failed; an id reported while its group is still open
+            # is listed in `discarded_ids` if that group is rolled back later
+            record_id = new_id
         except Exception as e:
             print(f"Error inserting record into PostgreSQL: {e}")
+        finally:
+            return record_id
 
     def insert_many(self, records):
-        """Insert multiple records into the `reviews` table."""
+        """Insert multiple records into the `reviews` table and return how many were inserted (0 on error)."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            insert_query = """
-            INSERT INTO reviews (
-                product_id, user_id, profile_name, helpfulness, score, review_time, summary, review_text
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
-            """
-            values = [
-                (
-                    record.get("product_id"),
-                    record.get("user_id"),
-                    record.get("profile_name"),
-                    record.get("helpfulness"),
-                    float(record.get("score", 0)),
-                    int(record.get("review_time", 0)),
-                    record.get("summary"),
-                    record.get("review_text")
-                )
-                for record in records
-            ]
-            cursor.executemany(insert_query, values)
-            conn.commit()
-            # print(f"Inserted {len(records)} records into `reviews`.")
-            cursor.close()
-            self._close_connection(conn)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                insert_query = """
+                INSERT INTO reviews (
+                    product_id, user_id, profile_name, helpfulness, score, review_time, summary, review_text
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+                """
+                values = [review_row(record) for record in records]
+                cursor.executemany(insert_query, values)
+                conn.commit()
+                # print(f"Inserted {len(records)} records into `reviews`.")
+                cursor.close()
+            return len(records)
         except Exception as e:
             print(f"Error inserting multiple records: {e}")
-        finally:
+            return 0
+
+    def insert_many_values(self, records, page_size=100):
+        """
+        Insert multiple records using multi-row `INSERT ... VALUES` statements.
+
+        :param records: List of normalized records.
+        :param page_size: Number of rows packed into each INSERT statement.
+        :return: Number of records inserted, 0 on error.
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                insert_query = f"INSERT INTO reviews ({', '.join(REVIEW_COLUMNS)}) VALUES %s"
+                execute_values(cursor, insert_query, [review_row(record) for record in records], page_size=page_size)
+                conn.commit()
+                cursor.close()
             return len(records)
+        except Exception as e:
+            print(f"Error inserting multiple records with VALUES batching: {e}")
+            return 0
+
+    def copy_many(self, records, copy_format="text"):
+        """
+        Bulk load records into the `reviews` table with `COPY ... FROM STDIN`.
+
+        :param records: Iterable of normalized records; it is consumed lazily while the data is streamed.
+        :param copy_format: COPY format to use, either "text" or "binary".
+        :return: Number of records loaded, 0 if the COPY failed and was rolled back.
+        """
+        stream = CopyRecordStream(records, copy_format)
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.copy_expert(stream.copy_sql("reviews"), stream)
+                conn.commit()
+                cursor.close()
+            return stream.rows
+        except Exception as e:
+            print(f"Error copying records into PostgreSQL: {e}")
+            return 0
 
     def create_single_column_index(self, table, column):
         """Create an index on a single column."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            index_name = f"{table}_{column}_idx"
-            cursor.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({})").format(
-                sql.Identifier(index_name),
-                sql.Identifier(table),
-                sql.Identifier(column)
-            ))
-            conn.commit()
-            print(f"Index '{index_name}' created on column '{column}' in table '{table}'.")
-            cursor.close()
-            self._close_connection(conn)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                index_name = f"{table}_{column}_idx"
+                cursor.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({})").format(
+                    sql.Identifier(index_name),
+                    sql.Identifier(table),
+                    sql.Identifier(column)
+                ))
+                conn.commit()
+                print(f"Index '{index_name}' created on column '{column}' in table '{table}'.")
+                cursor.close()
         except Exception as e:
             print(f"Error creating single-column index: {e}")
 
     def create_compound_index(self, table, columns):
         """Create a compound index on multiple columns."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            index_name = f"{table}_{'_'.join(columns)}_idx"
-            columns_sql = sql.SQL(', ').join(sql.Identifier(col) for col in columns)
-            cursor.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({})").format(
-                sql.Identifier(index_name),
-                sql.Identifier(table),
-                columns_sql
-            ))
-            conn.commit()
-            print(f"Compound index '{index_name}' created on columns '{', '.join(columns)}' in table '{table}'.")
-            cursor.close()
-            self._close_connection(conn)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                index_name = f"{table}_{'_'.join(columns)}_idx"
+                columns_sql = sql.SQL(', ').join(sql.Identifier(col) for col in columns)
+                cursor.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({})").format(
+                    sql.Identifier(index_name),
+                    sql.Identifier(table),
+                    columns_sql
+                ))
+                conn.commit()
+                print(f"Compound index '{index_name}' created on columns '{', '.join(columns)}' in table '{table}'.")
+                cursor.close()
         except Exception as e:
             print(f"Error creating compound index: {e}")
 
+    def create_index(self, table, index_name, definition):
+        """
+        Create an index from an SQL definition, e.g. "USING brin (review_time)" or "(score) WHERE score <= 2".
+
+        :param definition: Access method, columns and predicate following `CREATE INDEX <name> ON <table>`.
+        :return: True if the index was created.
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql.SQL("CREATE INDEX {} ON {} ").format(
+                    sql.Identifier(index_name),
+                    sql.Identifier(table)
+                ) + sql.SQL(definition))
+                conn.commit()
+                print(f"Index '{index_name}' created on table '{table}' {definition}.")
+                cursor.close()
+            return True
+        except Exception as e:
+            print(f"Error creating index '{index_name}': {e}")
+            return False
+
+    def drop_index(self, index_name):
+        """Drop an index if it exists."""
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql.SQL("DROP INDEX IF EXISTS {};").format(sql.Identifier(index_name)))
+                conn.commit()
+                cursor.close()
+        except Exception as e:
+            print(f"Error dropping index '{index_name}': {e}")
+
+    def index_size(self, index_name):
+        """Return the on-disk size of an index in bytes, or None on error."""
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT pg_relation_size(%s::regclass);", [index_name])
+                size = cursor.fetchone()[0]
+                conn.commit()
+                cursor.close()
+            return size
+        except Exception as e:
+            print(f"Error reading the size of index '{index_name}': {e}")
+            return None
+
+    def analyze(self, table):
+        """Refresh the planner statistics of a table."""
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql.SQL("ANALYZE {};").format(sql.Identifier(table)))
+                conn.commit()
+                cursor.close()
+        except Exception as e:
+            print(f"Error analyzing table '{table}': {e}")
+
+    def capture_plan(self, query, params=None, label=None):
+        """
+        Run a query under EXPLAIN ANALYZE and keep its plan with a summary when `capture_plans` is enabled.
+
+        EXPLAIN ANALYZE executes the query once more, so call this after the timed run, never inside it.
+
+        :param label: Name of the query stored with its plan.
+        """
+        if not self.capture_plans:
+            return
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql.SQL("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ")
+                               + sql.SQL(query.rstrip().rstrip(";")), params)
+                plan = cursor.fetchone()[0]
+                conn.commit()
+                cursor.close()
+            self.captured_plans.append({"label": label, "query": query, "params": params,
+                                        "summary": summarize_postgres_plan(plan), "plan": plan})
+        except Exception as e:
+            print(f"Error capturing the plan of query '{label}': {e}")
+
+    def take_plans(self):
+        """Return the plans captured since the last call and forget them."""
+        plans, self.captured_plans = self.captured_plans, []
+        return plans
+
+    def execute_query(self, query, params=None):
+        """
+        Run a read query and return all its rows.
+
+        The read transaction is ended before the connection is released, so that it does not hold locks
+        that would block later DDL such as DROP INDEX.
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+                conn.commit()
+                cursor.close()
+            return rows
+        except Exception as e:
+            print(f"Error executing query: {e}")
+            return []
+
+    def sample_rows(self, columns, count, seed=None):
+        """
+        Sample `count` rows of `reviews` (with replacement) by probing random ids through the primary key.
+
+        :param columns: Columns to return.
+        :param seed: Seed of the random ids.
+        :return: List of tuples of the sampled columns.
+        """
+        rng = random.Random(seed)
+        samples = []
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT MIN(id), MAX(id) FROM reviews;")
+                min_id, max_id = cursor.fetchone()
+                query = sql.SQL("SELECT {} FROM reviews WHERE id >= %s ORDER BY id LIMIT 1;").format(
+                    sql.SQL(', ').join(sql.Identifier(column) for column in columns))
+                while min_id is not None and len(samples) < count:
+                    cursor.execute(query, [rng.randint(min_id, max_id)])
+                    row = cursor.fetchone()
+                    if row is not None:
+                        samples.append(row)
+                conn.commit()
+                cursor.close()
+        except Exception as e:
+            print(f"Error sampling rows of `reviews`: {e}")
+        finally:
+            return samples
+
     def is_empty(self, table_name):
         """Check if a PostgreSQL table is empty."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
-            count = cursor.fetchone()[0]
-            cursor.close()
-            self._close_connection(conn)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
+                count = cursor.fetchone()[0]
+                cursor.close()
             return count == 0
         except Exception as e:
             print(f"Error checking if PostgreSQL table '{table_name}' is empty: {e}")
             return False
 
-    def update_one(self, update_query):
+    def update_one(self, update_query, params=None):
         """Update a single record in the `reviews` table."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(update_query)
-            conn.commit()
-            # print("Updated one record in `reviews`.")
-            cursor.close()
-            self._close_connection(conn)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(update_query, params)
+                self._commit(conn)
+                # print("Updated one record in `reviews`.")
+                cursor.close()
         except Exception as e:
             print(f"Error updating one record: {e}")
 
+    def update_score(self, record_id, increment=0.123):
+        """Increment the score of a single record, using a prepared statement if enabled."""
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                if self.use_prepared_statements:
+                    self._execute_prepared(conn, cursor, "reviews_update_score", (increment, record_id))
+                else:
+                    cursor.execute("UPDATE reviews SET score = score + %s WHERE id = %s", (increment, record_id))
+                self._commit(conn)
+                cursor.close()
+        except Exception as e:
+            print(f"Error updating score of record with id {record_id}: {e}")
+
     def update_many_bulk(self, bulk_queries):
         """Update multiple records in bulk in the `reviews` table using a single query."""
-        ids = None
+        # Pass the bulk IDs as a single array parameter
+        ids = [query["filter_query"][0] for query in bulk_queries]
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
+            with self._connection() as conn:
+                cursor = conn.cursor()
 
-            # Create the `WHERE` clause with `OR` filters for the bulk IDs
-            ids = [query["filter_query"][0] for query in bulk_queries]
-            ids_placeholder = ', '.join(map(str, ids))
-            update_query = f"UPDATE reviews SET score = score + 0.123 WHERE id IN ({ids_placeholder})"
+                update_query = "UPDATE reviews SET score = score + 0.123 WHERE id = ANY(%s)"
 
-            # Execute the bulk update as a single query
-            cursor.execute(update_query)
-            conn.commit()
-            # print(f"Executed bulk update for {len(ids)} records in `reviews`.")
-            cursor.close()
-            self._close_connection(conn)
+                # Execute the bulk update as a single query
+                cursor.execute(update_query, (ids,))
+                conn.commit()
+                # print(f"Executed bulk update for {len(ids)} records in `reviews`.")
+                cursor.close()
         except Exception as e:
             print(f"Error updating many records in bulk: {e}")
         finally:
             return len(ids)
 
+    def update_many_values(self, updates, method="values"):
+        """
+        Set a different score on each record of a bulk.
+
+        :param updates: List of (record_id, new_score) tuples.
+        :param method: "values" joins against an inline `(VALUES ...)` list in a single UPDATE,
+                       "temp_table" COPYs the new values into a temporary staging table and joins against it.
+        :return: Number of records updated.
+        """
+        if method not in BULK_UPDATE_METHODS:
+            raise ValueError(f"Unknown bulk update method '{method}'. Expected one of {BULK_UPDATE_METHODS}.")
+        updated = 0
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                if method == "values":
+                    execute_values(
+                        cursor,
+                        "UPDATE reviews AS r SET score = v.score FROM (VALUES %s) AS v(id, score) WHERE r.id = v.id",
+                        updates,
+                        template="(%s::integer, %s::float8)",
+                        page_size=max(1, len(updates))
+                    )
+                else:
+                    cursor.execute(
+                        "CREATE TEMP TABLE IF NOT EXISTS review_score_updates (id integer, score float8) "
+                        "ON COMMIT DELETE ROWS"
+                    )
+                    buffer = io.StringIO("".join(f"{record_id}\t{score!r}\n" for record_id, score in updates))
+                    cursor.copy_expert("COPY review_score_updates (id, score) FROM STDIN", buffer)
+                    cursor.execute(
+                        "UPDATE reviews AS r SET score = u.score FROM review_score_updates AS u WHERE r.id = u.id"
+                    )
+                updated = cursor.rowcount
+                conn.commit()
+                cursor.close()
+        except Exception as e:
+            print(f"Error updating many records with per-row values: {e}")
+        finally:
+            return updated
+
     def delete_one(self, record_id):
         """Delete a single record from the `reviews` table."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM reviews WHERE id = %s", (record_id,))
-            conn.commit()
-            # print(f"Deleted record with id {record_id} in `reviews`.")
-            cursor.close()
-            self._close_connection(conn)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                if self.use_prepared_statements:
+                    self._execute_prepared(conn, cursor, "reviews_delete_one", (record_id,))
+                else:
+                    cursor.execute("DELETE FROM reviews WHERE id = %s", (record_id,))
+                self._commit(conn)
+                # print(f"Deleted record with id {record_id} in `reviews`.")
+                cursor.close()
         except Exception as e:
             print(f"Error deleting record with id {record_id}: {e}")
 
     def delete_many_bulk(self, bulk_ids):
         """Delete multiple records in bulk from the `reviews` table."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
+            with self._connection() as conn:
+                cursor = conn.cursor()
 
-            # Construct the `WHERE` clause using `IN` for bulk deletion
-            ids_placeholder = ', '.join(map(str, bulk_ids))
-            query = f"DELETE FROM reviews WHERE id IN ({ids_placeholder})"
-            cursor.execute(query)
+                # Construct the `WHERE` clause using `IN` for bulk deletion
+                ids_placeholder = ', '.join(map(str, bulk_ids))
+                query = f"DELETE FROM reviews WHERE id IN ({ids_placeholder})"
+                cursor.execute(query)
 
-            conn.commit()
-            # print(f"Deleted {len(bulk_ids)} records in `reviews`.")
-            cursor.close()
-            self._close_connection(conn)
+                conn.commit()
+                # print(f"Deleted {len(bulk_ids)} records in `reviews`.")
+                cursor.close()
         except Exception as e:
             print(f"Error deleting records in bulk: {e}")
         finally:
             return len(bulk_ids)
 
+    def iter_review_ids(self, chunk_size=10000, source="keyset"):
+        """
+        Stream the IDs of the `reviews` table in ascending chunks instead of loading them all at once.
+
+        :param chunk_size: Number of IDs per yielded list.
+        :param source: "keyset" runs one `WHERE id > last_id ... LIMIT` query per chunk on a regular connection,
+                       so rows can be changed or deleted between chunks. "server_cursor" streams a single
+                       `ORDER BY id` query through a named cursor on a dedicated connection.
+        :return: Generator of lists of IDs.
+        """
+        if source not in ID_SOURCES:
+            raise ValueError(f"Unknown id source '{source}'. Expected one of {ID_SOURCES}.")
+        if source == "server_cursor":
+            yield from self._iter_review_ids_server_cursor(chunk_size)
+            return
+
+        last_id = 0
+        while True:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id FROM reviews WHERE id > %s ORDER BY id LIMIT %s;", (last_id, chunk_size))
+                chunk = [row[0] for row in cursor.fetchall()]
+                cursor.close()
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1]
+
+    def _iter_review_ids_server_cursor(self, chunk_size):
+        """Stream the IDs through a named (server-side) cursor, fetching `chunk_size` rows per round trip."""
+        # A named cursor lives inside a transaction, so it gets its own connection that the
+        # operations run while iterating never commit or return to the pool
+        conn = self._connect()
+        try:
+            cursor = conn.cursor(name="review_ids")
+            cursor.itersize = chunk_size
+            cursor.execute("SELECT id FROM reviews ORDER BY id;")
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [row[0] for row in rows]
+            cursor.close()
+        finally:
+            conn.close()
+
     def get_all_review_ids(self):
         """Retrieve all IDs from the `reviews` table."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            query = "SELECT id FROM reviews;"
-            cursor.execute(query)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                query = "SELECT id FROM reviews;"
+                cursor.execute(query)
 
-            # Fetch all rows (IDs will be returned as a list of tuples)
-            ids = cursor.fetchall()
+                # Fetch all rows (IDs will be returned as a list of tuples)
+                ids = cursor.fetchall()
 
-            # Convert list of tuples to a flat list of IDs
-            id_list = [row[0] for row in ids]
+                # Convert list of tuples to a flat list of IDs
+                id_list = [row[0] for row in ids]
 
-            print(f"Retrieved {len(id_list)} IDs from the `reviews` table.")
+                print(f"Retrieved {len(id_list)} IDs from the `reviews` table.")
 
-            cursor.close()
-            self._close_connection(conn)
+                cursor.close()
             return id_list
         except Exception as e:
             print(f"Error retrieving IDs from `reviews`: {e}")
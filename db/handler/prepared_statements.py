@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+from utils.db_utils import REVIEW_COLUMNS
+
+# Statements used on the single-row hot paths: name -> (query with $n parameters, parameter types)
+REVIEW_STATEMENTS = {
+    "reviews_insert_one": (
+        f"INSERT INTO reviews ({', '.join(REVIEW_COLUMNS)}) VALUES ($1, $2, $3, $4, $5, $6, $7, $8) "
+        "RETURNING id",
+        ("text", "text", "text", "text", "float8", "bigint", "text", "text"),
+    ),
+    "reviews_update_score": (
+        "UPDATE reviews SET score = score + $1 WHERE id = $2",
+        ("float8", "integer"),
+    ),
+    "reviews_delete_one": (
+        "DELETE FROM reviews WHERE id = $1",
+        ("integer",),
+    ),
+}
+
+
+class PreparedStatementCache:
+    """
+    Per-connection LRU cache of server-side prepared statements.
+
+    Connections are tracked by `id(conn)`, so every path that closes a connection must call `forget` first;
+    otherwise a new connection reusing the id would be assumed to hold statements it never prepared.
+
+    A statement is PREPAREd the first time it runs on a connection and EXECUTEd with parameters afterwards.
+    When a connection holds more than `max_size` statements, the least recently used one is DEALLOCATEd.
+    """
+
+    def __init__(self, statements=None, max_size=16):
+        self.statements = statements or REVIEW_STATEMENTS
+        self.max_size = max_size
+        self.prepares = 0
+        self.executions = 0
+        self._prepared = {}
+        self._lock = threading.Lock()
+
+    def execute(self, conn, cursor, name, params):
+        """Execute the named statement on `conn`, preparing it first if this connection has not seen it."""
+        with self._lock:
+            prepared = self._prepared.setdefault(id(conn), OrderedDict())
+            needs_prepare = name not in prepared
+            evicted = None
+            if needs_prepare:
+                if len(prepared) >= self.max_size:
+                    evicted, _ = prepared.popitem(last=False)
+                prepared[name] = True
+            else:
+                prepared.move_to_end(name)
+
+        if evicted:
+            cursor.execute(f"DEALLOCATE {evicted}")
+        if needs_prepare:
+            query, param_types = self.statements[name]
+            cursor.execute(f"PREPARE {name} ({', '.join(param_types)}) AS {query}")
+            self.prepares += 1
+
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+        self.executions += 1
+
+    def reset(self, conn):
+        """
+        Drop every statement prepared on `conn`, e.g. after an error left its state unknown.
+
+        The caller rolls back the failed transaction first: rolling back here would silently discard
+        the other writes of a group commit.
+        """
+        self.forget(conn)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DEALLOCATE ALL")
+            conn.commit()
+            cursor.close()
+        except Exception as e:
+            print(f"Error deallocating prepared statements: {e}")
+
+    def forget(self, conn):
+        """Forget the statements of a connection that is being closed."""
+        with self._lock:
+            self._prepared.pop(id(conn), None)
+
+    def clear(self):
+        """Forget the statements of every connection, e.g. when the connection pool is closed."""
+        with self._lock:
+            self._prepared.clear()
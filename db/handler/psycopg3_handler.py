@@ -0,0 +1,112 @@
+try:
+    import psycopg
+except ImportError:
+    raise ImportError("Pipelined PostgreSQL statements (--pg_pipeline) require the 'psycopg' (version 3) "
+                      "package.") from None
+
+from utils.db_utils import REVIEW_COLUMNS, review_row
+
+
+class Psycopg3DBHandler:
+    """
+    PostgreSQL handler built on psycopg 3 with pipeline mode and binary parameter transfer.
+
+    The batch methods send every statement of a batch before reading any result, so a batch costs roughly
+    one network round trip instead of one per statement. Each batch runs in one transaction, so a failed
+    statement rolls back its whole batch and the batch methods then report 0 statements. Outside the batches
+    the connection runs in autocommit mode, so the single-row methods commit on their own, exactly like those
+    of `PostgresDBHandler`. All statements share one persistent connection.
+    """
+
+    def __init__(self, config, use_binary=True, synchronous_commit=None):
+        self.host = config['host']
+        self.port = config['port']
+        self.user = config['user']
+        self.password = config['password']
+        self.database = config['database']
+        self.use_binary = use_binary
+        self.synchronous_commit = synchronous_commit
+        # %b sends parameters in binary format, %s lets psycopg choose (text for most types)
+        placeholder = "%b" if use_binary else "%s"
+        self.insert_sql = (f"INSERT INTO reviews ({', '.join(REVIEW_COLUMNS)}) "
+                           f"VALUES ({', '.join([placeholder] * len(REVIEW_COLUMNS))})")
+        self.update_score_sql = f"UPDATE reviews SET score = score + {placeholder} WHERE id = {placeholder}"
+        self.delete_sql = f"DELETE FROM reviews WHERE id = {placeholder}"
+        self.connection = None
+
+    def _get_connection(self):
+        """Return the persistent autocommit connection, opening it if needed."""
+        if self.connection is None or self.connection.closed:
+            self.connection = psycopg.connect(
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                dbname=self.database,
+                autocommit=True,
+                options=f"-c synchronous_commit={self.synchronous_commit}" if self.synchronous_commit else None
+            )
+        return self.connection
+
+    def close_connection(self):
+        """Close the connection if it is open."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _execute_pipelined(self, query, params_seq):
+        """Execute `query` once per parameter tuple inside a single pipeline and transaction."""
+        conn = self._get_connection()
+        count = 0
+        with conn.pipeline(), conn.transaction():
+            with conn.cursor() as cursor:
+                for params in params_seq:
+                    cursor.execute(query, params)
+                    count += 1
+        return count
+
+    def insert_one(self, record):
+        """Insert a single record into the `reviews` table."""
+        try:
+            self._get_connection().execute(self.insert_sql, review_row(record))
+        except Exception as e:
+            print(f"Error inserting record into PostgreSQL: {e}")
+
+    def insert_batch(self, records):
+        """Insert records one statement each, pipelined into a single round trip."""
+        try:
+            return self._execute_pipelined(self.insert_sql, (review_row(record) for record in records))
+        except Exception as e:
+            print(f"Error inserting pipelined records into PostgreSQL: {e}")
+            return 0
+
+    def update_score(self, record_id, increment=0.123):
+        """Increment the score of a single record."""
+        try:
+            self._get_connection().execute(self.update_score_sql, (increment, record_id))
+        except Exception as e:
+            print(f"Error updating score of record with id {record_id}: {e}")
+
+    def update_score_batch(self, record_ids, increment=0.123):
+        """Increment the score of each record with its own statement, pipelined into a single round trip."""
+        try:
+            return self._execute_pipelined(self.update_score_sql,
+                                           ((increment, record_id) for record_id in record_ids))
+        except Exception as e:
+            print(f"Error updating pipelined records: {e}")
+            return 0
+
+    def delete_one(self, record_id):
+        """Delete a single record from the `reviews` table."""
+        try:
+            self._get_connection().execute(self.delete_sql, (record_id,))
+        except Exception as e:
+            print(f"Error deleting record with id {record_id}: {e}")
+
+    def delete_batch(self, record_ids):
+        """Delete each record with its own statement, pipelined into a single round trip."""
+        try:
+            return self._execute_pipelined(self.delete_sql, ((record_id,) for record_id in record_ids))
+        except Exception as e:
+            print(f"Error deleting pipelined records: {e}")
+            return 0
@@ -0,0 +1,77 @@
+import asyncio
+import random
+import time
+
+from tqdm import tqdm
+
+from db.simulator.id_registry import EmptyRegistryError
+
+
+def build_operation_mix(num_operations, read_ratio=0.6, write_ratio=0.2, delete_ratio=0.0):
+    """
+    Build the list of operation kinds for a mixed workload.
+
+    :param num_operations: Total number of operations.
+    :param read_ratio: Fraction of reads; the defaults give 60% reads, 20% writes and 20% updates.
+    :param write_ratio: Fraction of writes.
+    :param delete_ratio: Fraction of deletes; the remainder are updates.
+    :return: List of "read", "write", "update" and "delete" entries.
+    """
+    kinds = []
+    for _ in range(num_operations):
+        rand = random.random()
+        if rand < read_ratio:
+            kinds.append("read")
+        elif rand < read_ratio + write_ratio:
+            kinds.append("write")
+        elif rand < read_ratio + write_ratio + delete_ratio:
+            kinds.append("delete")
+        else:
+            kinds.append("update")
+    return kinds
+
+
+async def run_concurrent_workload(operations, kinds, concurrency_level):
+    """
+    Run a mixed workload on the event loop with up to `concurrency_level` operations in flight.
+
+    A fixed number of worker coroutines pull operations from a shared iterator, so thousands of operations
+    can be in flight on a single thread without creating one task per operation up front.
+
+    :param operations: Mapping of operation kind to a coroutine function taking no arguments.
+    :param kinds: Sequence of operation kinds to run (see build_operation_mix).
+    :param concurrency_level: Maximum number of operations in flight.
+    :return: Tuple of total time, list of times for each operation and the number of failed operations.
+    :raises EmptyRegistryError: If an operation found no id left to use; the workers stop at their next operation.
+    """
+    pending = iter(kinds)
+    operation_times = []
+    failures = 0
+    stopped = None
+    progress = tqdm(total=len(kinds), desc="Processing Tasks", unit="task")
+
+    async def worker():
+        nonlocal failures, stopped
+        for kind in pending:
+            if stopped is not None:
+                break
+            op_start = time.perf_counter()
+            try:
+                await operations[kind]()
+            except EmptyRegistryError as e:
+                # Deletes removed every row, so the remaining reads and updates have no key to use
+                stopped = e
+                break
+            except Exception as e:
+                failures += 1
+                print(f"Error during concurrent {kind} operation: {e}")
+            operation_times.append(time.perf_counter() - op_start)
+            progress.update(1)
+
+    start_time = time.time()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency_level, len(kinds))))))
+    total_time = time.time() - start_time
+    progress.close()
+    if stopped is not None:
+        raise stopped
+    return total_time, operation_times, failures
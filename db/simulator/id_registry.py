@@ -0,0 +1,184 @@
+import random
+import threading
+
+import numpy as np
+from bson import ObjectId
+
+# Random slots drawn before a pick gives up on skipping removed ids and compacts the array
+MAX_DRAWS = 8
+
+
+class EmptyRegistryError(LookupError):
+    """Raised when a key is sampled from a registry without any live id."""
+
+
+class IdRegistry:
+    """
+    Registry of the live row ids used for random key selection in concurrent workloads.
+
+    Ids are packed into a single numpy array that grows by doubling, so picking a key is one random
+    index and 100M keys stay a few hundred MB instead of a list of Python objects. The array keeps the
+    insertion order that the skewed picks rely on: removing an id only marks its slot as removed, and the
+    removed slots are compacted away once they outnumber the live ids. All methods are thread-safe.
+    """
+
+    dtype = None
+
+    def __init__(self, capacity=1024):
+        self._ids = np.empty(max(1, capacity), dtype=self.dtype)
+        self._live = np.zeros(len(self._ids), dtype=bool)
+        # Used slots, live or removed, and live ids
+        self._size = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Build a registry from an iterable of id lists, e.g. `PostgresDBHandler.iter_review_ids()`."""
+        registry = cls()
+        for chunk in chunks:
+            registry.extend(chunk)
+        return registry
+
+    def _encode(self, key):
+        return key
+
+    def _decode(self, value):
+        return value
+
+    def _encode_many(self, keys):
+        return np.asarray(keys, dtype=self.dtype)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        """Memory used by the id array and its live flags, including unused capacity."""
+        return self._ids.nbytes + self._live.nbytes
+
+    def _reserve(self, size):
+        if size > len(self._ids):
+            capacity = max(size, 2 * len(self._ids))
+            grown = np.empty(capacity, dtype=self.dtype)
+            grown[:self._size] = self._ids[:self._size]
+            live = np.zeros(capacity, dtype=bool)
+            live[:self._size] = self._live[:self._size]
+            self._ids, self._live = grown, live
+
+    def append(self, key):
+        """Add a single id."""
+        with self._lock:
+            self._reserve(self._size + 1)
+            self._ids[self._size] = self._encode(key)
+            self._live[self._size] = True
+            self._size += 1
+            self._count += 1
+
+    def extend(self, keys):
+        """Add a batch of ids."""
+        values = self._encode_many(list(keys))
+        with self._lock:
+            self._reserve(self._size + len(values))
+            self._ids[self._size:self._size + len(values)] = values
+            self._live[self._size:self._size + len(values)] = True
+            self._size += len(values)
+            self._count += len(values)
+
+    def _index(self, skew):
+        """
+        Pick a random slot. With `skew` > 0 slot i is drawn as `size * u ** (1 + skew)`, which concentrates
+        the picks on the first (oldest) ids: with skew=1 half of the picks fall in the first quarter.
+        """
+        u = random.random()
+        if skew:
+            u **= 1 + skew
+        return int(self._size * u)
+
+    def _pick(self, skew):
+        """Pick the slot of a live id, redrawing slots that were removed."""
+        for _ in range(MAX_DRAWS):
+            index = self._index(skew)
+            if self._live[index]:
+                return index
+        # Removed slots crowd the favoured range; compacting leaves only live ids to draw from
+        self._compact()
+        return self._index(skew)
+
+    def _compact(self):
+        """Drop the removed slots, keeping the live ids in their insertion order."""
+        live = self._live[:self._size]
+        self._ids[:self._count] = self._ids[:self._size][live]
+        self._live[:self._count] = True
+        self._live[self._count:self._size] = False
+        self._size = self._count
+
+    def _remove_at(self, index):
+        self._live[index] = False
+        self._count -= 1
+        if 2 * self._count < self._size:
+            self._compact()
+
+    def sample(self, skew=0.0):
+        """
+        Return a random id without removing it.
+
+        :param skew: 0 for uniform picks, higher values favour the oldest ids (see `_index`).
+        :raises EmptyRegistryError: If every id was removed.
+        """
+        with self._lock:
+            if not self._count:
+                raise EmptyRegistryError("No live id left to pick a key from.")
+            return self._decode(self._ids[self._pick(skew)])
+
+    def pop(self, skew=0.0):
+        """
+        Remove and return a random id, so concurrent deletes never pick the same row.
+
+        :return: The id, or None once every id was removed, so that there is nothing left to delete.
+        """
+        with self._lock:
+            if not self._count:
+                return None
+            index = self._pick(skew)
+            key = self._decode(self._ids[index])
+            self._remove_at(index)
+            return key
+
+    def remove(self, key):
+        """
+        Remove a specific id. Finding it is a vectorized scan of the array; use `pop` when any id will do.
+
+        :return: True if the id was registered.
+        """
+        value = self._encode(key)
+        with self._lock:
+            positions = np.flatnonzero((self._ids[:self._size] == value) & self._live[:self._size])
+            if not len(positions):
+                return False
+            self._remove_at(positions[0])
+            return True
+
+
+class IntIdRegistry(IdRegistry):
+    """Registry of integer ids (PostgreSQL `SERIAL` keys), 8 bytes each."""
+
+    dtype = np.int64
+
+    def _decode(self, value):
+        return int(value)
+
+
+class ObjectIdRegistry(IdRegistry):
+    """Registry of MongoDB ObjectIds packed as their raw 12 bytes."""
+
+    dtype = np.dtype("V12")
+
+    def _encode(self, key):
+        return np.void(key.binary)
+
+    def _decode(self, value):
+        return ObjectId(value.tobytes())
+
+    def _encode_many(self, keys):
+        return np.frombuffer(b"".join(key.binary for key in keys), dtype=self.dtype)
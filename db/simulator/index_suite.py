@@ -0,0 +1,88 @@
+import random
+
+from utils.results_recorder import summarize_times
+
+# Benchmark queries of the index suite, see `query_parameters` for their parameters
+INDEX_QUERIES = ("product_id", "user_id", "review_time_range", "score_threshold", "product_recent")
+
+DEFAULT_TIME_WINDOW = 30 * 24 * 3600
+DEFAULT_SCORE_THRESHOLDS = (1.0, 2.0)
+
+
+def query_parameters(samples, repetitions, seed=0, time_window=DEFAULT_TIME_WINDOW,
+                     score_thresholds=DEFAULT_SCORE_THRESHOLDS):
+    """
+    Build the parameters of `repetitions` runs of every index suite query from rows sampled from the data.
+
+    Values are taken from existing rows, so equality predicates always match:
+    - product_id: (product_id,)
+    - user_id: (user_id,)
+    - review_time_range: (start, end), a `time_window` seconds window starting at a sampled review time
+    - score_threshold: (threshold,), rows with a score at most the threshold
+    - product_recent: (product_id, review_time), reviews of a product from a sampled review time on
+
+    :param samples: List of (product_id, user_id, review_time) tuples of sampled rows.
+    :param repetitions: Number of runs of each query.
+    :param seed: Seed used to assign the sampled values to runs.
+    :return: Dictionary of query name to a list of parameter tuples.
+    """
+    if not samples:
+        raise ValueError("The index suite needs sampled rows; load records first.")
+    rng = random.Random(seed)
+    runs = [rng.choice(samples) for _ in range(repetitions)]
+    return {
+        "product_id": [(product_id,) for product_id, _, _ in runs],
+        "user_id": [(user_id,) for _, user_id, _ in runs],
+        "review_time_range": [(review_time, review_time + time_window) for _, _, review_time in runs],
+        "score_threshold": [(score_thresholds[i % len(score_thresholds)],) for i in range(repetitions)],
+        "product_recent": [(product_id, review_time) for product_id, _, review_time in runs],
+    }
+
+
+def index_case_result(case, index_size, build_time, query_times, query_rows, plans=()):
+    """
+    Summarize one index case of the suite.
+
+    :param case: Name of the index case.
+    :param index_size: Size of the index in bytes (None without an index).
+    :param build_time: Time taken to build the index in seconds.
+    :param query_times: Dictionary of query name to the list of its run times.
+    :param query_rows: Dictionary of query name to the total number of rows returned by its runs.
+    :param plans: Plans captured by the handler, labelled with their query name.
+    :return: Dictionary with the index size, build time and, per query, a latency summary, the mean
+             number of rows returned and, when captured, the plan and its summary.
+    """
+    queries = {query: dict(summarize_times(times), mean_rows=query_rows[query] / len(times) if times else 0)
+               for query, times in query_times.items()}
+    for plan in plans:
+        if plan["label"] in queries:
+            queries[plan["label"]]["plan"] = {"summary": plan["summary"], "plan": plan["plan"]}
+    return {
+        "case": case,
+        "index_size": index_size,
+        "build_time": build_time,
+        "queries": queries,
+    }
+
+
+def format_plan_summary(summary):
+    """One-line description of a plan summary from `utils.query_plans`."""
+    access = ", ".join(summary["indexes"]) or ("full scan" if summary["full_scan"] else "no index")
+    line = f"{access}, examined {summary['rows_examined']} for {summary['rows_returned']} returned"
+    if summary["keys_examined"] is not None:
+        line += f", {summary['keys_examined']} keys"
+    if summary["buffer_hits"] is not None:
+        line += f", buffers {summary['buffer_hits']} hit / {summary['buffer_reads']} read"
+    return line
+
+
+def print_index_case(engine, result):
+    """Print the index size and the median latency of each query of an index case."""
+    size = "no index" if result["index_size"] is None else f"{result['index_size'] / 1024 / 1024:.1f} MiB"
+    print(f"{engine} index case '{result['case']}' ({size}, built in {result['build_time']:.2f}s):")
+    for query, summary in result["queries"].items():
+        if summary["count"]:
+            print(f"  {query}: p50 {summary['p50'] * 1000:.2f} ms, p95 {summary['p95'] * 1000:.2f} ms, "
+                  f"{summary['mean_rows']:.1f} rows")
+        if "plan" in summary:
+            print(f"    plan: {format_plan_summary(summary['plan']['summary'])}")
@@ -1,29 +1,143 @@
+import asyncio
 import time
 
 from bson import ObjectId
-from pymongo.errors import PyMongoError
+from pymongo import ASCENDING, HASHED
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import random
+from itertools import chain
 from db.handler.mongodb_handler import MongoDBHandler
+from db.simulator.async_workload import build_operation_mix, run_concurrent_workload
+from db.simulator.id_registry import EmptyRegistryError, ObjectIdRegistry
+from db.simulator.index_suite import INDEX_QUERIES, index_case_result, print_index_case, query_parameters
 from utils.db_utils import normalize_record
+from utils.streaming import normalized_batches
+
+INDEX_QUERY_FILTERS = {
+    "product_id": lambda product_id: {"product_id": product_id},
+    "user_id": lambda user_id: {"user_id": user_id},
+    "review_time_range": lambda start, end: {"review_time": {"$gte": start, "$lte": end}},
+    "score_threshold": lambda threshold: {"score": {"$lte": threshold}},
+    "product_recent": lambda product_id, review_time: {"product_id": product_id, "review_time": {"$gte": review_time}},
+}
+
+# Index suite cases: (name, index keys, index options, queries the index targets)
+INDEX_CASES = (
+    ("no_index", None, {}, INDEX_QUERIES),
+    ("product_id", [("product_id", ASCENDING)], {}, ("product_id", "product_recent")),
+    ("hashed_product_id", [("product_id", HASHED)], {}, ("product_id",)),
+    ("user_id", [("user_id", ASCENDING)], {}, ("user_id",)),
+    ("review_time", [("review_time", ASCENDING)], {}, ("review_time_range",)),
+    ("partial_score", [("score", ASCENDING)], {"partialFilterExpression": {"score": {"$lte": 2.0}}},
+     ("score_threshold",)),
+    ("compound_product_id_review_time", [("product_id", ASCENDING), ("review_time", ASCENDING)], {},
+     ("product_id", "product_recent")),
+)
 
 
 class MongoSimulator:
-    def __init__(self, config, use_persistent_connection=False, total_records=None):
+    def __init__(self, config, connection_mode="pooled", total_records=None, pool_max_size=100, commit_every=1,
+                 write_concern=None, id_chunk_size=10000, key_skew=0.0, delete_ratio=0.0, stream_batch_size=1000,
+                 secondary_indexes=(), capture_plans=False):
+        if write_concern == "w0" and commit_every > 1:
+            raise ValueError(f"The 'w0' write concern cannot be used with group commits (commit_every={commit_every}): "
+                             "MongoDB transactions require acknowledged writes.")
+        self.config = config
+        self.query_plans = []
+        self.secondary_indexes = secondary_indexes
+        self.bulk_profile = False
+        self.stream_batch_size = stream_batch_size
+        self.key_skew = key_skew
+        self.delete_ratio = delete_ratio
+        self.id_chunk_size = id_chunk_size
+        self.write_concern = write_concern
+        self.commit_every = commit_every
         self.total_records = total_records
-        self.handler = MongoDBHandler(config)
+        self.connection_mode = connection_mode
+        self.pool_max_size = pool_max_size
+        self.handler = MongoDBHandler(config, connection_mode=connection_mode, pool_max_size=pool_max_size,
+                                      write_concern=write_concern, capture_plans=capture_plans)
+        self.sub_batch_throughput = None
         self.modified = 0
         self.inserted = 0
         self.deleted = 0
+        self.snapshot_counters = None
 
-    def setup(self):
-        """Set up the database and collection for testing."""
+    def setup(self, bulk_profile=False):
+        """
+        Set up the database and collection for testing.
+
+        :param bulk_profile: Leave the collection without secondary indexes; `finish_bulk_load` builds them
+                             once the documents are loaded.
+        """
         print("Setting up MongoDB database and collection...")
+        self.bulk_profile = bulk_profile
         self.handler.create_mongo_db()
         self.handler.initialize_collection('reviews')
+        if not bulk_profile and self.secondary_indexes:
+            self.handler.create_indexes('reviews', self.secondary_indexes)
         print("MongoDB setup complete.")
 
+    def finish_bulk_load(self):
+        """
+        Build the secondary indexes deferred by `setup(bulk_profile=True)`.
+
+        :return: Tuple of (total rebuild time, list with the index build time), (None, []) if the build failed.
+        """
+        if not self.bulk_profile:
+            return 0.0, []
+        print("Building MongoDB indexes after the bulk load...")
+        start_time = time.time()
+        names = self.handler.create_indexes('reviews', self.secondary_indexes)
+        total_time = time.time() - start_time
+        if names is None:
+            print("MongoDB index build failed; the collection is not query-ready.")
+            return None, []
+        self.bulk_profile = False
+        print(f"MongoDB rebuild completed in {total_time:.2f} seconds.")
+        return total_time, [total_time]
+
+    def snapshot(self, snapshot_name=None):
+        """
+        Copy the loaded `reviews` collection on the server, so that `restore` can reset it between trials.
+
+        :param snapshot_name: Name of the snapshot collection, defaults to "reviews_snapshot".
+        :return: Time taken to create the snapshot in seconds.
+        """
+        print("Saving a MongoDB snapshot...")
+        start_time = time.time()
+        if self.handler.snapshot_collection('reviews', snapshot_name):
+            self.snapshot_counters = (self.inserted, self.modified, self.deleted)
+        total_time = time.time() - start_time
+        print(f"MongoDB snapshot saved in {total_time:.2f} seconds.")
+        return total_time
+
+    def restore(self, snapshot_name=None):
+        """
+        Reset the `reviews` collection to a snapshot taken with `snapshot`, instead of reloading the documents.
+
+        The simulator counters are reset to their values when the snapshot was taken, or, for a snapshot
+        taken by an earlier run, to the number of restored documents.
+
+        :param snapshot_name: Name of the snapshot collection, defaults to "reviews_snapshot".
+        :return: Time taken to restore the snapshot in seconds.
+        """
+        print("Restoring the MongoDB snapshot...")
+        start_time = time.time()
+        if not self.handler.restore_collection('reviews', snapshot_name):
+            raise Exception("Restoring the MongoDB snapshot failed.")
+        if self.secondary_indexes:
+            # Only builds the indexes a dropped collection lost; existing ones are kept by the restore
+            self.handler.create_indexes('reviews', self.secondary_indexes)
+        total_time = time.time() - start_time
+        if self.snapshot_counters is not None:
+            self.inserted, self.modified, self.deleted = self.snapshot_counters
+        else:
+            self.inserted, self.modified, self.deleted = self.handler.count_documents('reviews') or 0, 0, 0
+        print(f"MongoDB snapshot restored in {total_time:.2f} seconds.")
+        return total_time
+
     def test_query_performance(self, filter_query):
         """Test query performance in MongoDB."""
         print("Testing MongoDB query performance...")
@@ -34,21 +148,64 @@ class MongoSimulator:
         print(f"Query completed in {total_time:.2f} seconds, returned {len(results)} documents.")
         return total_time, results
 
-    def test_index_performance(self, field):
-        """Test performance with and without index."""
-        print(f"Testing MongoDB index performance on field '{field}'...")
-        # Without Index
-        print("Testing without index...")
-        filter_query = {field: "some_value"}
-        no_index_time, _ = self.test_query_performance(filter_query)
+    def sample_query_parameters(self, repetitions, seed=0):
+        """Sample documents and build the parameters of the index suite queries (see `index_suite.query_parameters`)."""
+        samples = self.handler.sample_documents('reviews', ("product_id", "user_id", "review_time"),
+                                                min(repetitions, 1000))
+        return query_parameters(samples, repetitions, seed)
+
+    def _run_index_queries(self, queries, parameters):
+        """Run every parameter set of the given suite queries, returning their run times and document counts."""
+        query_times, query_rows = {}, {}
+        for query in queries:
+            query_times[query], query_rows[query] = [], 0
+            for params in parameters[query]:
+                filter_query = INDEX_QUERY_FILTERS[query](*params)
+                query_start = time.time()
+                documents = self.handler.query_multiple_fields('reviews', filter_query)
+                query_times[query].append(time.time() - query_start)
+                query_rows[query] += len(documents)
+                if len(query_times[query]) == 1:
+                    self.handler.capture_find_plan('reviews', filter_query, label=query)
+        return query_times, query_rows
+
+    def test_index_suite(self, repetitions=20, parameters=None, seed=0):
+        """
+        Benchmark the index suite queries with each of the INDEX_CASES indexes.
 
-        # With Index
-        print("Creating index and testing with index...")
-        self.handler.create_single_field_index('reviews', field)
-        index_time, _ = self.test_query_performance(filter_query)
+        Every index is built on its own, measured, queried by the queries it targets and dropped before the
+        next case, so that no index is left behind for later tests. The first case runs all queries with only
+        the `_id` index as the baseline.
 
-        print(f"Performance comparison: Without Index: {no_index_time:.2f}s, With Index: {index_time:.2f}s.")
-        return no_index_time, index_time
+        :param repetitions: Runs of each query per case, each with values sampled from the collection.
+        :param parameters: Query parameters from `sample_query_parameters`, sampled when not given; pass the
+                           same parameters to both engines to compare them on identical predicates.
+        :param seed: Seed of the sampled parameters.
+        :return: List of `index_suite.index_case_result` dictionaries, one per case.
+        """
+        print("Running the MongoDB index benchmark suite...")
+        parameters = parameters or self.sample_query_parameters(repetitions, seed)
+        results = []
+        for case, keys, options, queries in INDEX_CASES:
+            index_name = f"bench_{case}"
+            index_size, build_time = None, 0.0
+            if keys is not None:
+                self.handler.drop_index('reviews', index_name)
+                start_time = time.time()
+                if not self.handler.create_index('reviews', keys, index_name, **options):
+                    continue
+                build_time = time.time() - start_time
+                index_size = self.handler.index_size('reviews', index_name)
+            try:
+                query_times, query_rows = self._run_index_queries(queries, parameters)
+            finally:
+                if keys is not None:
+                    self.handler.drop_index('reviews', index_name)
+            result = index_case_result(case, index_size, build_time, query_times, query_rows,
+                                       self.handler.take_plans())
+            print_index_case("MongoDB", result)
+            results.append(result)
+        return results
 
     # Insertion methods
     def test_insertion(self, records):
@@ -57,44 +214,91 @@ class MongoSimulator:
         start_time = time.time()
         individual_times = []
 
-        for record in tqdm(records, desc="Inserting Records", unit="record"):
-            normalized_record = normalize_record(record)
-            record_start = time.time()
-            self.handler.insert_one('reviews', normalized_record)
-            record_end = time.time()
-            individual_times.append(record_end - record_start)
-            self.inserted += 1
+        with self.handler.batched_commits(self.commit_every):
+            normalized_records = chain.from_iterable(normalized_batches(records, self.stream_batch_size))
+            for normalized_record in tqdm(normalized_records, desc="Inserting Records", unit="record"):
+                record_start = time.time()
+                inserted_id = self.handler.insert_one('reviews', normalized_record)
+                record_end = time.time()
+                individual_times.append(record_end - record_start)
+                if inserted_id is not None:
+                    self.inserted += 1
+        # Inserts reported as successful whose group transaction was aborted afterwards are lost
+        self.inserted -= self.handler.discarded_writes
 
         end_time = time.time()
         total_time = end_time - start_time
-        print(f"Inserted {len(records)} records into MongoDB in {total_time:.2f} seconds.")
+        print(f"Inserted {len(individual_times)} records into MongoDB in {total_time:.2f} seconds.")
         return total_time, individual_times
 
-    def test_insertion_many(self, records, bulk_size=-1):
+    def test_insertion_many(self, records, bulk_size=-1, insert_mode="ordered", max_batch_bytes=1024 * 1024,
+                            workers=4):
+        """
+        Test bulk insertion in MongoDB.
+
+        :param records: Iterable of raw records, streamed from the dataset while the bulks are written.
+        :param bulk_size: Number of records per bulk, -1 to insert everything in a single bulk.
+        :param insert_mode: "ordered" (one ordered insert_many per bulk) or "unordered_parallel" (each bulk split
+                            into sub-batches of at most `max_batch_bytes`, inserted unordered by `workers` threads).
+        :param max_batch_bytes: Maximum BSON size of a sub-batch in "unordered_parallel" mode.
+        :param workers: Number of sub-batches in flight in "unordered_parallel" mode.
+        """
+        if insert_mode not in ("ordered", "unordered_parallel"):
+            raise ValueError(f"Unknown insert mode '{insert_mode}'.")
         self.validate_before_executing("insertion")
-        print("Testing MongoDB bulk insertion...")
+        print(f"Testing MongoDB bulk insertion ({insert_mode})...")
         start_time = time.time()
         individual_times = []
+        sub_batch_stats = []
 
-        formatted_records = [normalize_record(record) for record in records]
-        total_records = len(formatted_records)
-
+        total_records = 0
         if bulk_size == -1:
-            bulk_size = total_records
             print("Inserting all records in a single bulk.")
 
-        for i in tqdm(range(0, total_records, bulk_size), desc="Inserting Bulk Records", unit="bulk"):
+        # The next bulks are parsed and normalized while the current one is written
+        for bulk in tqdm(normalized_batches(records, bulk_size), desc="Inserting Bulk Records", unit="bulk"):
+            total_records += len(bulk)
+            if insert_mode == "unordered_parallel":
+                # Documents are encoded and sized into sub-batches before the timed insert
+                sub_batches = self.handler.prepare_sub_batches(bulk, max_batch_bytes)
             bulk_start = time.time()
-            bulk = formatted_records[i:i + bulk_size]
-            self.inserted += self.handler.insert_many('reviews', bulk)
+            if insert_mode == "unordered_parallel":
+                inserted, stats = self.handler.insert_many_parallel('reviews', sub_batches, workers)
+                self.inserted += inserted
+                sub_batch_stats.extend(stats)
+            else:
+                self.inserted += self.handler.insert_many('reviews', bulk)
             bulk_end = time.time()
             individual_times.append(bulk_end - bulk_start)
 
         end_time = time.time()
         total_time = end_time - start_time
         print(f"Inserted {total_records} records into MongoDB in {total_time:.2f} seconds using bulk size {bulk_size}.")
+
+        self.sub_batch_throughput = self.summarize_sub_batches(sub_batch_stats) if sub_batch_stats else None
+        if self.sub_batch_throughput:
+            summary = self.sub_batch_throughput
+            print(f"Sub-batches: {summary['sub_batches']} of {summary['mean_documents']:.0f} documents "
+                  f"({summary['mean_bytes'] / 1024:.0f} KiB) on average, "
+                  f"{summary['documents_per_second']:.0f} documents/s and {summary['mb_per_second']:.2f} MB/s "
+                  f"per sub-batch stream.")
         return total_time, individual_times
 
+    @staticmethod
+    def summarize_sub_batches(sub_batch_stats):
+        """Summarize the size and throughput of unordered insert sub-batches."""
+        count = len(sub_batch_stats)
+        documents = sum(stat["inserted"] for stat in sub_batch_stats)
+        total_bytes = sum(stat["bytes"] for stat in sub_batch_stats)
+        busy_time = sum(stat["time"] for stat in sub_batch_stats) or float("inf")
+        return {
+            "sub_batches": count,
+            "mean_documents": sum(stat["documents"] for stat in sub_batch_stats) / count,
+            "mean_bytes": total_bytes / count,
+            "documents_per_second": documents / busy_time,
+            "mb_per_second": total_bytes / busy_time / (1024 * 1024),
+        }
+
     def ensure_empty(self, collection_name="reviews"):
         """Ensure that the MongoDB collection is empty."""
         if not self.handler.is_empty(collection_name):
@@ -102,6 +306,17 @@ class MongoSimulator:
             self.handler.initialize_collection(collection_name)
             print(f"MongoDB collection '{collection_name}' has been reinitialized.")
 
+    def _id_chunks(self, chunk_size=None):
+        """Stream the `_id` values of `reviews` as ObjectIds in chunks of `chunk_size` (default `id_chunk_size`)."""
+        return self.handler.iter_id_chunks("reviews", chunk_size or self.id_chunk_size)
+
+    def _bulk_id_chunks(self, bulk_size):
+        """Stream the `_id` values of `reviews` in bulks of `bulk_size`, or as a single bulk when it is -1."""
+        if bulk_size == -1:
+            print("Executing all operations in a single bulk.")
+            return [list(chain.from_iterable(self._id_chunks()))]
+        return self._id_chunks(bulk_size)
+
     ########### Update methods ###########
     def test_update_one(self):
         self.validate_before_executing("update")
@@ -109,17 +324,16 @@ class MongoSimulator:
         mongo_times = []
 
         try:
-            ids = self.handler.get_all_ids("reviews")
-            print(f"Retrieved {len(ids)} IDs from the `reviews` collection.")
-
             start_time = time.time()
-            for doc_id in tqdm(ids, desc="Updating One Document", unit="query"):
-                filter_query = {"_id": ObjectId(doc_id)}
-                update_query = {"$inc": {"score": 0.123}}
-                op_start = time.time()
-                self.handler.update_one("reviews", filter_query, update_query)
-                op_end = time.time()
-                mongo_times.append(op_end - op_start)
+            with self.handler.batched_commits(self.commit_every):
+                ids = chain.from_iterable(self._id_chunks())
+                for doc_id in tqdm(ids, desc="Updating One Document", unit="query"):
+                    filter_query = {"_id": doc_id}
+                    update_query = {"$inc": {"score": 0.123}}
+                    op_start = time.time()
+                    self.handler.update_one("reviews", filter_query, update_query)
+                    op_end = time.time()
+                    mongo_times.append(op_end - op_start)
 
             end_time = time.time()
             mongo_time = end_time - start_time
@@ -137,18 +351,9 @@ class MongoSimulator:
         mongo_times = []
 
         try:
-            ids = self.handler.get_all_ids("reviews")
-            total_ids = len(ids)
-            print(f"Retrieved {total_ids} IDs from the `reviews` collection.")
-
-            if bulk_size == -1:
-                bulk_size = total_ids
-                print("Executing all updates in a single bulk.")
-
             start_time = time.time()
-            for i in tqdm(range(0, total_ids, bulk_size), desc="Updating Many Documents", unit="bulk"):
-                bulk_ids = ids[i:i + bulk_size]
-                bulk_queries = [{"filter_query": {"_id": ObjectId(doc_id)}} for doc_id in bulk_ids]
+            for bulk_ids in tqdm(self._bulk_id_chunks(bulk_size), desc="Updating Many Documents", unit="bulk"):
+                bulk_queries = [{"filter_query": {"_id": doc_id}} for doc_id in bulk_ids]
                 bulk_start = time.time()
                 self.handler.update_many_bulk("reviews", bulk_queries)
                 bulk_end = time.time()
@@ -164,6 +369,32 @@ class MongoSimulator:
             print(f"Error during the bulk update process: {e}")
             return None, []
 
+    def test_update_many_values(self, bulk_size=-1):
+        """Test bulk updates that set a different score on every document, using `bulk_write` with `UpdateOne`."""
+        self.validate_before_executing("update")
+        print("Testing MongoDB update many with per-document values...")
+        mongo_times = []
+
+        try:
+            start_time = time.time()
+            for bulk_ids in tqdm(self._bulk_id_chunks(bulk_size), desc="Updating Many Documents", unit="bulk"):
+                updates = [(doc_id, round(random.uniform(1, 5), 1)) for doc_id in bulk_ids]
+                bulk_start = time.time()
+                self.modified += self.handler.update_many_values("reviews", updates)
+                bulk_end = time.time()
+                mongo_times.append(bulk_end - bulk_start)
+
+            end_time = time.time()
+            mongo_time = end_time - start_time
+
+            print(f"Update many (per-document values) completed in {mongo_time:.2f} seconds "
+                  f"with bulk size {bulk_size}.")
+            return mongo_time, mongo_times
+
+        except Exception as e:
+            print(f"Error during the bulk update process: {e}")
+            return None, []
+
     def test_delete_one(self):
         self.validate_before_executing("delete")
         """Test deleting a single document in MongoDB based on IDs retrieved from the collection."""
@@ -171,21 +402,18 @@ class MongoSimulator:
         mongo_times = []
 
         try:
-            # Retrieve all IDs from the collection
-            delete_ids = self.handler.get_all_ids("reviews")
-            total_ids = len(delete_ids)
-            print(f"Retrieved {total_ids} IDs for deletion.")
-
             start_time = time.time()
 
-            for doc_id in tqdm(delete_ids, desc="Deleting One Document", unit="query"):
-                filter_query = {"_id": ObjectId(doc_id)}
+            with self.handler.batched_commits(self.commit_every):
+                delete_ids = chain.from_iterable(self._id_chunks())
+                for doc_id in tqdm(delete_ids, desc="Deleting One Document", unit="query"):
+                    filter_query = {"_id": doc_id}
 
-                op_start = time.time()
-                self.handler.delete_one('reviews', filter_query)
-                op_end = time.time()
+                    op_start = time.time()
+                    self.handler.delete_one('reviews', filter_query)
+                    op_end = time.time()
 
-                mongo_times.append(op_end - op_start)
+                    mongo_times.append(op_end - op_start)
 
             end_time = time.time()
             mongo_time = end_time - start_time
@@ -204,22 +432,11 @@ class MongoSimulator:
         mongo_times = []
 
         try:
-            # Retrieve all IDs from the collection
-            delete_ids = self.handler.get_all_ids("reviews")
-            total_ids = len(delete_ids)
-            print(f"Retrieved {total_ids} IDs for deletion.")
-
-            if bulk_size == -1:
-                bulk_size = total_ids  # Execute all deletes in a single bulk
-                print("Executing all delete queries in a single bulk.")
-
             start_time = time.time()
 
-            for i in tqdm(range(0, total_ids, bulk_size), desc="Deleting Many Documents", unit="bulk"):
-                bulk_ids = delete_ids[i:i + bulk_size]
-
+            for bulk_ids in tqdm(self._bulk_id_chunks(bulk_size), desc="Deleting Many Documents", unit="bulk"):
                 # Generate the bulk delete queries
-                bulk_queries = [{"filter_query": {"_id": ObjectId(doc_id)}} for doc_id in bulk_ids]
+                bulk_queries = [{"filter_query": {"_id": doc_id}} for doc_id in bulk_ids]
 
                 # Execute the bulk delete
                 bulk_start = time.time()
@@ -282,22 +499,23 @@ class MongoSimulator:
 
         :param concurrency_level: Number of concurrent threads to use.
         :param num_operations: Total number of operations to perform.
+        :return: Tuple of total time and list of times for each operation.
         """
         print(
             f"Testing concurrent operations with {concurrency_level} threads and {num_operations} total operations...")
 
         collection_name = "reviews"
 
-        # Retrieve all IDs for read/update operations
-        ids = self.handler.get_all_ids(collection_name)
-        if not ids:
+        # Register all IDs for read/update/delete operations; inserted documents are added as the workload runs
+        ids = ObjectIdRegistry.from_chunks(self._id_chunks())
+        if not len(ids):
             print("No IDs found in the `reviews` collection. Ensure data is inserted before running concurrency tests.")
-            return
+            return None, []
+        print(f"Registered {len(ids)} IDs ({ids.nbytes / 1024 / 1024:.1f} MB).")
 
-        # Define tasks: mix of reads, updates, and inserts
+        # Define tasks: mix of reads, updates, inserts and deletes
         def read_operation():
-            chosen_id = random.choice(ids)
-            self.read_one_by_id(chosen_id)
+            self.read_one_by_id(ids.sample(self.key_skew))
 
         def write_operation():
             record = {
@@ -310,34 +528,116 @@ class MongoSimulator:
                 "summary": "Sample Summary",
                 "review_text": "Sample Review Text"
             }
-            self.handler.insert_one(collection_name, record)
+            inserted_id = self.handler.insert_one(collection_name, record)
+            if inserted_id is not None:
+                ids.append(inserted_id)
 
         def update_operation():
-            random_id = ObjectId(random.choice(ids))
-            filter_query = {"_id": random_id}
+            filter_query = {"_id": ids.sample(self.key_skew)}
             update_query = {"$inc": {"score": 0.123}}
             self.handler.update_one(collection_name, filter_query, update_query)
 
-        # Create a mix of read (60%), write (20%), and update (20%) tasks
-        tasks = []
-        for _ in range(num_operations):
-            rand = random.random()
-            if rand < 0.6:
-                tasks.append(read_operation)  # 60% reads
-            elif rand < 0.8:
-                tasks.append(write_operation)  # 20% writes
-            else:
-                tasks.append(update_operation)  # 20% updates
+        def delete_operation():
+            doc_id = ids.pop(self.key_skew)
+            if doc_id is not None:
+                self.handler.delete_one(collection_name, {"_id": doc_id})
+
+        # Create a mix of read (60%), write (20%), update and delete tasks
+        operations = {"read": read_operation, "write": write_operation, "update": update_operation,
+                      "delete": delete_operation}
+        tasks = [operations[kind] for kind in build_operation_mix(num_operations, delete_ratio=self.delete_ratio)]
+
+        def timed(task):
+            op_start = time.time()
+            task()
+            return time.time() - op_start
 
         # Execute tasks concurrently with a progress bar
         start_time = time.time()
+        operation_times = []
         with ThreadPoolExecutor(max_workers=concurrency_level) as executor:
-            futures = [executor.submit(task) for task in tasks]
-            for _ in tqdm(as_completed(futures), total=len(futures), desc="Processing Tasks", unit="task"):
-                pass  # Each future is processed as it completes
+            futures = [executor.submit(timed, task) for task in tasks]
+            try:
+                for future in tqdm(as_completed(futures), total=len(futures), desc="Processing Tasks", unit="task"):
+                    operation_times.append(future.result())
+            except EmptyRegistryError as e:
+                # Deletes removed every row, so the remaining reads and updates have no key to use
+                executor.shutdown(cancel_futures=True)
+                print(f"Concurrent operations stopped: {e}")
+                return None, []
 
         end_time = time.time()
-        print(f"Concurrent operations completed in {end_time - start_time:.2f} seconds.")
+        total_time = end_time - start_time
+        print(f"Concurrent operations completed in {total_time:.2f} seconds.")
+        return total_time, operation_times
+
+    def test_concurrent_operations_async(self, concurrency_level=1000, num_operations=100):
+        """
+        Perform the concurrent read/write/update mix on asyncio with Motor instead of a thread pool.
+
+        :param concurrency_level: Maximum number of operations in flight on the event loop.
+        :param num_operations: Total number of operations to perform.
+        :return: Tuple of total time and list of times for each operation.
+        """
+        return asyncio.run(self._run_concurrent_operations_async(concurrency_level, num_operations))
+
+    async def _run_concurrent_operations_async(self, concurrency_level, num_operations):
+        from db.handler.async_mongodb_handler import AsyncMongoDBHandler
+
+        print(f"Testing asyncio concurrent operations with {concurrency_level} operations in flight "
+              f"and {num_operations} total operations...")
+
+        collection_name = "reviews"
+        handler = AsyncMongoDBHandler(self.config, self.pool_max_size, write_concern=self.write_concern)
+        await handler.connect()
+        try:
+            ids = ObjectIdRegistry()
+            async for chunk in handler.iter_id_chunks(collection_name, self.id_chunk_size):
+                ids.extend(chunk)
+            if not len(ids):
+                print("No IDs found in the `reviews` collection. Ensure data is inserted before running concurrency tests.")
+                return None, []
+
+            async def read_operation():
+                await handler.read_one_by_id(collection_name, ids.sample(self.key_skew))
+
+            async def write_operation():
+                inserted_id = await handler.insert_one(collection_name, {
+                    "product_id": f"Product{random.randint(1, 1000)}",
+                    "user_id": f"User{random.randint(1, 1000)}",
+                    "profile_name": f"User{random.randint(1, 1000)}",
+                    "helpfulness": "0/0",
+                    "score": random.uniform(1, 5),
+                    "review_time": int(time.time()),
+                    "summary": "Sample Summary",
+                    "review_text": "Sample Review Text"
+                })
+                if inserted_id is not None:
+                    ids.append(inserted_id)
+
+            async def update_operation():
+                await handler.update_one(collection_name, {"_id": ids.sample(self.key_skew)},
+                                         {"$inc": {"score": 0.123}})
+
+            async def delete_operation():
+                doc_id = ids.pop(self.key_skew)
+                if doc_id is not None:
+                    await handler.delete_one(collection_name, {"_id": doc_id})
+
+            operations = {"read": read_operation, "write": write_operation, "update": update_operation,
+                          "delete": delete_operation}
+            try:
+                total_time, operation_times, failures = await run_concurrent_workload(
+                    operations, build_operation_mix(num_operations, delete_ratio=self.delete_ratio),
+                    concurrency_level)
+            except EmptyRegistryError as e:
+                print(f"Asyncio concurrent operations stopped: {e}")
+                return None, []
+        finally:
+            await handler.close()
+
+        print(f"Asyncio concurrent operations completed in {total_time:.2f} seconds ({failures} failed).")
+        return total_time, operation_times
 
     def test_transaction_operations(self, records, simulate_error=False):
         """
@@ -349,6 +649,7 @@ class MongoSimulator:
         """
         print("Testing MongoDB multi-document transactional operations...")
 
+        self.handler._get_connection()
         session = self.handler.client.start_session()
         collection_name = 'reviews'
         start_time = time.time()
@@ -359,19 +660,7 @@ class MongoSimulator:
 
                 # Insert multiple records with a progress bar
                 print("Inserting records within a transaction...")
-                insert_data = [
-                    {
-                        "product_id": record.get("product/productId"),
-                        "user_id": record.get("review/userId"),
-                        "profile_name": record.get("review/profileName"),
-                        "helpfulness": record.get("review/helpfulness"),
-                        "score": float(record.get("review/score", 0)),
-                        "review_time": int(record.get("review/time", 0)),
-                        "summary": record.get("review/summary"),
-                        "review_text": record.get("review/text")
-                    }
-                    for record in records
-                ]
+                insert_data = [normalize_record(record) for record in records]
                 for i in tqdm(range(0, len(insert_data)), desc="Inserting Records", unit="record"):
                     self.handler.db[collection_name].insert_one(insert_data[i], session=session)
 
@@ -401,6 +690,8 @@ class MongoSimulator:
 
         finally:
             session.end_session()
+            # Releases the client opened for this test in per_op mode
+            self.handler._close_connection()
             end_time = time.time()
             execution_time = end_time - start_time
             print(f"Session ended. Total execution time: {execution_time:.2f} seconds.")
@@ -456,13 +747,11 @@ class MongoSimulator:
         ]
 
         start_time = time.time()
-        try:
-            # Run the aggregation pipeline on the 'reviews' collection
-            results = list(self.handler.db["reviews"].aggregate(pipeline))
-        except PyMongoError as e:
-            print(f"Error executing aggregation pipeline: {e}")
-            results = []
+        # Run the aggregation pipeline on the 'reviews' collection
+        results = self.handler.aggregate("reviews", pipeline)
         end_time = time.time()
+        self.handler.capture_aggregate_plan("reviews", pipeline, label="complex_query")
+        self.query_plans = self.handler.take_plans()
 
         total_time = end_time - start_time
         print(f"Complex query completed in {total_time:.4f} seconds, returned {len(results)} documents.")
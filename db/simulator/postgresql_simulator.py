@@ -1,26 +1,152 @@
+import asyncio
 import time
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import random
-from db.handler.postgres_handler import PostgresDBHandler
-from utils.db_utils import normalize_record
+from itertools import chain
+from db.handler.connection_pool import DEFAULT_CHECKOUT_TIMEOUT
+from db.handler.postgres_handler import INSERT_STRATEGIES, PostgresDBHandler
+from db.simulator.async_workload import build_operation_mix, run_concurrent_workload
+from db.simulator.id_registry import EmptyRegistryError, IntIdRegistry
+from db.simulator.index_suite import INDEX_QUERIES, index_case_result, print_index_case, query_parameters
+from utils.db_utils import normalize_record, review_row
+from utils.streaming import normalized_batches
+
+INDEX_QUERY_SQL = {
+    "product_id": "SELECT * FROM reviews WHERE product_id = %s;",
+    "user_id": "SELECT * FROM reviews WHERE user_id = %s;",
+    "review_time_range": "SELECT * FROM reviews WHERE review_time BETWEEN %s AND %s;",
+    "score_threshold": "SELECT * FROM reviews WHERE score <= %s;",
+    "product_recent": "SELECT * FROM reviews WHERE product_id = %s AND review_time >= %s;",
+}
+
+# Index suite cases: (name, index definition, queries the index targets). Query values are inlined by
+# psycopg2, so the planner can prove that `score <= 1.0` is covered by the partial index predicate.
+INDEX_CASES = (
+    ("no_index", None, INDEX_QUERIES),
+    ("btree_product_id", "USING btree (product_id)", ("product_id", "product_recent")),
+    ("hash_product_id", "USING hash (product_id)", ("product_id",)),
+    ("btree_user_id", "USING btree (user_id)", ("user_id",)),
+    ("btree_review_time", "USING btree (review_time)", ("review_time_range",)),
+    ("brin_review_time", "USING brin (review_time)", ("review_time_range",)),
+    ("partial_score", "USING btree (score) WHERE score <= 2.0", ("score_threshold",)),
+    ("compound_product_id_review_time", "USING btree (product_id, review_time)", ("product_id", "product_recent")),
+)
 
 
 class PostgresSimulator:
-    def __init__(self, config, use_persistent_connection=False, total_records=None):
+    def __init__(self, config, connection_mode="pooled", total_records=None, use_prepared_statements=False,
+                 pool_min_size=1, pool_max_size=100, pipeline_batch_size=0, commit_every=1, synchronous_commit=None,
+                 id_chunk_size=10000, id_source="keyset", key_skew=0.0, delete_ratio=0.0, stream_batch_size=1000,
+                 secondary_indexes=(), maintenance_work_mem="1GB", capture_plans=False,
+                 pool_timeout=DEFAULT_CHECKOUT_TIMEOUT):
+        if pipeline_batch_size > 0 and commit_every > 1:
+            raise ValueError("Pipelined statements commit once per pipelined batch, so they cannot "
+                             f"be grouped with commit_every={commit_every}.")
+        self.config = config
+        self.query_plans = []
+        self.secondary_indexes = secondary_indexes
+        self.maintenance_work_mem = maintenance_work_mem
+        self.bulk_profile = False
+        self.stream_batch_size = stream_batch_size
+        self.key_skew = key_skew
+        self.delete_ratio = delete_ratio
+        self.id_chunk_size = id_chunk_size
+        self.id_source = id_source
+        self.synchronous_commit = synchronous_commit
+        self.commit_every = commit_every
+        self.pipeline_batch_size = pipeline_batch_size
+        self.pipeline_handler = None
         self.total_records = total_records
-        self.handler = PostgresDBHandler(config)
+        self.connection_mode = connection_mode
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.handler = PostgresDBHandler(config, connection_mode=connection_mode, pool_min_size=pool_min_size,
+                                         pool_max_size=pool_max_size, pool_timeout=pool_timeout,
+                                         use_prepared_statements=use_prepared_statements,
+                                         synchronous_commit=synchronous_commit, capture_plans=capture_plans)
         self.modified = 0
         self.inserted = 0
         self.deleted = 0
+        self.snapshot_counters = None
 
-    def setup(self):
-        """Set up the database and table for testing."""
+    def setup(self, bulk_profile=False):
+        """
+        Set up the database and table for testing.
+
+        :param bulk_profile: Create an UNLOGGED `reviews` table without its primary key and secondary indexes;
+                             `finish_bulk_load` builds them once the records are loaded.
+        """
         print("Setting up PostgreSQL database and table...")
+        self.bulk_profile = bulk_profile
         self.handler.create_database()
-        self.handler.create_reviews_table()
+        self.handler.create_reviews_table(bulk_profile=bulk_profile)
+        if not bulk_profile:
+            for columns in self.secondary_indexes:
+                self.handler.create_compound_index('reviews', list(columns))
         print("PostgreSQL setup complete.")
 
+    def finish_bulk_load(self):
+        """
+        Rebuild the constraints and indexes deferred by `setup(bulk_profile=True)` and restore logging.
+
+        :return: Tuple of (total rebuild time, list of the rebuild step times), (None, []) if the rebuild failed.
+        """
+        if not self.bulk_profile:
+            return 0.0, []
+        print("Rebuilding PostgreSQL constraints and indexes after the bulk load...")
+        start_time = time.time()
+        steps = self.handler.finish_bulk_load(self.secondary_indexes, self.maintenance_work_mem)
+        total_time = time.time() - start_time
+        if steps is None:
+            print("PostgreSQL rebuild failed; the table is not query-ready.")
+            return None, []
+        self.bulk_profile = False
+        print(f"PostgreSQL rebuild completed in {total_time:.2f} seconds "
+              f"({', '.join(f'{step}: {step_time:.2f}s' for step, step_time in steps.items())}).")
+        return total_time, list(steps.values())
+
+    def snapshot(self, snapshot_name=None):
+        """
+        Save the loaded database as a template database that `restore` resets it to between trials.
+
+        :param snapshot_name: Name of the snapshot database, defaults to "<database>_snapshot".
+        :return: Time taken to create the snapshot in seconds.
+        """
+        print("Saving a PostgreSQL snapshot...")
+        if self.pipeline_handler is not None:
+            self.pipeline_handler.close_connection()
+        start_time = time.time()
+        if self.handler.snapshot_database(snapshot_name):
+            self.snapshot_counters = (self.inserted, self.modified, self.deleted)
+        total_time = time.time() - start_time
+        print(f"PostgreSQL snapshot saved in {total_time:.2f} seconds.")
+        return total_time
+
+    def restore(self, snapshot_name=None):
+        """
+        Reset the database to a snapshot taken with `snapshot`, instead of reloading the records.
+
+        The simulator counters are reset to their values when the snapshot was taken, or, for a snapshot
+        taken by an earlier run, to the number of restored rows.
+
+        :param snapshot_name: Name of the snapshot database, defaults to "<database>_snapshot".
+        :return: Time taken to restore the snapshot in seconds.
+        """
+        print("Restoring the PostgreSQL snapshot...")
+        if self.pipeline_handler is not None:
+            self.pipeline_handler.close_connection()
+        start_time = time.time()
+        if not self.handler.restore_database(snapshot_name):
+            raise Exception("Restoring the PostgreSQL snapshot failed.")
+        total_time = time.time() - start_time
+        if self.snapshot_counters is not None:
+            self.inserted, self.modified, self.deleted = self.snapshot_counters
+        else:
+            self.inserted, self.modified, self.deleted = self.handler.count_rows("reviews") or 0, 0, 0
+        print(f"PostgreSQL snapshot restored in {total_time:.2f} seconds.")
+        return total_time
+
     def test_query_performance(self, query):
         """Test query performance in PostgreSQL."""
         print("Testing PostgreSQL query performance...")
@@ -36,21 +162,100 @@ class PostgresSimulator:
         conn.close()
         return total_time, results
 
-    def test_index_performance(self, column):
-        """Test performance with and without index."""
-        print(f"Testing PostgreSQL index performance on column '{column}'...")
-        # Without Index
-        print("Testing without index...")
-        query = f"SELECT * FROM reviews WHERE {column} = 'some_value';"
-        no_index_time, _ = self.test_query_performance(query)
+    def sample_query_parameters(self, repetitions, seed=0):
+        """Sample rows and build the parameters of the index suite queries (see `index_suite.query_parameters`)."""
+        samples = self.handler.sample_rows(("product_id", "user_id", "review_time"), min(repetitions, 1000), seed)
+        return query_parameters(samples, repetitions, seed)
+
+    def _run_index_queries(self, queries, parameters):
+        """Run every parameter set of the given suite queries, returning their run times and row counts."""
+        query_times, query_rows = {}, {}
+        for query in queries:
+            query_times[query], query_rows[query] = [], 0
+            for params in parameters[query]:
+                query_start = time.time()
+                rows = self.handler.execute_query(INDEX_QUERY_SQL[query], params)
+                query_times[query].append(time.time() - query_start)
+                query_rows[query] += len(rows)
+                if len(query_times[query]) == 1:
+                    self.handler.capture_plan(INDEX_QUERY_SQL[query], params, label=query)
+        return query_times, query_rows
+
+    def test_index_suite(self, repetitions=20, parameters=None, seed=0):
+        """
+        Benchmark the index suite queries with each of the INDEX_CASES indexes.
 
-        # With Index
-        print("Creating index and testing with index...")
-        self.handler.create_single_column_index('reviews', column)
-        index_time, _ = self.test_query_performance(query)
+        Every index is built on its own, measured, queried by the queries it targets and dropped before the
+        next case, so that no index is left behind for later tests. The first case runs all queries without
+        a secondary index as the baseline.
 
-        print(f"Performance comparison: Without Index: {no_index_time:.2f}s, With Index: {index_time:.2f}s.")
-        return no_index_time, index_time
+        :param repetitions: Runs of each query per case, each with values sampled from the table.
+        :param parameters: Query parameters from `sample_query_parameters`, sampled when not given; pass the
+                           same parameters to both engines to compare them on identical predicates.
+        :param seed: Seed of the sampled parameters.
+        :return: List of `index_suite.index_case_result` dictionaries, one per case.
+        """
+        print("Running the PostgreSQL index benchmark suite...")
+        parameters = parameters or self.sample_query_parameters(repetitions, seed)
+        self.handler.analyze("reviews")
+        results = []
+        for case, definition, queries in INDEX_CASES:
+            index_name = f"reviews_bench_{case}_idx"
+            index_size, build_time = None, 0.0
+            if definition is not None:
+                self.handler.drop_index(index_name)
+                start_time = time.time()
+                if not self.handler.create_index("reviews", index_name, definition):
+                    continue
+                build_time = time.time() - start_time
+                index_size = self.handler.index_size(index_name)
+            try:
+                query_times, query_rows = self._run_index_queries(queries, parameters)
+            finally:
+                if definition is not None:
+                    self.handler.drop_index(index_name)
+            result = index_case_result(case, index_size, build_time, query_times, query_rows,
+                                       self.handler.take_plans())
+            print_index_case("PostgreSQL", result)
+            results.append(result)
+        return results
+
+    def _get_pipeline_handler(self):
+        """Create the psycopg 3 handler used for pipelined single-row operations on first use."""
+        if self.pipeline_handler is None:
+            from db.handler.psycopg3_handler import Psycopg3DBHandler
+            self.pipeline_handler = Psycopg3DBHandler(self.config, synchronous_commit=self.synchronous_commit)
+        return self.pipeline_handler
+
+    def _id_chunks(self, chunk_size=None):
+        """Stream the review IDs in chunks of `chunk_size` (default `id_chunk_size`)."""
+        return self.handler.iter_review_ids(chunk_size or self.id_chunk_size, self.id_source)
+
+    def _bulk_id_chunks(self, bulk_size):
+        """Stream the review IDs in bulks of `bulk_size`, or as a single bulk when it is -1."""
+        if bulk_size == -1:
+            print("Executing all operations in a single bulk.")
+            return [list(chain.from_iterable(self._id_chunks()))]
+        return self._id_chunks(bulk_size)
+
+    def _run_pipelined(self, batches, batch_operation, desc):
+        """
+        Run single-row statements in pipelined batches.
+
+        :param batches: Iterable of batches of records or ids, one statement each.
+        :param batch_operation: Handler method executing one pipelined batch and returning its statement count.
+        :param desc: Progress bar description.
+        :return: Tuple of processed count and list of per-operation times (batch time spread over its statements).
+        """
+        print(f"Pipelining single-row statements in batches of {self.pipeline_batch_size}.")
+        individual_times = []
+        processed = 0
+        for batch in tqdm(batches, desc=desc, unit="batch"):
+            batch_start = time.time()
+            processed += batch_operation(batch)
+            batch_time = time.time() - batch_start
+            individual_times.extend([batch_time / len(batch)] * len(batch))
+        return processed, individual_times
 
     # Insertion methods
     def test_insertion(self, records):
@@ -59,36 +264,66 @@ class PostgresSimulator:
         start_time = time.time()
         individual_times = []
 
-        for record in tqdm(records, desc="Inserting Records", unit="record"):
-            normalized_record = normalize_record(record)
-            record_start = time.time()
-            self.handler.insert_one(normalized_record)
-            self.inserted += 1
-            record_end = time.time()
-            individual_times.append(record_end - record_start)
+        if self.pipeline_batch_size > 0:
+            handler = self._get_pipeline_handler()
+            batches = normalized_batches(records, self.pipeline_batch_size)
+            inserted, individual_times = self._run_pipelined(batches, handler.insert_batch, "Inserting Records")
+            self.inserted += inserted
+        else:
+            with self.handler.batched_commits(self.commit_every):
+                normalized_records = chain.from_iterable(normalized_batches(records, self.stream_batch_size))
+                for normalized_record in tqdm(normalized_records, desc="Inserting Records", unit="record"):
+                    record_start = time.time()
+                    record_id = self.handler.insert_one(normalized_record)
+                    record_end = time.time()
+                    if record_id is not None:
+                        self.inserted += 1
+                    individual_times.append(record_end - record_start)
+            # Inserts reported as successful whose group was rolled back afterwards are lost
+            self.inserted -= self.handler.discarded_writes
 
         end_time = time.time()
         total_time = end_time - start_time
-        print(f"Inserted {len(records)} records into PostgreSQL in {total_time:.2f} seconds.")
+        print(f"Inserted {len(individual_times)} records into PostgreSQL in {total_time:.2f} seconds.")
         return total_time, individual_times
 
-    def test_insertion_many(self, records, bulk_size=-1):
+    def test_insertion_many(self, records, bulk_size=-1, insert_strategy="executemany", page_size=100,
+                            copy_format="text"):
+        """
+        Test bulk insertion in PostgreSQL.
+
+        :param records: Iterable of raw records, streamed from the dataset while the bulks are written.
+        :param bulk_size: Number of records per bulk, -1 to insert everything in a single bulk.
+        :param insert_strategy: "executemany", "values" (multi-row INSERT) or "copy" (COPY FROM STDIN).
+        :param page_size: Rows per INSERT statement for the "values" strategy.
+        :param copy_format: "text" or "binary" COPY format for the "copy" strategy.
+        """
+        if insert_strategy not in INSERT_STRATEGIES:
+            raise ValueError(f"Unknown insert strategy '{insert_strategy}'. Expected one of {INSERT_STRATEGIES}.")
         self.validate_before_executing("insertion")
-        print("Testing PostgreSQL bulk insertion...")
+        print(f"Testing PostgreSQL bulk insertion using the '{insert_strategy}' strategy...")
         start_time = time.time()
         individual_times = []
 
-        formatted_records = [normalize_record(record) for record in records]
-        total_records = len(formatted_records)
+        total_records = 0
+        if insert_strategy == "copy":
+            print(f"Using COPY ({copy_format} format) for bulk insertion.")
+        elif insert_strategy == "values":
+            print(f"Using multi-row VALUES with page size {page_size}.")
 
         if bulk_size == -1:
-            bulk_size = total_records
             print("Inserting all records in a single bulk.")
 
-        for i in tqdm(range(0, total_records, bulk_size), desc="Inserting Bulk Records", unit="bulk"):
+        # The next bulks are parsed and normalized while the current one is written
+        for bulk in tqdm(normalized_batches(records, bulk_size), desc="Inserting Bulk Records", unit="bulk"):
+            total_records += len(bulk)
             bulk_start = time.time()
-            bulk = formatted_records[i:i + bulk_size]
-            self.inserted += self.handler.insert_many(bulk)
+            if insert_strategy == "copy":
+                self.inserted += self.handler.copy_many(bulk, copy_format)
+            elif insert_strategy == "values":
+                self.inserted += self.handler.insert_many_values(bulk, page_size)
+            else:
+                self.inserted += self.handler.insert_many(bulk)
             bulk_end = time.time()
             individual_times.append(bulk_end - bulk_start)
 
@@ -112,16 +347,19 @@ class PostgresSimulator:
         postgres_times = []
 
         try:
-            ids = self.handler.get_all_review_ids()
-            print(f"Retrieved {len(ids)} IDs from the `reviews` table.")
-
             start_time = time.time()
-            for review_id in tqdm(ids, desc="Updating Records", unit="record"):
-                update_query = f"UPDATE reviews SET score = score + 0.123 WHERE id = {review_id}"
-                op_start = time.time()
-                self.handler.update_one(update_query)
-                op_end = time.time()
-                postgres_times.append(op_end - op_start)
+            if self.pipeline_batch_size > 0:
+                handler = self._get_pipeline_handler()
+                _, postgres_times = self._run_pipelined(self._id_chunks(self.pipeline_batch_size),
+                                                        handler.update_score_batch, "Updating Records")
+            else:
+                with self.handler.batched_commits(self.commit_every):
+                    ids = chain.from_iterable(self._id_chunks())
+                    for review_id in tqdm(ids, desc="Updating Records", unit="record"):
+                        op_start = time.time()
+                        self.handler.update_score(review_id, 0.123)
+                        op_end = time.time()
+                        postgres_times.append(op_end - op_start)
 
             end_time = time.time()
             postgres_time = end_time - start_time
@@ -139,17 +377,8 @@ class PostgresSimulator:
         postgres_times = []
 
         try:
-            ids = self.handler.get_all_review_ids()
-            total_ids = len(ids)
-            print(f"Retrieved {total_ids} IDs from the `reviews` table.")
-
-            if bulk_size == -1:
-                bulk_size = total_ids
-                print("Executing all updates in a single bulk.")
-
             start_time = time.time()
-            for i in tqdm(range(0, total_ids, bulk_size), desc="Updating Many Records", unit="bulk"):
-                bulk_ids = ids[i:i + bulk_size]
+            for bulk_ids in tqdm(self._bulk_id_chunks(bulk_size), desc="Updating Many Records", unit="bulk"):
                 bulk_queries = [{"filter_query": (review_id,)} for review_id in bulk_ids]
                 bulk_start = time.time()
                 self.modified += self.handler.update_many_bulk(bulk_queries)
@@ -166,6 +395,36 @@ class PostgresSimulator:
             print(f"Error during the bulk update process: {e}")
             return None, []
 
+    def test_update_many_values(self, bulk_size=-1, method="values"):
+        """
+        Test bulk updates that set a different score on every record.
+
+        :param bulk_size: Number of records per bulk, -1 to update everything in a single bulk.
+        :param method: "values" (UPDATE ... FROM (VALUES ...)) or "temp_table" (COPY into a staging table and join).
+        """
+        self.validate_before_executing("update")
+        print(f"Testing PostgreSQL update many with per-row values using '{method}'...")
+        postgres_times = []
+
+        try:
+            start_time = time.time()
+            for bulk_ids in tqdm(self._bulk_id_chunks(bulk_size), desc="Updating Many Records", unit="bulk"):
+                updates = [(review_id, round(random.uniform(1, 5), 1)) for review_id in bulk_ids]
+                bulk_start = time.time()
+                self.modified += self.handler.update_many_values(updates, method)
+                bulk_end = time.time()
+                postgres_times.append(bulk_end - bulk_start)
+
+            end_time = time.time()
+            postgres_time = end_time - start_time
+
+            print(f"Update many (per-row values) completed in {postgres_time:.2f} seconds with bulk size {bulk_size}.")
+            return postgres_time, postgres_times
+
+        except Exception as e:
+            print(f"Error during the bulk update process: {e}")
+            return None, []
+
     def test_delete_one(self):
         self.validate_before_executing("delete")
         """Test deleting a single record in PostgreSQL based on IDs retrieved from the table."""
@@ -173,19 +432,21 @@ class PostgresSimulator:
         postgres_times = []
 
         try:
-            # Retrieve all IDs from the `reviews` table
-            delete_ids = self.handler.get_all_review_ids()
-            total_ids = len(delete_ids)
-            print(f"Retrieved {total_ids} IDs for deletion.")
-
             start_time = time.time()
+            if self.pipeline_batch_size > 0:
+                handler = self._get_pipeline_handler()
+                _, postgres_times = self._run_pipelined(self._id_chunks(self.pipeline_batch_size),
+                                                        handler.delete_batch, "Deleting One Record")
+            else:
+                with self.handler.batched_commits(self.commit_every):
+                    # Keyset chunks resume after the last seen id, so deleting while iterating is safe
+                    delete_ids = chain.from_iterable(self._id_chunks())
+                    for record_id in tqdm(delete_ids, desc="Deleting One Record", unit="query"):
+                        op_start = time.time()
+                        self.handler.delete_one(record_id)
+                        op_end = time.time()
 
-            for record_id in tqdm(delete_ids, desc="Deleting One Record", unit="query"):
-                op_start = time.time()
-                self.handler.delete_one(record_id)
-                op_end = time.time()
-
-                postgres_times.append(op_end - op_start)
+                        postgres_times.append(op_end - op_start)
 
             end_time = time.time()
             postgres_time = end_time - start_time
@@ -204,20 +465,9 @@ class PostgresSimulator:
         postgres_times = []
 
         try:
-            # Retrieve all IDs from the `reviews` table
-            delete_ids = self.handler.get_all_review_ids()
-            total_ids = len(delete_ids)
-            print(f"Retrieved {total_ids} IDs for deletion.")
-
-            if bulk_size == -1:
-                bulk_size = total_ids  # Execute all deletes in a single bulk
-                print("Executing all delete queries in a single bulk.")
-
             start_time = time.time()
 
-            for i in tqdm(range(0, total_ids, bulk_size), desc="Deleting Many Records", unit="bulk"):
-                bulk_ids = delete_ids[i:i + bulk_size]
-
+            for bulk_ids in tqdm(self._bulk_id_chunks(bulk_size), desc="Deleting Many Records", unit="bulk"):
                 # Execute the bulk delete
                 bulk_start = time.time()
                 self.handler.delete_many_bulk(bulk_ids)
@@ -284,59 +534,151 @@ class PostgresSimulator:
 
         :param concurrency_level: Number of concurrent threads to use.
         :param num_operations: Total number of operations to perform.
+        :return: Tuple of total time and list of times for each operation.
         """
         print(
             f"Testing concurrent operations with {concurrency_level} threads and {num_operations} total operations...")
 
-        # Retrieve all IDs for read/update operations
-        ids = self.handler.get_all_review_ids()
-        if not ids:
+        # Register all IDs for read/update/delete operations; inserted rows are added as the workload runs
+        ids = IntIdRegistry.from_chunks(self._id_chunks())
+        if not len(ids):
             print("No IDs found in the `reviews` table. Ensure data is inserted before running concurrency tests.")
-            return
+            return None, []
+        print(f"Registered {len(ids)} IDs ({ids.nbytes / 1024 / 1024:.1f} MB).")
 
-        # Define tasks: mix of reads, updates, and inserts
+        # Define tasks: mix of reads, updates, inserts and deletes
         def read_operation():
-            chosen_id = random.choice(ids)
-            self.read_one_by_id(chosen_id)
+            self.read_one_by_id(ids.sample(self.key_skew))
 
         def write_operation():
             record = {
-                "product/productId": f"Product{random.randint(1, 1000)}",
-                "review/userId": f"User{random.randint(1, 1000)}",
-                "review/profileName": f"User{random.randint(1, 1000)}",
-                "review/helpfulness": "0/0",
-                "review/score": random.uniform(1, 5),
-                "review/time": int(time.time()),
-                "review/summary": "Sample Summary",
-                "review/text": "Sample Review Text"
+                "product_id": f"Product{random.randint(1, 1000)}",
+                "user_id": f"User{random.randint(1, 1000)}",
+                "profile_name": f"User{random.randint(1, 1000)}",
+                "helpfulness": "0/0",
+                "score": random.uniform(1, 5),
+                "review_time": int(time.time()),
+                "summary": "Sample Summary",
+                "review_text": "Sample Review Text"
             }
-            self.handler.insert_one(record)
+            record_id = self.handler.insert_one(record)
+            if record_id is not None:
+                ids.append(record_id)
 
         def update_operation():
-            random_id = random.choice(ids)
-            update_query = f"UPDATE reviews SET score = score + 0.123 WHERE id = {random_id}"
-            self.handler.update_one(update_query)
-
-        # Create a mix of read (60%), write (20%), and update (20%) tasks
-        tasks = []
-        for _ in range(num_operations):
-            rand = random.random()
-            if rand < 0.6:
-                tasks.append(read_operation)  # 60% reads
-            elif rand < 0.8:
-                tasks.append(write_operation)  # 20% writes
-            else:
-                tasks.append(update_operation)  # 20% updates
+            self.handler.update_score(ids.sample(self.key_skew), 0.123)
+
+        def delete_operation():
+            record_id = ids.pop(self.key_skew)
+            if record_id is not None:
+                self.handler.delete_one(record_id)
+
+        # Create a mix of read (60%), write (20%), update and delete tasks
+        operations = {"read": read_operation, "write": write_operation, "update": update_operation,
+                      "delete": delete_operation}
+        tasks = [operations[kind] for kind in build_operation_mix(num_operations, delete_ratio=self.delete_ratio)]
+
+        def timed(task):
+            op_start = time.time()
+            task()
+            return time.time() - op_start
 
         # Execute tasks concurrently with a progress bar
+        self.handler.reset_pool_stats()
         start_time = time.time()
+        operation_times = []
         with ThreadPoolExecutor(max_workers=concurrency_level) as executor:
-            futures = [executor.submit(task) for task in tasks]
-            for _ in tqdm(as_completed(futures), total=len(futures), desc="Processing Tasks", unit="task"):
-                pass  # Each future is processed as it completes
+            futures = [executor.submit(timed, task) for task in tasks]
+            try:
+                for future in tqdm(as_completed(futures), total=len(futures), desc="Processing Tasks", unit="task"):
+                    operation_times.append(future.result())
+            except EmptyRegistryError as e:
+                # Deletes removed every row, so the remaining reads and updates have no key to use
+                executor.shutdown(cancel_futures=True)
+                print(f"Concurrent operations stopped: {e}")
+                return None, []
 
         end_time = time.time()
-        print(f"Concurrent operations completed in {end_time - start_time:.2f} seconds.")
+        total_time = end_time - start_time
+        print(f"Concurrent operations completed in {total_time:.2f} seconds.")
+
+        pool_stats = self.handler.pool_stats()
+        if pool_stats:
+            print(
+                f"Connection pool: peak {pool_stats['peak_in_use']}/{pool_stats['maxconn']} in use, "
+                f"{pool_stats['waited_checkouts']}/{pool_stats['checkouts']} checkouts waited "
+                f"(mean wait {pool_stats['mean_wait_time'] * 1000:.3f} ms, "
+                f"max {pool_stats['max_wait_time'] * 1000:.3f} ms), "
+                f"{pool_stats['connections_created']} connections created, "
+                f"{pool_stats['connections_reused']} reused.")
+        return total_time, operation_times
+
+    def test_concurrent_operations_async(self, concurrency_level=1000, num_operations=100):
+        """
+        Perform the concurrent read/write/update mix on asyncio with asyncpg instead of a thread pool.
+
+        :param concurrency_level: Maximum number of operations in flight on the event loop.
+        :param num_operations: Total number of operations to perform.
+        :return: Tuple of total time and list of times for each operation.
+        """
+        return asyncio.run(self._run_concurrent_operations_async(concurrency_level, num_operations))
+
+    async def _run_concurrent_operations_async(self, concurrency_level, num_operations):
+        from db.handler.async_postgres_handler import AsyncPostgresDBHandler
+
+        print(f"Testing asyncio concurrent operations with {concurrency_level} operations in flight "
+              f"and {num_operations} total operations...")
+
+        handler = AsyncPostgresDBHandler(self.config, self.pool_min_size, self.pool_max_size,
+                                         synchronous_commit=self.synchronous_commit)
+        await handler.connect()
+        try:
+            ids = IntIdRegistry()
+            async for chunk in handler.iter_review_ids(self.id_chunk_size):
+                ids.extend(chunk)
+            if not len(ids):
+                print("No IDs found in the `reviews` table. Ensure data is inserted before running concurrency tests.")
+                return None, []
+
+            async def read_operation():
+                await handler.read_one_by_id(ids.sample(self.key_skew))
+
+            async def write_operation():
+                record_id = await handler.insert_one({
+                    "product_id": f"Product{random.randint(1, 1000)}",
+                    "user_id": f"User{random.randint(1, 1000)}",
+                    "profile_name": f"User{random.randint(1, 1000)}",
+                    "helpfulness": "0/0",
+                    "score": random.uniform(1, 5),
+                    "review_time": int(time.time()),
+                    "summary": "Sample Summary",
+                    "review_text": "Sample Review Text"
+                })
+                if record_id is not None:
+                    ids.append(record_id)
+
+            async def update_operation():
+                await handler.update_score(ids.sample(self.key_skew), 0.123)
+
+            async def delete_operation():
+                record_id = ids.pop(self.key_skew)
+                if record_id is not None:
+                    await handler.delete_one(record_id)
+
+            operations = {"read": read_operation, "write": write_operation, "update": update_operation,
+                          "delete": delete_operation}
+            try:
+                total_time, operation_times, failures = await run_concurrent_workload(
+                    operations, build_operation_mix(num_operations, delete_ratio=self.delete_ratio),
+                    concurrency_level)
+            except EmptyRegistryError as e:
+                print(f"Asyncio concurrent operations stopped: {e}")
+                return None, []
+        finally:
+            await handler.close()
+
+        print(f"Asyncio concurrent operations completed in {total_time:.2f} seconds ({failures} failed).")
+        return total_time, operation_times
 
     def test_transaction_operations(self, records, simulate_error=False):
         """
@@ -365,16 +707,7 @@ class PostgresSimulator:
             ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
             """
             for record in tqdm(records, desc="Inserting Records", unit="record"):
-                cursor.execute(insert_query, (
-                    record.get("product/productId"),
-                    record.get("review/userId"),
-                    record.get("review/profileName"),
-                    record.get("review/helpfulness"),
-                    float(record.get("review/score", 0)),
-                    int(record.get("review/time", 0)),
-                    record.get("review/summary"),
-                    record.get("review/text")
-                ))
+                cursor.execute(insert_query, review_row(normalize_record(record)))
 
             # Step 3: Perform updates within the transaction with progress bar
             print("Updating records within a transaction...")
@@ -432,20 +765,10 @@ class PostgresSimulator:
 
         # Measure query execution time
         start_time = time.time()
-        conn = self.handler._get_connection()
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute(query)
-            results = cursor.fetchall()
-        except Exception as e:
-            print(f"Error executing query: {e}")
-            results = []
-        finally:
-            cursor.close()
-            self.handler._close_connection(conn)
-
+        results = self.handler.execute_query(query)
         end_time = time.time()
+        self.handler.capture_plan(query, label="complex_query")
+        self.query_plans = self.handler.take_plans()
 
         total_time = end_time - start_time
         print(f"Complex query completed in {total_time:.4f} seconds, returned {len(results)} rows.")
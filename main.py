@@ -1,11 +1,31 @@
 import argparse
 import traceback
 
-from data.data_utils import read_movies_file
+from data.data_utils import MoviesFile
+from data.record_cache import load_record_cache
+from data.synthetic import SyntheticReviews
+from db.handler.connection_pool import DEFAULT_CHECKOUT_TIMEOUT
 from db.simulator.mongodb_simulator import MongoSimulator
+from db.simulator.index_suite import format_plan_summary
 from db.simulator.postgresql_simulator import PostgresSimulator
 from utils.config_loader import load_config
-from utils.visualization import plot_results
+from utils.db_utils import parse_index_spec, resolve_durability
+from utils.results_recorder import load_results, record_result
+from utils.visualization import plot_parameter_comparison, plot_results
+
+
+def save_results(operation, postgres_time, postgres_times, mongo_time, mongo_times, **parameters):
+    """Record the PostgreSQL and MongoDB results of an operation together with the run parameters."""
+    record_result("PostgreSQL", operation, postgres_time, postgres_times, **parameters)
+    record_result("MongoDB", operation, mongo_time, mongo_times, **parameters)
+
+
+def restore_snapshots(postgres_simulator, mongo_simulator, snapshot_name, **parameters):
+    """Reset both databases to their snapshot before a trial and record how long it took."""
+    postgres_time = postgres_simulator.restore(snapshot_name)
+    mongo_time = mongo_simulator.restore(snapshot_name)
+    print(f"Snapshot restore comparison: PostgreSQL: {postgres_time:.2f}s, MongoDB: {mongo_time:.2f}s.")
+    save_results("Restore Snapshot", postgres_time, [], mongo_time, [], **parameters)
 
 
 def main():
@@ -13,70 +33,277 @@ def main():
     parser.add_argument(
         "actions",
         nargs="+",
-        help="Actions to perform (e.g., setup, insertion, update, delete, visualize, bulk, many, one)",
+        help="Actions to perform (e.g., setup, insertion, update, delete, visualize, bulk, many, one). 'snapshot' "
+             "saves the loaded databases after the insertion; 'restore' resets them to that snapshot before "
+             "every update and delete trial",
     )
     parser.add_argument("--total_rows", type=int, default=100000, help="Total number of rows/documents to use")
     parser.add_argument("--bulk_size", type=int, default=1000, help="Bulk size for bulk operations")
-    parser.add_argument("--persistent_connection", default=True, action="store_true", help="Use persistent connection")
+    parser.add_argument("--connection_mode", choices=["per_op", "persistent", "pooled"], default="pooled",
+                        help="Connection strategy for both databases: a new connection per operation, "
+                             "one persistent connection per thread, or a connection pool")
+    parser.add_argument("--mongo_pool_max", type=int, default=100,
+                        help="Maximum size of the MongoDB client connection pool in 'pooled' mode")
+    parser.add_argument("--data_file", default="data/movies.txt",
+                        help="Dataset file; .gz, .bz2 and .zst files are decompressed on the fly")
+    parser.add_argument("--parse_workers", type=int, default=1,
+                        help="Worker processes used to parse the dataset (values above 1 use the memory-mapped "
+                             "parallel parser), or threads decompressing a multi-frame .zst dataset")
+    parser.add_argument("--start_record", type=int, default=0,
+                        help="Index of the first dataset record to use (seeks through the record offset index)")
+    parser.add_argument("--record_step", type=int, default=1,
+                        help="Use every N-th dataset record from --start_record")
+    parser.add_argument("--sample_records", type=int, default=None,
+                        help="Use this many dataset records chosen at random instead of a contiguous range")
+    parser.add_argument("--sample_seed", type=int, default=None, help="Seed of the --sample_records sample")
+    parser.add_argument("--record_cache", action="store_true",
+                        help="Read normalized records from a columnar on-disk cache (built on first use) instead of "
+                             "parsing the dataset")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Generate --total_rows synthetic records instead of reading data/movies.txt")
+    parser.add_argument("--synthetic_seed", type=int, default=0, help="Seed of the synthetic records")
+    parser.add_argument("--product_skew", type=float, default=1.1,
+                        help="Zipf exponent of product popularity in synthetic records (0 for uniform)")
+    parser.add_argument("--user_skew", type=float, default=0.9,
+                        help="Zipf exponent of user activity in synthetic records (0 for uniform)")
+    parser.add_argument("--stream_batch_size", type=int, default=1000,
+                        help="Records parsed and normalized per batch while single-record insertion tests run")
+    parser.add_argument("--bulk_profile", action="store_true",
+                        help="With setup: defer the PostgreSQL primary key, secondary indexes and WAL logging "
+                             "(UNLOGGED table) and the MongoDB secondary indexes until the insertion has loaded "
+                             "the records, then rebuild them and record load and rebuild times separately")
+    parser.add_argument("--secondary_indexes", default="",
+                        help="Secondary indexes of the reviews table/collection, e.g. 'product_id,user_id+score' "
+                             "(comma-separated, '+' joins the columns of a compound index)")
+    parser.add_argument("--pg_maintenance_work_mem", default="1GB",
+                        help="PostgreSQL maintenance_work_mem of the --bulk_profile index rebuild")
+    parser.add_argument("--snapshot_name", default=None,
+                        help="Name of the PostgreSQL snapshot database and MongoDB snapshot collection "
+                             "(defaults to '<database>_snapshot' and 'reviews_snapshot')")
+    parser.add_argument("--index_repetitions", type=int, default=20,
+                        help="Runs of each query per index case of the 'indexes' benchmark suite")
+    parser.add_argument("--capture_plans", action="store_true",
+                        help="Store the EXPLAIN (ANALYZE, BUFFERS) / explain('executionStats') plan of the index "
+                             "suite and complex queries with their timings")
     parser.add_argument("--concurrent", action="store_true", help="Run concurrent read/write operations test")
     parser.add_argument("--simulate_error", default=False, action="store_true",
                         help="Simulate an error in transaction to test rollback")
     parser.add_argument("--one", action="store_true", help="Update a single record")
     parser.add_argument("--many", action="store_true", help="Update multiple records")
+    parser.add_argument("--commit_every", type=int, default=1,
+                        help="Group single-row insert/update/delete operations into transactions of this many "
+                             "operations (a MongoDB session transaction requires a replica set)")
+    parser.add_argument("--durability", choices=["acknowledged", "journaled"], default=None,
+                        help="Configure both databases to the same durability guarantee: 'acknowledged' "
+                             "(synchronous_commit=off, w:1) or 'journaled' (synchronous_commit=on, j:true)")
+    parser.add_argument("--pg_synchronous_commit", choices=["off", "local", "on"], default=None,
+                        help="PostgreSQL synchronous_commit for every session (overrides --durability)")
+    parser.add_argument("--mongo_write_concern", choices=["w0", "w1", "journaled"], default=None,
+                        help="MongoDB write concern for written collections (overrides --durability)")
+    parser.add_argument("--mongo_insert_mode", choices=["ordered", "unordered_parallel"], default="ordered",
+                        help="MongoDB bulk insertion mode: one ordered insert_many per bulk, or unordered "
+                             "sub-batches sent in parallel")
+    parser.add_argument("--mongo_sub_batch_bytes", type=int, default=1024 * 1024,
+                        help="Maximum BSON size of a sub-batch for the 'unordered_parallel' MongoDB insert mode")
+    parser.add_argument("--mongo_insert_workers", type=int, default=4,
+                        help="Sub-batches in flight for the 'unordered_parallel' MongoDB insert mode")
+    parser.add_argument("--per_row_values", action="store_true",
+                        help="With 'update --many', set a different score on every row instead of one increment")
+    parser.add_argument("--pg_bulk_update_method", choices=["values", "temp_table"], default="values",
+                        help="PostgreSQL per-row bulk update method: UPDATE ... FROM (VALUES ...) or a COPY-loaded "
+                             "temporary staging table")
+    parser.add_argument("--pg_insert_strategy", choices=["executemany", "values", "copy"], default="executemany",
+                        help="Strategy used by PostgreSQL bulk insertion")
+    parser.add_argument("--pg_page_size", type=int, default=100,
+                        help="Rows per INSERT statement for the 'values' PostgreSQL insert strategy")
+    parser.add_argument("--pg_copy_format", choices=["text", "binary"], default="text",
+                        help="COPY format for the 'copy' PostgreSQL insert strategy")
+    parser.add_argument("--pg_prepared", action="store_true",
+                        help="Use server-side prepared statements for PostgreSQL single-row insert/update/delete")
+    parser.add_argument("--pg_pipeline", type=int, default=0,
+                        help="Run PostgreSQL single-row insert/update/delete loops in psycopg 3 pipelined batches "
+                             "of this size (0 disables pipelining) on one persistent connection; each batch commits as "
+                             "one transaction, so this excludes --commit_every")
+    parser.add_argument("--id_chunk_size", type=int, default=10000,
+                        help="IDs fetched per round trip when update/delete tests stream the existing IDs")
+    parser.add_argument("--pg_id_source", choices=["keyset", "server_cursor"], default="keyset",
+                        help="How PostgreSQL IDs are streamed: keyset pagination on id or a named server-side cursor")
+    parser.add_argument("--pg_pool_min", type=int, default=1, help="Minimum size of the PostgreSQL connection pool")
+    parser.add_argument("--pg_pool_max", type=int, default=100, help="Maximum size of the PostgreSQL connection pool")
+    parser.add_argument("--pg_pool_timeout", type=float, default=DEFAULT_CHECKOUT_TIMEOUT,
+                        help="Seconds to wait for a free PostgreSQL pooled connection before failing the operation")
+
+    parser.add_argument("--concurrency_level", type=int, default=10,
+                        help="Threads (or in-flight operations with --async_driver) for the concurrent test")
+    parser.add_argument("--num_operations", type=int, default=100000,
+                        help="Total number of operations for the concurrent test")
+    parser.add_argument("--key_skew", type=float, default=0.0,
+                        help="Skew of the random key selection in the concurrent test (0 = uniform, higher values "
+                             "concentrate operations on the oldest rows)")
+    parser.add_argument("--delete_ratio", type=float, default=0.0,
+                        help="Fraction of the concurrent test operations that delete a row (taken from updates)")
+    parser.add_argument("--async_driver", action="store_true",
+                        help="Run the concurrent test on asyncio (asyncpg and Motor) instead of a thread pool")
+    parser.add_argument("--compare_operation", default="Insertion",
+                        help="Recorded operation to plot with the 'compare' action (e.g., 'Insertion (Bulk)')")
+    parser.add_argument("--compare_by", default="connection_mode",
+                        help="Run parameter to group recorded results by with the 'compare' action")
 
     args = parser.parse_args()
+    try:
+        pg_synchronous_commit, mongo_write_concern = resolve_durability(
+            args.durability, args.pg_synchronous_commit, args.mongo_write_concern, args.commit_every)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.pg_pipeline > 0 and args.commit_every > 1:
+        parser.error("--pg_pipeline batches commit as one transaction each and cannot be combined with "
+                     "--commit_every.")
+    if args.synthetic:
+        dataset = (f"synthetic(seed={args.synthetic_seed}, product_skew={args.product_skew}, "
+                   f"user_skew={args.user_skew})")
+    else:
+        dataset = args.data_file
+    run_parameters = {"total_rows": args.total_rows, "dataset": dataset, "connection_mode": args.connection_mode,
+                      "commit_every": args.commit_every, "pg_prepared": args.pg_prepared,
+                      "pg_pipeline": args.pg_pipeline,
+                      # The pipelined single-row loops ignore --connection_mode and use one persistent connection
+                      "pg_pipeline_connection": "persistent" if args.pg_pipeline > 0 else "none",
+                      "durability": args.durability,
+                      "pg_synchronous_commit": pg_synchronous_commit or "default",
+                      "mongo_write_concern": mongo_write_concern or "default"}
 
     # Load configurations
     postgres_config = load_config('config/postgres_config.json')
     mongo_config = load_config('config/mongo_config.json')
 
     # Initialize simulators
-    use_persistent_connection = args.persistent_connection
-    print(f"Using persistent connection: {use_persistent_connection}")
-    postgres_simulator = PostgresSimulator(postgres_config, use_persistent_connection, args.total_rows)
-    mongo_simulator = MongoSimulator(mongo_config, use_persistent_connection, args.total_rows)
+    connection_mode = args.connection_mode
+    secondary_indexes = parse_index_spec(args.secondary_indexes)
+    print(f"Using connection mode: {connection_mode}")
+    postgres_simulator = PostgresSimulator(postgres_config, connection_mode, args.total_rows,
+                                           use_prepared_statements=args.pg_prepared,
+                                           pool_min_size=args.pg_pool_min, pool_max_size=args.pg_pool_max,
+                                           pool_timeout=args.pg_pool_timeout,
+                                           pipeline_batch_size=args.pg_pipeline, commit_every=args.commit_every,
+                                           synchronous_commit=pg_synchronous_commit,
+                                           id_chunk_size=args.id_chunk_size, id_source=args.pg_id_source,
+                                           key_skew=args.key_skew, delete_ratio=args.delete_ratio,
+                                           stream_batch_size=args.stream_batch_size,
+                                           secondary_indexes=secondary_indexes,
+                                           maintenance_work_mem=args.pg_maintenance_work_mem,
+                                           capture_plans=args.capture_plans)
+    mongo_simulator = MongoSimulator(mongo_config, connection_mode, args.total_rows,
+                                     pool_max_size=args.mongo_pool_max, commit_every=args.commit_every,
+                                     write_concern=mongo_write_concern, id_chunk_size=args.id_chunk_size,
+                                     key_skew=args.key_skew, delete_ratio=args.delete_ratio,
+                                     stream_batch_size=args.stream_batch_size,
+                                     secondary_indexes=secondary_indexes, capture_plans=args.capture_plans)
+    print(f"Durability: PostgreSQL synchronous_commit={pg_synchronous_commit or 'default'}, "
+          f"MongoDB write concern={mongo_write_concern or 'default'}")
 
     # Perform setup if specified
     if "setup" in args.actions:
         print("Setting up databases...")
-        postgres_simulator.setup()
-        mongo_simulator.setup()
+        postgres_simulator.setup(bulk_profile=args.bulk_profile)
+        mongo_simulator.setup(bulk_profile=args.bulk_profile)
         print("Databases set up successfully.")
 
     # Read records
-    file_path = "data/movies.txt"
+    file_path = args.data_file
     max_records = args.total_rows
     print(f"Using {max_records} records for the simulation")
-    records = list(read_movies_file(file_path, max_records))
+    selection = {"start": args.start_record, "step": args.record_step, "sample_size": args.sample_records,
+                 "seed": args.sample_seed}
+    if args.synthetic:
+        print(f"Generating synthetic records (seed {args.synthetic_seed}, product skew {args.product_skew}, "
+              f"user skew {args.user_skew}).")
+        records = SyntheticReviews(max_records, seed=args.synthetic_seed, product_skew=args.product_skew,
+                                   user_skew=args.user_skew)
+    elif args.record_cache:
+        records = load_record_cache(file_path, max_records, workers=args.parse_workers, **selection)
+    else:
+        # Records are parsed lazily and streamed into the insertion tests
+        records = MoviesFile(file_path, max_records, workers=args.parse_workers, **selection)
 
+    # Time spent loading records, the first phase of a --bulk_profile load
+    postgres_load_time = mongo_load_time = 0.0
     try:
         if "insertion" in args.actions:
             if "one" in args.actions:
                 print("Testing single insertion...")
                 postgres_time, postgres_times = postgres_simulator.test_insertion(records)
                 mongo_time, mongo_times = mongo_simulator.test_insertion(records)
+                postgres_load_time += postgres_time
+                mongo_load_time += mongo_time
                 print(f"Insertion comparison: PostgreSQL: {postgres_time:.2f}s, MongoDB: {mongo_time:.2f}s.")
+                save_results("Insertion", postgres_time, postgres_times, mongo_time, mongo_times, **run_parameters)
                 if "visualize" in args.actions:
                     plot_results(postgres_time, postgres_times, mongo_time, mongo_times, operation_name="Insertion",
-                                 use_persistent_connection=use_persistent_connection)
+                                 connection_mode=connection_mode)
 
             if "bulk" in args.actions:
                 bulk_size = args.bulk_size
                 print(f"Testing bulk insertion with bulk size {bulk_size}...")
-                postgres_time, postgres_times = postgres_simulator.test_insertion_many(records, bulk_size)
-                mongo_time, mongo_times = mongo_simulator.test_insertion_many(records, bulk_size)
+                postgres_time, postgres_times = postgres_simulator.test_insertion_many(
+                    records, bulk_size, insert_strategy=args.pg_insert_strategy, page_size=args.pg_page_size,
+                    copy_format=args.pg_copy_format)
+                mongo_time, mongo_times = mongo_simulator.test_insertion_many(
+                    records, bulk_size, insert_mode=args.mongo_insert_mode,
+                    max_batch_bytes=args.mongo_sub_batch_bytes, workers=args.mongo_insert_workers)
+                postgres_load_time += postgres_time
+                mongo_load_time += mongo_time
                 print(f"Bulk insertion comparison: PostgreSQL: {postgres_time:.2f}s, MongoDB: {mongo_time:.2f}s.")
+                strategy_parameters = {"pg_insert_strategy": args.pg_insert_strategy,
+                                       "mongo_insert_mode": args.mongo_insert_mode}
+                if args.pg_insert_strategy == "values":
+                    strategy_parameters["pg_page_size"] = args.pg_page_size
+                elif args.pg_insert_strategy == "copy":
+                    strategy_parameters["pg_copy_format"] = args.pg_copy_format
+                if args.mongo_insert_mode == "unordered_parallel":
+                    strategy_parameters["mongo_sub_batch_bytes"] = args.mongo_sub_batch_bytes
+                    strategy_parameters["mongo_insert_workers"] = args.mongo_insert_workers
+                    strategy_parameters["mongo_sub_batch_throughput"] = mongo_simulator.sub_batch_throughput
+                save_results("Insertion (Bulk)", postgres_time, postgres_times, mongo_time, mongo_times,
+                             bulk_size=bulk_size, **strategy_parameters, **run_parameters)
                 if "visualize" in args.actions:
                     plot_results(postgres_time, postgres_times, mongo_time, mongo_times, operation_name="Insertion",
-                                 bulk_size=bulk_size, use_persistent_connection=use_persistent_connection)
+                                 bulk_size=bulk_size, connection_mode=connection_mode)
+
+        if "setup" in args.actions and args.bulk_profile:
+            postgres_rebuild_time, postgres_rebuild_times = postgres_simulator.finish_bulk_load()
+            mongo_rebuild_time, mongo_rebuild_times = mongo_simulator.finish_bulk_load()
+            if postgres_rebuild_time is None or mongo_rebuild_time is None:
+                print("Skipping the query-ready bulk load result since a rebuild failed.")
+            else:
+                postgres_time = postgres_load_time + postgres_rebuild_time
+                mongo_time = mongo_load_time + mongo_rebuild_time
+                print(f"Time to query-ready (load + rebuild):\n"
+                      f"  PostgreSQL: {postgres_load_time:.2f}s + {postgres_rebuild_time:.2f}s = {postgres_time:.2f}s\n"
+                      f"  MongoDB: {mongo_load_time:.2f}s + {mongo_rebuild_time:.2f}s = {mongo_time:.2f}s")
+                record_result("PostgreSQL", "Bulk Load (Query-Ready)", postgres_time, postgres_rebuild_times,
+                              load_time=postgres_load_time, rebuild_time=postgres_rebuild_time,
+                              secondary_indexes=args.secondary_indexes,
+                              pg_maintenance_work_mem=args.pg_maintenance_work_mem, **run_parameters)
+                record_result("MongoDB", "Bulk Load (Query-Ready)", mongo_time, mongo_rebuild_times,
+                              load_time=mongo_load_time, rebuild_time=mongo_rebuild_time,
+                              secondary_indexes=args.secondary_indexes, **run_parameters)
+
+        if "snapshot" in args.actions:
+            postgres_time = postgres_simulator.snapshot(args.snapshot_name)
+            mongo_time = mongo_simulator.snapshot(args.snapshot_name)
+            print(f"Snapshot comparison: PostgreSQL: {postgres_time:.2f}s, MongoDB: {mongo_time:.2f}s.")
+            save_results("Snapshot", postgres_time, [], mongo_time, [], **run_parameters)
 
         if "update" in args.actions:
             if args.one:
+                if "restore" in args.actions:
+                    restore_snapshots(postgres_simulator, mongo_simulator, args.snapshot_name, **run_parameters)
                 print("Testing single update...")
-                # postgres_time, postgres_times = postgres_simulator.test_update_one()
-                postgres_time, postgres_times = 0, 0
+                postgres_time, postgres_times = postgres_simulator.test_update_one()
                 mongo_time, mongo_times = mongo_simulator.test_update_one()
                 print(f"Single update comparison:\n  PostgreSQL: {postgres_time:.2f}s\n  MongoDB: {mongo_time:.2f}s.")
+                save_results("Update (One Record)", postgres_time, postgres_times, mongo_time, mongo_times,
+                             **run_parameters)
 
                 if "visualize" in args.actions:
                     plot_results(
@@ -85,15 +312,28 @@ def main():
                         mongo_time=mongo_time,
                         mongo_times=mongo_times,
                         operation_name="Update (One Record)",
-                        use_persistent_connection=use_persistent_connection
+                        connection_mode=connection_mode
                     )
 
             if args.many:
                 bulk_size = args.bulk_size
+                if "restore" in args.actions:
+                    restore_snapshots(postgres_simulator, mongo_simulator, args.snapshot_name, **run_parameters)
                 print(f"Testing bulk update with bulk size {bulk_size}...")
-                postgres_time, postgres_times = postgres_simulator.test_update_many(bulk_size)
-                mongo_time, mongo_times = mongo_simulator.test_update_many(bulk_size)
+                if args.per_row_values:
+                    operation_name = "Update (Bulk, Per-Row Values)"
+                    postgres_time, postgres_times = postgres_simulator.test_update_many_values(
+                        bulk_size, args.pg_bulk_update_method)
+                    mongo_time, mongo_times = mongo_simulator.test_update_many_values(bulk_size)
+                    update_parameters = {"pg_bulk_update_method": args.pg_bulk_update_method}
+                else:
+                    operation_name = "Update (Bulk)"
+                    postgres_time, postgres_times = postgres_simulator.test_update_many(bulk_size)
+                    mongo_time, mongo_times = mongo_simulator.test_update_many(bulk_size)
+                    update_parameters = {}
                 print(f"Bulk update comparison:\n  PostgreSQL: {postgres_time:.2f}s\n  MongoDB: {mongo_time:.2f}s.")
+                save_results(operation_name, postgres_time, postgres_times, mongo_time, mongo_times,
+                             bulk_size=bulk_size, **update_parameters, **run_parameters)
 
                 if "visualize" in args.actions:
                     plot_results(
@@ -101,17 +341,21 @@ def main():
                         postgres_times=postgres_times,
                         mongo_time=mongo_time,
                         mongo_times=mongo_times,
-                        operation_name="Update (Bulk)",
+                        operation_name=operation_name,
                         bulk_size=bulk_size,
-                        use_persistent_connection=use_persistent_connection
+                        connection_mode=connection_mode
                     )
 
         if "deletion" in args.actions:
             if args.one:
+                if "restore" in args.actions:
+                    restore_snapshots(postgres_simulator, mongo_simulator, args.snapshot_name, **run_parameters)
                 print("Testing single delete...")
                 postgres_time, postgres_times = postgres_simulator.test_delete_one()
                 mongo_time, mongo_times = mongo_simulator.test_delete_one()
                 print(f"Single delete comparison:\n  PostgreSQL: {postgres_time:.2f}s\n  MongoDB: {mongo_time:.2f}s.")
+                save_results("Delete (One Record)", postgres_time, postgres_times, mongo_time, mongo_times,
+                             **run_parameters)
 
                 if "visualize" in args.actions:
                     plot_results(
@@ -120,15 +364,19 @@ def main():
                         mongo_time=mongo_time,
                         mongo_times=mongo_times,
                         operation_name="Delete (One Record)",
-                        use_persistent_connection=use_persistent_connection
+                        connection_mode=connection_mode
                     )
 
             if args.many:
                 bulk_size = args.bulk_size
+                if "restore" in args.actions:
+                    restore_snapshots(postgres_simulator, mongo_simulator, args.snapshot_name, **run_parameters)
                 print(f"Testing bulk delete with bulk size {bulk_size}...")
                 postgres_time, postgres_times = postgres_simulator.test_delete_many(bulk_size)
                 mongo_time, mongo_times = mongo_simulator.test_delete_many(bulk_size)
                 print(f"Bulk delete comparison:\n  PostgreSQL: {postgres_time:.2f}s\n  MongoDB: {mongo_time:.2f}s.")
+                save_results("Delete (Bulk)", postgres_time, postgres_times, mongo_time, mongo_times,
+                             bulk_size=bulk_size, **run_parameters)
 
                 if "visualize" in args.actions:
                     plot_results(
@@ -138,14 +386,32 @@ def main():
                         mongo_times=mongo_times,
                         operation_name="Delete (Bulk)",
                         bulk_size=bulk_size,
-                        use_persistent_connection=use_persistent_connection
+                        connection_mode=connection_mode
                     )
 
         if "concurrent" in args.actions:
-            concurrency_level = 10
-            num_operations = 100000
-            postgres_simulator.test_concurrent_operations(concurrency_level, num_operations)
-            mongo_simulator.test_concurrent_operations(concurrency_level, num_operations)
+            concurrency_level = args.concurrency_level
+            num_operations = args.num_operations
+            if args.async_driver:
+                postgres_time, postgres_times = postgres_simulator.test_concurrent_operations_async(
+                    concurrency_level, num_operations)
+                pg_pool_stats = None
+            else:
+                postgres_time, postgres_times = postgres_simulator.test_concurrent_operations(concurrency_level,
+                                                                                             num_operations)
+                pg_pool_stats = postgres_simulator.handler.pool_stats()
+            if args.async_driver:
+                mongo_time, mongo_times = mongo_simulator.test_concurrent_operations_async(concurrency_level,
+                                                                                           num_operations)
+            else:
+                mongo_time, mongo_times = mongo_simulator.test_concurrent_operations(concurrency_level,
+                                                                                     num_operations)
+            save_results("Concurrent Operations", postgres_time, postgres_times, mongo_time, mongo_times,
+                         concurrency_level=concurrency_level, num_operations=num_operations,
+                         driver="asyncio" if args.async_driver else "threads",
+                         key_skew=args.key_skew, delete_ratio=args.delete_ratio,
+                         pg_pool_min=args.pg_pool_min, pg_pool_max=args.pg_pool_max,
+                         pg_pool_stats=pg_pool_stats, **run_parameters)
 
         if "transaction" in args.actions:
             print("Testing transactional operations in MongoDB...")
@@ -155,8 +421,28 @@ def main():
 
         if "complex_queries" in args.actions:
             print("Testing complex queries operations...")
-            postgres_simulator.test_complex_query()
-            mongo_simulator.test_complex_query()
+            for engine, simulator in (("PostgreSQL", postgres_simulator), ("MongoDB", mongo_simulator)):
+                query_time, _ = simulator.test_complex_query()
+                for plan in simulator.query_plans:
+                    print(f"{engine} complex query plan: {format_plan_summary(plan['summary'])}")
+                record_result(engine, "Complex Query", query_time, [query_time], plans=simulator.query_plans,
+                              **run_parameters)
+
+        if "indexes" in args.actions:
+            # Both engines run the same predicates, sampled from the PostgreSQL table
+            parameters = postgres_simulator.sample_query_parameters(args.index_repetitions)
+            for engine, simulator in (("PostgreSQL", postgres_simulator), ("MongoDB", mongo_simulator)):
+                for result in simulator.test_index_suite(args.index_repetitions, parameters):
+                    query_times = [summary["mean"] * summary["count"] for summary in result["queries"].values()
+                                   if summary["count"]]
+                    record_result(engine, f"Index Suite ({result['case']})", sum(query_times), None,
+                                  index_size=result["index_size"], build_time=result["build_time"],
+                                  queries=result["queries"], repetitions=args.index_repetitions,
+                                  **run_parameters)
+
+        if "compare" in args.actions:
+            print(f"Comparing recorded '{args.compare_operation}' results by '{args.compare_by}'...")
+            plot_parameter_comparison(load_results(), args.compare_operation, args.compare_by)
 
     except Exception as e:
         print(f"An error occurred: {str(e)}")
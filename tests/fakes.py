@@ -0,0 +1,79 @@
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INERROR
+
+
+class FakeCursor:
+    """Cursor recording its statements, optionally running them on a `FakeConnection`."""
+
+    def __init__(self, conn=None):
+        self.conn = conn
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append(query)
+        if self.conn is not None:
+            self.conn.run(query)
+
+    def copy_expert(self, query, stream):
+        while stream.read(8192):
+            pass
+        self.execute(query)
+
+    def fetchone(self):
+        return (len(self.executed),)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """
+    psycopg2 connection double with transaction semantics.
+
+    Statements count as pending until committed. `fail_next` makes the next statement fail and abort the
+    transaction, `fail_on_commit` makes the next commit fail; like PostgreSQL, committing an aborted
+    transaction rolls it back.
+    """
+
+    def __init__(self):
+        self.closed = False
+        self.fail_next = False
+        self.fail_on_commit = False
+        self.status = TRANSACTION_STATUS_IDLE
+        self.pending = 0
+        self.committed = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self._cursor = FakeCursor(self)
+
+    def cursor(self):
+        return self._cursor
+
+    def run(self, query):
+        if self.fail_next:
+            self.fail_next = False
+            self.status = TRANSACTION_STATUS_INERROR
+            raise RuntimeError("statement failed")
+        self.pending += 1
+
+    def commit(self):
+        self.commits += 1
+        if self.fail_on_commit:
+            self.fail_on_commit = False
+            self.status = TRANSACTION_STATUS_INERROR
+            raise RuntimeError("commit failed")
+        if self.status == TRANSACTION_STATUS_INERROR:
+            self.rollback()
+            return
+        self.committed += self.pending
+        self.pending = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.pending = 0
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = True
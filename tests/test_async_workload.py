@@ -0,0 +1,44 @@
+import asyncio
+import unittest
+
+from db.simulator.async_workload import run_concurrent_workload
+from db.simulator.id_registry import EmptyRegistryError, IntIdRegistry
+
+
+class TestRunConcurrentWorkload(unittest.TestCase):
+    def test_failures_are_counted(self):
+        """Test that a failed operation is counted and the workload goes on."""
+        async def read():
+            pass
+
+        async def write():
+            raise RuntimeError("write failed")
+
+        total_time, operation_times, failures = asyncio.run(run_concurrent_workload(
+            {"read": read, "write": write}, ["read", "write", "read"], 2))
+
+        self.assertEqual(failures, 1)
+        self.assertEqual(len(operation_times), 3)
+
+    def test_empty_registry_stops_the_workers(self):
+        """Test that running out of ids stops every worker instead of counting failures."""
+        ids = IntIdRegistry()
+        ids.append(1)
+        calls = []
+
+        async def delete():
+            calls.append("delete")
+            ids.pop()
+
+        async def read():
+            calls.append("read")
+            ids.sample()
+
+        with self.assertRaises(EmptyRegistryError):
+            asyncio.run(run_concurrent_workload({"read": read, "delete": delete},
+                                                ["delete"] + ["read"] * 10, 3))
+        self.assertLessEqual(len(calls), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
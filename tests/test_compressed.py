@@ -0,0 +1,61 @@
+import bz2
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from data.compressed import zstd_frames
+from data.data_utils import read_movies_file
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class TestCompressedInput(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.content = "".join(f"product/productId: P{i}\nreview/score: 4.0\nreview/text: text {i}\n\n"
+                               for i in range(300)).encode("utf-8")
+        self.expected = [{"product/productId": f"P{i}", "review/score": "4.0", "review/text": f"text {i}"}
+                         for i in range(300)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as file:
+            file.write(data)
+        return path
+
+    def test_gzip_and_bzip2(self):
+        for name, compress in (("movies.txt.gz", gzip.compress), ("movies.txt.bz2", bz2.compress)):
+            path = self.write(name, compress(self.content))
+            self.assertEqual(list(read_movies_file(path, 1000)), self.expected)
+            self.assertEqual(list(read_movies_file(path, 3, start=10, step=2)), self.expected[10:16:2])
+
+    @unittest.skipUnless(zstandard, "zstandard is not installed")
+    def test_multi_frame_zstd_is_decompressed_in_order(self):
+        """Test that independent zstd frames are found from their headers and decompressed in parallel, in order."""
+        compressor = zstandard.ZstdCompressor(write_checksum=True)
+        frames = [compressor.compress(self.content[i:i + 1000]) for i in range(0, len(self.content), 1000)]
+        path = self.write("movies.txt.zst", b"".join(frames))
+
+        with open(path, "rb") as file:
+            ranges = list(zstd_frames(file.read()))
+        self.assertEqual(len(ranges), len(frames))
+        self.assertEqual(list(read_movies_file(path, 1000, workers=4)), self.expected)
+        self.assertEqual(list(read_movies_file(path, 5, workers=4)), self.expected[:5])
+
+    @unittest.skipUnless(zstandard, "zstandard is not installed")
+    def test_single_frame_zstd_is_streamed(self):
+        compressor = zstandard.ZstdCompressor().compressobj()
+        path = self.write("movies.txt.zst", compressor.compress(self.content) + compressor.flush())
+        self.assertEqual(list(read_movies_file(path, 1000, workers=4)), self.expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
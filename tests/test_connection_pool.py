@@ -0,0 +1,73 @@
+import threading
+import time
+import unittest
+
+from psycopg2.pool import PoolError
+
+from db.handler.connection_pool import InstrumentedConnectionPool
+from tests.fakes import FakeConnection
+
+
+class TestInstrumentedConnectionPool(unittest.TestCase):
+    def test_counts_created_and_reused_connections(self):
+        """Test that the pool reuses returned connections and counts new ones."""
+        pool = InstrumentedConnectionPool(FakeConnection, minconn=1, maxconn=2)
+        pool.reset_stats()
+
+        first = pool.getconn()
+        second = pool.getconn()
+        pool.putconn(first)
+        third = pool.getconn()
+
+        self.assertIs(third, first)
+        stats = pool.stats()
+        self.assertEqual(stats["checkouts"], 3)
+        self.assertEqual(stats["connections_created"], 1)
+        self.assertEqual(stats["connections_reused"], 2)
+        self.assertEqual(stats["peak_in_use"], 2)
+        self.assertEqual(stats["saturation"], 1.0)
+        pool.putconn(second)
+        pool.putconn(third)
+
+    def test_blocks_until_connection_is_returned(self):
+        """Test that an exhausted pool makes callers wait instead of failing."""
+        pool = InstrumentedConnectionPool(FakeConnection, minconn=0, maxconn=1)
+        held = pool.getconn()
+        result = {}
+
+        def checkout():
+            result["conn"] = pool.getconn()
+
+        worker = threading.Thread(target=checkout)
+        worker.start()
+        time.sleep(0.05)
+        self.assertNotIn("conn", result)
+        pool.putconn(held)
+        worker.join(timeout=1)
+
+        self.assertIs(result["conn"], held)
+        stats = pool.stats()
+        self.assertEqual(stats["waited_checkouts"], 1)
+        self.assertGreater(stats["max_wait_time"], 0)
+
+    def test_timeout_raises_pool_error(self):
+        pool = InstrumentedConnectionPool(FakeConnection, minconn=0, maxconn=1, timeout=0.01)
+        pool.getconn()
+        with self.assertRaises(PoolError):
+            pool.getconn()
+
+    def test_reports_closed_connections(self):
+        """Test that every connection closed by the pool is reported to `on_close`."""
+        closed = []
+        pool = InstrumentedConnectionPool(FakeConnection, minconn=0, maxconn=2, on_close=closed.append)
+        discarded, idle = pool.getconn(), pool.getconn()
+        pool.putconn(discarded, close=True)
+        pool.putconn(idle)
+        pool.closeall()
+
+        self.assertEqual(closed, [discarded, idle])
+        self.assertTrue(discarded.closed and idle.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
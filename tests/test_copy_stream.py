@@ -0,0 +1,67 @@
+import struct
+import unittest
+
+from db.handler.copy_stream import CopyRecordStream, encode_binary_row, encode_text_row
+
+
+class TestCopyRecordStream(unittest.TestCase):
+    def setUp(self):
+        self.record = {
+            "product_id": "B001E4KFG0",
+            "user_id": "A1E5YZGEUSK7F2",
+            "profile_name": None,
+            "helpfulness": "2/3",
+            "score": 4.5,
+            "review_time": 1234567890,
+            "summary": "Tab\there",
+            "review_text": "Line one\nback\\slash"
+        }
+
+    def test_text_row_escapes_special_characters(self):
+        """Test that the text format escapes separators and encodes NULLs."""
+        line = encode_text_row(("a\tb", None, "c\\d", "e\nf")).decode("utf-8")
+        self.assertEqual(line, "a\\tb\t\\N\tc\\\\d\te\\nf\n")
+
+    def test_binary_row_layout(self):
+        """Test that the binary format writes field count, lengths and network-order values."""
+        row = ("p", "u", None, "h", 2.5, 7, "s", "t")
+        data = encode_binary_row(row)
+        self.assertEqual(struct.unpack("!h", data[:2])[0], 8)
+        self.assertIn(struct.pack("!i", -1), data)
+        self.assertIn(struct.pack("!id", 8, 2.5), data)
+        self.assertIn(struct.pack("!iq", 8, 7), data)
+
+    def test_stream_is_lazy_and_counts_rows(self):
+        """Test that records are only consumed as the stream is read."""
+        consumed = []
+
+        def produce():
+            for _ in range(3):
+                consumed.append(1)
+                yield self.record
+
+        stream = CopyRecordStream(produce(), "text")
+        self.assertEqual(consumed, [])
+        first = stream.read(1)
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(consumed), 1)
+        rest = stream.read()
+        self.assertEqual(stream.rows, 3)
+        self.assertEqual((first + rest).count(b"\n"), 3)
+        self.assertEqual(stream.read(8192), b"")
+
+    def test_binary_stream_has_header_and_trailer(self):
+        """Test that a binary stream is framed by the COPY signature and the end-of-data marker."""
+        stream = CopyRecordStream([self.record], "binary")
+        data = stream.read()
+        self.assertTrue(data.startswith(b"PGCOPY\n\xff\r\n\x00"))
+        self.assertTrue(data.endswith(struct.pack("!h", -1)))
+        self.assertIn("FORMAT binary", stream.copy_sql())
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CopyRecordStream([], "csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from data.data_utils import index_path, load_record_index, read_movies_file, read_movies_file_parallel, record_ranges
+
+
+class TestReadMoviesFile(unittest.TestCase):
+    def setUp(self):
+        handle, self.file_path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(handle, "w", encoding="utf-8") as file:
+            for i in range(200):
+                file.write(f"product/productId: P{i}\n"
+                           f"review/userId: U{i}\n"
+                           f"review/score: {i % 5 + 1}.0\n"
+                           f"review/summary: café {i}\n"
+                           f"review/text: first line {i}\n")
+                if i % 3 == 0:
+                    file.write("continued line\n")
+                file.write("\n" if i % 4 else "  \n")
+
+    def tearDown(self):
+        os.remove(self.file_path)
+        if os.path.exists(index_path(self.file_path)):
+            os.remove(index_path(self.file_path))
+
+    def test_ranges_end_on_record_boundaries(self):
+        """Test that every byte range except the first starts with a complete record."""
+        with open(self.file_path, "rb") as file:
+            data = file.read()
+        ranges = list(record_ranges(data, 500))
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(data))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertTrue(data[start:].startswith(b"product/productId"))
+
+    def test_parallel_parser_matches_sequential_parser(self):
+        """Test that the parallel parser yields the same records in the same order."""
+        sequential = list(read_movies_file(self.file_path, 1000))
+        parallel = list(read_movies_file_parallel(self.file_path, 1000, workers=2, chunk_bytes=500))
+        self.assertEqual(len(sequential), 200)
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(sequential[3]["review/text"], "first line 3 continued line")
+
+    def test_parallel_parser_honors_max_records(self):
+        records = list(read_movies_file(self.file_path, 7, workers=2))
+        self.assertEqual([record["product/productId"] for record in records], [f"P{i}" for i in range(7)])
+
+    def test_index_seeks_strides_and_samples(self):
+        """Test that indexed reads return the same records as a full scan."""
+        records = list(read_movies_file(self.file_path, 1000))
+        self.assertEqual(list(read_movies_file(self.file_path, 10, start=195)), records[195:])
+        self.assertEqual(list(read_movies_file(self.file_path, 5, start=10, step=20)), records[10:110:20])
+
+        sample = list(read_movies_file(self.file_path, 1000, sample_size=30, seed=1))
+        self.assertEqual(len(sample), 30)
+        positions = [records.index(record) for record in sample]
+        self.assertEqual(positions, sorted(set(positions)))
+        self.assertEqual(sample, list(read_movies_file(self.file_path, 1000, sample_size=30, seed=1)))
+
+    def test_index_is_rebuilt_when_file_changes(self):
+        self.assertEqual(len(load_record_index(self.file_path)), 200)
+        with open(self.file_path, "a", encoding="utf-8") as file:
+            file.write("product/productId: extra\nreview/text: appended\n")
+        self.assertEqual(len(load_record_index(self.file_path)), 201)
+        self.assertEqual(list(read_movies_file(self.file_path, 1, start=200))[0]["product/productId"], "extra")
+
+
+if __name__ == "__main__":
+    unittest.main()
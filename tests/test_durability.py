@@ -0,0 +1,88 @@
+import unittest
+
+from db.handler.mongodb_handler import WRITE_CONCERNS, MongoDBHandler
+from db.simulator.mongodb_simulator import MongoSimulator
+from utils.db_utils import resolve_durability
+
+CONFIG = {"host": "localhost", "port": 27017, "database": "test"}
+
+
+class FakeSession:
+    def __init__(self):
+        self.in_transaction = False
+        self.write_concerns = []
+
+    def start_transaction(self, write_concern=None):
+        self.in_transaction = True
+        self.write_concerns.append(write_concern)
+
+    def commit_transaction(self):
+        self.in_transaction = False
+
+    def end_session(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self):
+        self.session = FakeSession()
+
+    def start_session(self):
+        return self.session
+
+    def close(self):
+        pass
+
+
+class TestResolveDurability(unittest.TestCase):
+    def test_engine_defaults(self):
+        """Test that no level and no override keeps both engine defaults."""
+        self.assertEqual(resolve_durability(), (None, None))
+
+    def test_matched_levels(self):
+        """Test that a durability level sets both engines to the matching guarantee."""
+        self.assertEqual(resolve_durability("acknowledged"), ("off", "w1"))
+        self.assertEqual(resolve_durability("journaled"), ("on", "journaled"))
+
+    def test_explicit_values_override_the_level(self):
+        """Test that the per-engine settings take precedence over the durability level."""
+        self.assertEqual(resolve_durability("journaled", pg_synchronous_commit="local"), ("local", "journaled"))
+        self.assertEqual(resolve_durability("acknowledged", mongo_write_concern="w0"), ("off", "w0"))
+
+    def test_unknown_level(self):
+        """Test that an unknown durability level is rejected."""
+        with self.assertRaises(ValueError):
+            resolve_durability("fsync")
+
+    def test_unacknowledged_writes_with_group_commits(self):
+        """Test that the 'w0' write concern is rejected with group commits but accepted without them."""
+        with self.assertRaises(ValueError):
+            resolve_durability(mongo_write_concern="w0", commit_every=10)
+        self.assertEqual(resolve_durability(mongo_write_concern="w0", commit_every=1), (None, "w0"))
+
+
+
+class TestMongoGroupCommitDurability(unittest.TestCase):
+    def test_transactions_use_the_write_concern(self):
+        """Test that every group transaction is started with the handler's write concern."""
+        handler = MongoDBHandler(CONFIG, connection_mode="per_op", write_concern="journaled")
+        client = FakeClient()
+        handler._connect = lambda: setattr(handler, "client", client)
+        with handler.batched_commits(2):
+            handler._after_write()
+            handler._after_write()
+
+        self.assertEqual(client.session.write_concerns, [WRITE_CONCERNS["journaled"]] * 2)
+
+    def test_unacknowledged_writes_with_group_commits(self):
+        """Test that the handler and the simulator reject the 'w0' write concern with group commits."""
+        handler = MongoDBHandler(CONFIG, connection_mode="per_op", write_concern="w0")
+        with self.assertRaises(ValueError):
+            with handler.batched_commits(2):
+                pass
+        with self.assertRaises(ValueError):
+            MongoSimulator(CONFIG, connection_mode="per_op", commit_every=2, write_concern="w0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from bson import ObjectId
+
+from db.simulator.id_registry import EmptyRegistryError, IntIdRegistry, ObjectIdRegistry
+
+
+class TestIntIdRegistry(unittest.TestCase):
+    def test_grows_and_samples_registered_ids(self):
+        """Test that appended ids grow the array and sampling only returns registered ids."""
+        registry = IntIdRegistry(capacity=2)
+        registry.extend([1, 2, 3])
+        registry.append(10)
+
+        self.assertEqual(len(registry), 4)
+        for _ in range(50):
+            self.assertIn(registry.sample(), {1, 2, 3, 10})
+            self.assertIn(registry.sample(skew=2.0), {1, 2, 3, 10})
+
+    def test_pop_and_remove(self):
+        """Test that popped and removed ids are never returned again."""
+        registry = IntIdRegistry.from_chunks([[1, 2], [3]])
+        self.assertTrue(registry.remove(2))
+        self.assertFalse(registry.remove(2))
+
+        popped = [registry.pop() for _ in range(len(registry))]
+        self.assertEqual(sorted(popped), [1, 3])
+        with self.assertRaises(EmptyRegistryError):
+            registry.sample()
+        self.assertIsNone(registry.pop())
+
+    def test_skew_favours_oldest_ids(self):
+        registry = IntIdRegistry.from_chunks([range(1000)])
+        picks = [registry.sample(skew=3.0) for _ in range(2000)]
+        self.assertGreater(sum(1 for pick in picks if pick < 250), 1000)
+
+    def test_removals_keep_the_insertion_order(self):
+        """Test that removing ids neither reorders the survivors nor moves new ids into the favoured range."""
+        registry = IntIdRegistry.from_chunks([range(1000)])
+        for key in range(0, 1000, 3):
+            registry.remove(key)
+        for _ in range(300):
+            registry.pop(skew=3.0)
+
+        survivors = [int(key) for key in registry._ids[:registry._size][registry._live[:registry._size]]]
+        self.assertEqual(survivors, sorted(survivors))
+        self.assertEqual(len(survivors), len(registry))
+        picks = [registry.sample(skew=3.0) for _ in range(2000)]
+        self.assertGreater(sum(1 for pick in picks if pick < 500), 1000)
+
+
+class TestObjectIdRegistry(unittest.TestCase):
+    def test_round_trips_object_ids(self):
+        """Test that ObjectIds are packed into 12 bytes each and decoded unchanged."""
+        ids = [ObjectId() for _ in range(5)]
+        registry = ObjectIdRegistry.from_chunks([ids[:3], ids[3:]])
+
+        self.assertEqual(registry.dtype.itemsize, 12)
+        self.assertIn(registry.sample(), ids)
+        self.assertTrue(registry.remove(ids[0]))
+        self.assertEqual(sorted(registry.pop() for _ in range(4)), sorted(ids[1:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
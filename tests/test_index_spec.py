@@ -0,0 +1,24 @@
+import unittest
+
+from utils.db_utils import parse_index_spec
+
+
+class TestIndexSpec(unittest.TestCase):
+    def test_single_and_compound_indexes(self):
+        """Test that commas separate indexes and '+' joins the columns of a compound index."""
+        self.assertEqual(parse_index_spec("product_id, user_id+score"), [("product_id",), ("user_id", "score")])
+
+    def test_empty_spec(self):
+        """Test that an empty or missing spec means no secondary index."""
+        self.assertEqual(parse_index_spec(""), [])
+        self.assertEqual(parse_index_spec(None), [])
+        self.assertEqual(parse_index_spec("product_id,,"), [("product_id",)])
+
+    def test_unknown_column(self):
+        """Test that a column outside the reviews table is rejected."""
+        with self.assertRaises(ValueError):
+            parse_index_spec("product_id+rating")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from db.simulator.index_suite import INDEX_QUERIES, index_case_result, query_parameters
+
+
+class TestIndexSuite(unittest.TestCase):
+    def setUp(self):
+        self.samples = [("B001", "A001", 1000), ("B002", "A002", 2000), ("B003", "A003", 3000)]
+
+    def test_parameters_come_from_sampled_rows(self):
+        """Test that every query gets one parameter set per repetition, built from the sampled rows."""
+        parameters = query_parameters(self.samples, 10, seed=1, time_window=50)
+        self.assertEqual(set(parameters), set(INDEX_QUERIES))
+        for query in INDEX_QUERIES:
+            self.assertEqual(len(parameters[query]), 10)
+        product_ids = {product_id for product_id, _, _ in self.samples}
+        self.assertTrue(all(product_id in product_ids for product_id, in parameters["product_id"]))
+        self.assertTrue(all(end - start == 50 for start, end in parameters["review_time_range"]))
+        pairs = {(product_id, review_time) for product_id, _, review_time in self.samples}
+        self.assertTrue(set(parameters["product_recent"]) <= pairs)
+        self.assertEqual(parameters["score_threshold"][:2], [(1.0,), (2.0,)])
+
+    def test_parameters_are_reproducible(self):
+        """Test that the same seed assigns the same values to the runs."""
+        self.assertEqual(query_parameters(self.samples, 5, seed=3), query_parameters(self.samples, 5, seed=3))
+
+    def test_no_samples(self):
+        """Test that an empty table is reported instead of benchmarking nothing."""
+        with self.assertRaises(ValueError):
+            query_parameters([], 5)
+
+    def test_case_result(self):
+        """Test that a case result holds the index size, build time and per-query summaries."""
+        result = index_case_result("btree", 8192, 0.5, {"product_id": [0.1, 0.3]}, {"product_id": 6})
+        self.assertEqual(result["index_size"], 8192)
+        self.assertEqual(result["queries"]["product_id"]["count"], 2)
+        self.assertEqual(result["queries"]["product_id"]["mean_rows"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import threading
+import unittest
+
+from db.handler.mongodb_handler import MongoDBHandler
+
+CONFIG = {"host": "localhost", "port": 27017, "database": "test"}
+
+
+class TestMongoDBHandlerConnections(unittest.TestCase):
+    def test_persistent_client_per_thread(self):
+        """Test that threads in persistent mode get their own single-connection client, all closed together."""
+        handler = MongoDBHandler(CONFIG, connection_mode="persistent")
+        main_client = handler.client
+        handler._get_connection()
+        self.assertIs(handler.client, main_client)
+        worker_clients = []
+
+        def worker():
+            handler._get_connection()
+            worker_clients.append(handler.client)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(worker_clients[0], main_client)
+        self.assertEqual(worker_clients[0].options.pool_options.max_pool_size, 1)
+        handler.close_persistent_connection()
+        self.assertIsNone(handler.client)
+        self.assertEqual(handler._persistent_clients, [])
+
+    def test_pooled_client_is_shared(self):
+        """Test that threads in pooled mode share one client."""
+        handler = MongoDBHandler(CONFIG, connection_mode="pooled")
+        worker_clients = []
+        thread = threading.Thread(target=lambda: worker_clients.append(handler.client))
+        thread.start()
+        thread.join()
+
+        self.assertIs(worker_clients[0], handler.client)
+        handler.close_persistent_connection()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import threading
+import unittest
+
+from db.handler.connection_pool import InstrumentedConnectionPool
+from db.handler.postgres_handler import PostgresDBHandler
+from db.simulator.postgresql_simulator import PostgresSimulator
+from tests.fakes import FakeConnection
+
+CONFIG = {"host": "localhost", "port": 5432, "user": "postgres", "password": "postgres", "database": "test"}
+
+
+class TestPostgresHandlerErrors(unittest.TestCase):
+    def setUp(self):
+        self.conn = FakeConnection()
+        self.handler = PostgresDBHandler(CONFIG, connection_mode="per_op")
+        self.handler._connect = lambda: self.conn
+        self.record = {"product_id": "B001", "user_id": "A001", "profile_name": None, "helpfulness": "1/1",
+                       "score": 5.0, "review_time": 1, "summary": "s", "review_text": "t"}
+
+    def test_failed_copy_loads_nothing(self):
+        """Test that a failed COPY is rolled back, reports no rows and releases its connection."""
+        self.conn.fail_next = True
+        self.assertEqual(self.handler.copy_many([self.record] * 3), 0)
+        self.assertEqual(self.conn.rollbacks, 1)
+        self.assertTrue(self.conn.closed)
+
+    def test_failed_operation_returns_pooled_connection(self):
+        """Test that a failed operation rolls back and returns its connection to the pool."""
+        self.handler.use_connection_pooling = True
+        self.handler.pool = InstrumentedConnectionPool(lambda: self.conn, minconn=0, maxconn=1, timeout=0.01)
+        self.conn.fail_next = True
+        self.handler.update_score(1)
+        self.assertEqual(self.conn.rollbacks, 1)
+
+        # The only pooled connection is free again, so the next operation does not time out
+        self.handler.update_score(1)
+        self.assertEqual(self.conn.committed, 1)
+        self.assertEqual(self.handler.pool_stats()["checkouts"], 2)
+
+    def test_failed_group_commit_is_counted_and_restarted(self):
+        """Test that a failure inside a group commit discards the open group, counts it and starts a new one."""
+        with self.handler.batched_commits(3):
+            self.handler.update_score(1)
+            self.handler.update_score(2)
+            self.conn.fail_next = True
+            self.handler.update_score(3)
+            for record_id in range(4, 8):
+                self.handler.update_score(record_id)
+
+        self.assertEqual(self.handler.discarded_writes, 2)
+        self.assertEqual(self.handler.discarded_groups, 1)
+        self.assertEqual(self.conn.rollbacks, 1)
+        self.assertEqual(self.conn.committed, 4)
+        self.assertTrue(self.conn.closed)
+
+    def test_failed_group_insert_reports_no_id(self):
+        """Test that an insert whose group commit fails returns no id and only the reported one is discarded."""
+        with self.handler.batched_commits(2):
+            first_id = self.handler.insert_one(self.record)
+            self.assertIsNotNone(first_id)
+            self.conn.fail_on_commit = True
+            self.assertIsNone(self.handler.insert_one(self.record))
+
+        self.assertEqual(self.handler.discarded_writes, 1)
+        self.assertEqual(self.handler.discarded_ids, [first_id])
+        self.assertEqual(self.conn.committed, 0)
+
+    def test_failed_group_insertion_count(self):
+        """Test that the simulator counts only the inserts that survive a failed group commit."""
+        simulator = PostgresSimulator(CONFIG, connection_mode="per_op", commit_every=2)
+        simulator.handler._connect = lambda: self.conn
+        self.conn.fail_on_commit = True
+        simulator.test_insertion([self.record] * 3)
+
+        self.assertEqual(simulator.inserted, 1)
+        self.assertEqual(self.conn.committed, 1)
+
+    def test_failed_rebuild_reports_failure(self):
+        """Test that a failed bulk load rebuild returns None instead of the partial step times."""
+        self.conn.fail_next = True
+        self.assertIsNone(self.handler.finish_bulk_load())
+        self.assertTrue(self.conn.closed)
+
+    def test_persistent_connection_per_thread(self):
+        """Test that threads in persistent mode get their own connection and that all of them are closed."""
+        self.handler.use_persistent_connection = True
+        self.handler._connect = FakeConnection
+        main_conn = self.handler._get_connection()
+        self.assertIs(self.handler._get_connection(), main_conn)
+        worker_conns = []
+        worker = threading.Thread(target=lambda: worker_conns.append(self.handler._get_connection()))
+        worker.start()
+        worker.join()
+
+        self.assertIsNot(worker_conns[0], main_conn)
+        self.handler.close_persistent_connection()
+        self.assertTrue(main_conn.closed and worker_conns[0].closed)
+        self.assertIsNone(self.handler.connection)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from db.handler.prepared_statements import PreparedStatementCache
+from tests.fakes import FakeConnection, FakeCursor
+
+
+class TestPreparedStatementCache(unittest.TestCase):
+    def setUp(self):
+        self.statements = {
+            "first": ("SELECT $1", ("integer",)),
+            "second": ("SELECT $1", ("integer",)),
+            "third": ("SELECT $1", ("integer",)),
+        }
+
+    def test_prepares_once_per_connection(self):
+        """Test that a statement is prepared once per connection and executed afterwards."""
+        cache = PreparedStatementCache(self.statements)
+        conn_a, conn_b, cursor = object(), object(), FakeCursor()
+
+        cache.execute(conn_a, cursor, "first", (1,))
+        cache.execute(conn_a, cursor, "first", (2,))
+        cache.execute(conn_b, cursor, "first", (3,))
+
+        prepares = [query for query in cursor.executed if query.startswith("PREPARE")]
+        self.assertEqual(len(prepares), 2)
+        self.assertEqual(cache.prepares, 2)
+        self.assertEqual(cache.executions, 3)
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used statement is deallocated when the cache is full."""
+        cache = PreparedStatementCache(self.statements, max_size=2)
+        conn, cursor = object(), FakeCursor()
+
+        cache.execute(conn, cursor, "first", (1,))
+        cache.execute(conn, cursor, "second", (1,))
+        cache.execute(conn, cursor, "first", (1,))
+        cache.execute(conn, cursor, "third", (1,))
+
+        self.assertIn("DEALLOCATE second", cursor.executed)
+        cache.execute(conn, cursor, "first", (1,))
+        self.assertEqual(cache.prepares, 3)
+
+    def test_reset_keeps_the_transaction(self):
+        """Test that resetting a connection deallocates its statements without rolling it back."""
+        cache = PreparedStatementCache(self.statements)
+        conn = FakeConnection()
+        cache.execute(conn, conn.cursor(), "first", (1,))
+
+        cache.reset(conn)
+        self.assertEqual(conn.rollbacks, 0)
+        self.assertIn("DEALLOCATE ALL", conn.cursor().executed)
+        cache.execute(conn, conn.cursor(), "first", (2,))
+        self.assertEqual(cache.prepares, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
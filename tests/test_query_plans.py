@@ -0,0 +1,62 @@
+import unittest
+
+from utils.query_plans import summarize_mongo_plan, summarize_postgres_plan
+
+
+class TestQueryPlans(unittest.TestCase):
+    def test_postgres_bitmap_scan(self):
+        """Test that a bitmap scan counts heap rows and rechecks, and reports the index and buffers."""
+        plan = [{
+            "Plan": {
+                "Node Type": "Bitmap Heap Scan", "Actual Rows": 12, "Actual Loops": 1,
+                "Rows Removed by Index Recheck": 3, "Shared Hit Blocks": 20, "Shared Read Blocks": 4,
+                "Plans": [{"Node Type": "Bitmap Index Scan", "Index Name": "reviews_bench_btree_product_id_idx",
+                           "Actual Rows": 15, "Actual Loops": 1}]
+            },
+            "Execution Time": 0.42
+        }]
+        summary = summarize_postgres_plan(plan)
+        self.assertEqual(summary["rows_returned"], 12)
+        self.assertEqual(summary["rows_examined"], 15)
+        self.assertEqual(summary["indexes"], ["reviews_bench_btree_product_id_idx"])
+        self.assertFalse(summary["full_scan"])
+        self.assertEqual((summary["buffer_hits"], summary["buffer_reads"]), (20, 4))
+        self.assertEqual(summary["execution_time_ms"], 0.42)
+
+    def test_postgres_seq_scan(self):
+        """Test that rows removed by a sequential scan filter count as examined."""
+        plan = [{"Plan": {"Node Type": "Seq Scan", "Actual Rows": 2, "Actual Loops": 1,
+                          "Rows Removed by Filter": 998}, "Execution Time": 5.0}]
+        summary = summarize_postgres_plan(plan)
+        self.assertEqual((summary["rows_examined"], summary["rows_returned"]), (1000, 2))
+        self.assertTrue(summary["full_scan"])
+        self.assertEqual(summary["indexes"], [])
+
+    def test_mongo_index_scan(self):
+        """Test that documents and keys examined and the index used come from the execution stats."""
+        explain = {
+            "queryPlanner": {"winningPlan": {"stage": "FETCH",
+                                             "inputStage": {"stage": "IXSCAN", "indexName": "bench_product_id"}}},
+            "executionStats": {"nReturned": 7, "totalKeysExamined": 7, "totalDocsExamined": 7,
+                               "executionTimeMillis": 1}
+        }
+        summary = summarize_mongo_plan(explain)
+        self.assertEqual((summary["rows_returned"], summary["rows_examined"], summary["keys_examined"]), (7, 7, 7))
+        self.assertEqual(summary["indexes"], ["bench_product_id"])
+        self.assertFalse(summary["full_scan"])
+        self.assertIsNone(summary["buffer_hits"])
+
+    def test_mongo_aggregation(self):
+        """Test that the statistics of an aggregation come from the query feeding its pipeline."""
+        explain = {"stages": [
+            {"$cursor": {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}},
+                         "executionStats": {"nReturned": 50, "totalKeysExamined": 0, "totalDocsExamined": 100}}},
+            {"$sort": {"sortKey": {"score": -1}}}
+        ]}
+        summary = summarize_mongo_plan(explain)
+        self.assertEqual((summary["rows_returned"], summary["rows_examined"]), (50, 100))
+        self.assertTrue(summary["full_scan"])
+
+
+if __name__ == "__main__":
+    unittest.main()
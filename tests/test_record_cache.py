@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from data.data_utils import read_movies_file
+from data.record_cache import cache_path, load_record_cache
+from utils.db_utils import ReviewRecord
+
+
+class TestRecordCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, "movies.txt")
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            for i in range(50):
+                file.write(f"product/productId: P{i % 4}\n"
+                           f"review/userId: U{i}\n"
+                           f"review/helpfulness: {i}/{i + 1}\n"
+                           f"review/score: {i % 5 + 1}.0\n"
+                           f"review/time: {1000 + i}\n"
+                           f"review/summary: résumé {i}\n"
+                           f"review/text: text {i}\n\n")
+        self.cache_dir = os.path.join(self.directory, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cached_records_match_normalized_records(self):
+        """Test that the cache returns the normalized records, including missing fields and dictionary ids."""
+        expected = [ReviewRecord.from_record(record) for record in read_movies_file(self.file_path, 40)]
+        cache = load_record_cache(self.file_path, 40, cache_dir=self.cache_dir)
+
+        self.assertEqual(len(cache), 40)
+        self.assertEqual(list(cache), expected)
+        self.assertEqual(cache[5:9], expected[5:9])
+        self.assertEqual(cache[-1], expected[-1])
+        self.assertIsNone(cache[0].profile_name)
+        self.assertEqual(len(cache.dictionaries["product_id"]), 4)
+
+    def test_cache_is_reused_and_keyed_by_rows(self):
+        load_record_cache(self.file_path, 10, cache_dir=self.cache_dir)
+        path = cache_path(self.file_path, 10, self.cache_dir)
+        self.assertTrue(os.path.isdir(path))
+        self.assertNotEqual(path, cache_path(self.file_path, 20, self.cache_dir))
+        self.assertEqual(len(load_record_cache(self.file_path, 10, cache_dir=self.cache_dir)), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
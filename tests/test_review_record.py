@@ -0,0 +1,47 @@
+import unittest
+
+from utils.db_utils import REVIEW_COLUMNS, ReviewRecord, normalize_record, review_document, review_row
+
+
+class TestReviewRecord(unittest.TestCase):
+    def setUp(self):
+        self.raw = {
+            "product/productId": "B00006HAXW",
+            "review/userId": "A1RSDE90N6RSZF",
+            "review/profileName": "Joseph M. Kotow",
+            "review/helpfulness": "9/9",
+            "review/score": "5.0",
+            "review/time": "1042502400",
+            "review/summary": "Pittsburgh",
+            "review/text": "I have all of the doo wop DVD's"
+        }
+
+    def test_matches_normalized_record(self):
+        """Test that raw and normalized records give the same row and document."""
+        record = ReviewRecord.from_record(self.raw)
+        normalized = normalize_record(self.raw)
+
+        self.assertEqual(record, ReviewRecord.from_record(normalized))
+        self.assertEqual(review_row(record), review_row(normalized))
+        self.assertEqual(review_document(record), normalized)
+        self.assertEqual(normalize_record(record), normalized)
+        self.assertEqual(record.get("score"), 5.0)
+        self.assertIsNone(record.get("missing"))
+        self.assertEqual(record._fields, REVIEW_COLUMNS)
+
+    def test_interns_repeated_ids(self):
+        first = ReviewRecord.from_record(dict(self.raw))
+        second = ReviewRecord.from_record({key: "".join(value) for key, value in self.raw.items()})
+        self.assertIs(first.product_id, second.product_id)
+        self.assertIs(first.user_id, second.user_id)
+
+    def test_documents_are_independent(self):
+        """Test that every document is a new dict, so pymongo can add `_id` without touching the record."""
+        record = ReviewRecord.from_record(self.raw)
+        document = record.document()
+        document["_id"] = 1
+        self.assertNotIn("_id", record.document())
+
+
+if __name__ == "__main__":
+    unittest.main()
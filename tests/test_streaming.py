@@ -0,0 +1,46 @@
+import time
+import unittest
+
+from utils.streaming import batched, normalized_batches, prefetch
+
+
+class TestStreaming(unittest.TestCase):
+    def test_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(batched(range(5), -1)), [[0, 1, 2, 3, 4]])
+
+    def test_normalized_batches_keep_order(self):
+        """Test that records come out normalized, batched and in their original order."""
+        records = ({"product/productId": f"P{i}", "review/score": "4.0"} for i in range(7))
+        batches = list(normalized_batches(records, 3))
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        self.assertEqual([record.product_id for batch in batches for record in batch],
+                         [f"P{i}" for i in range(7)])
+        self.assertEqual(batches[0][0].score, 4.0)
+
+    def test_producer_is_bounded(self):
+        """Test that the producer stops once the queue is full and resumes as the consumer catches up."""
+        produced = []
+
+        def produce():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        items = prefetch(produce(), queue_size=2)
+        self.assertEqual(next(items), 0)
+        time.sleep(0.05)
+        self.assertLessEqual(len(produced), 4)
+        self.assertEqual(list(items), list(range(1, 100)))
+
+    def test_producer_errors_are_raised(self):
+        def produce():
+            yield 1
+            raise RuntimeError("parse error")
+
+        with self.assertRaises(RuntimeError):
+            list(prefetch(produce()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+import bson
+from bson.raw_bson import RawBSONDocument
+
+from db.handler.mongodb_handler import split_by_size
+
+
+class TestSplitBySize(unittest.TestCase):
+    def test_sub_batches_stay_within_the_limit(self):
+        """Test that documents are encoded once and grouped into sub-batches within the byte limit."""
+        documents = [{"review_text": "x" * 100, "score": float(i)} for i in range(5)]
+        size = len(bson.encode(documents[0]))
+
+        sub_batches = list(split_by_size(documents, 2 * size + 1))
+        self.assertEqual([len(batch) for batch, _ in sub_batches], [2, 2, 1])
+        self.assertEqual([batch_bytes for _, batch_bytes in sub_batches], [2 * size, 2 * size, size])
+        self.assertTrue(all(isinstance(document, RawBSONDocument) for batch, _ in sub_batches for document in batch))
+        self.assertEqual(sub_batches[2][0][0]["score"], 4.0)
+
+    def test_oversized_document_gets_its_own_sub_batch(self):
+        """Test that a document larger than the limit is still inserted, alone."""
+        sub_batches = list(split_by_size([{"a": 1}, {"b": "x" * 1000}, {"c": 1}], 100))
+        self.assertEqual([len(batch) for batch, _ in sub_batches], [1, 1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
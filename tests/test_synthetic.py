@@ -0,0 +1,38 @@
+import unittest
+from collections import Counter
+
+from data.synthetic import SyntheticReviews
+from utils.db_utils import ReviewRecord
+
+
+class TestSyntheticReviews(unittest.TestCase):
+    def test_seed_makes_records_reproducible(self):
+        """Test that the same seed yields the same records and a different seed different ones."""
+        first = list(SyntheticReviews(50, seed=7, batch_size=16))
+        self.assertEqual(len(first), 50)
+        self.assertIsInstance(first[0], ReviewRecord)
+        self.assertEqual(first, list(SyntheticReviews(50, seed=7, batch_size=16)))
+        self.assertNotEqual(first, list(SyntheticReviews(50, seed=8, batch_size=16)))
+
+    def test_values_follow_configuration(self):
+        records = list(SyntheticReviews(2000, seed=1, num_products=100, num_users=500,
+                                        time_range=(1000, 2000), summary_length=(10, 0.1)))
+        self.assertTrue(all(record.score in (1.0, 2.0, 3.0, 4.0, 5.0) for record in records))
+        self.assertTrue(all(1000 <= record.review_time < 2000 for record in records))
+        self.assertLessEqual(len({record.product_id for record in records}), 100)
+        helpful, total = map(int, records[0].helpfulness.split("/"))
+        self.assertLessEqual(helpful, total)
+
+    def test_product_skew(self):
+        """Test that a Zipf skew concentrates reviews on a few products, unlike a uniform popularity."""
+        def top_share(skew):
+            counts = Counter(record.product_id
+                             for record in SyntheticReviews(5000, seed=3, num_products=1000, product_skew=skew))
+            return counts.most_common(1)[0][1] / 5000
+
+        self.assertGreater(top_share(1.5), 0.2)
+        self.assertLess(top_share(0.0), 0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
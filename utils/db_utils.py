@@ -1,8 +1,78 @@
 import random
+import sys
 import time
+from collections import namedtuple
 
 from data.data_utils import read_movies_file
 
+CONNECTION_MODES = ("per_op", "persistent", "pooled")
+
+PG_SYNCHRONOUS_COMMIT_LEVELS = ("off", "local", "on")
+MONGO_WRITE_CONCERNS = ("w0", "w1", "journaled")
+
+# Durability levels that give both engines the same guarantee
+DURABILITY_LEVELS = {
+    # Acknowledged before the write is flushed to the WAL/journal
+    "acknowledged": {"pg_synchronous_commit": "off", "mongo_write_concern": "w1"},
+    # Acknowledged once the write is flushed to the local WAL/journal
+    "journaled": {"pg_synchronous_commit": "on", "mongo_write_concern": "journaled"},
+}
+
+REVIEW_COLUMNS = (
+    "product_id", "user_id", "profile_name", "helpfulness", "score", "review_time", "summary", "review_text"
+)
+# Keys of the raw dataset records, in REVIEW_COLUMNS order
+RAW_REVIEW_FIELDS = (
+    "product/productId", "review/userId", "review/profileName", "review/helpfulness", "review/score",
+    "review/time", "review/summary", "review/text"
+)
+
+
+def _intern(value):
+    return None if value is None else sys.intern(value)
+
+
+class ReviewRecord(namedtuple("ReviewRecord", REVIEW_COLUMNS)):
+    """
+    Compact normalized review: a slotted tuple of the `reviews` columns, in REVIEW_COLUMNS order.
+
+    Score and time are converted once, and the heavily repeated product id, user id, profile name and
+    helpfulness strings are interned, so records of the same product or user share them. It can be passed
+    as-is as psycopg parameters; `document()` builds the dict pymongo needs.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_record(cls, record):
+        """Build a ReviewRecord from a raw dataset record, a normalized dict or another ReviewRecord."""
+        if isinstance(record, cls):
+            return record
+        product_id, user_id, profile_name, helpfulness, score, review_time, summary, review_text = (
+            record.get(key) for key in (REVIEW_COLUMNS if "product_id" in record else RAW_REVIEW_FIELDS))
+        return cls(
+            _intern(product_id),
+            _intern(user_id),
+            _intern(profile_name),
+            _intern(helpfulness),
+            0.0 if score is None else float(score),
+            0 if review_time is None else int(review_time),
+            summary,
+            review_text
+        )
+
+    def get(self, key, default=None):
+        """Read a column by name, like the normalized record dict."""
+        return getattr(self, key, default) if key in self._fields else default
+
+    def document(self):
+        """Return the record as a new MongoDB document."""
+        return dict(zip(self._fields, self))
+
+
+def review_document(record):
+    """Return a document pymongo can insert for a ReviewRecord or a normalized record dict."""
+    return record.document() if isinstance(record, ReviewRecord) else record
+
 
 def measure_insertion_time(db_name, insert_function, config, file_path, max_records):
     """
@@ -41,7 +111,13 @@ def normalize_record(record):
     """
     Transforms a generic record dictionary into a consistent format
     for both MongoDB and PostgreSQL.
+
+    Records that are already normalized (dicts or ReviewRecords) are returned as a new dict.
     """
+    if isinstance(record, ReviewRecord):
+        return record.document()
+    if "product_id" in record:
+        return dict(record)
     return {
         "product_id": record.get("product/productId"),
         "user_id": record.get("review/userId"),
@@ -51,4 +127,65 @@ def normalize_record(record):
         "review_time": int(record.get("review/time", 0)),
         "summary": record.get("review/summary"),
         "review_text": record.get("review/text")
-    }
\ No newline at end of file
+    }
+
+
+def review_row(record):
+    """
+    Convert a normalized record into a tuple of `reviews` column values, in REVIEW_COLUMNS order.
+    """
+    if isinstance(record, ReviewRecord):
+        return record
+    return (
+        record.get("product_id"),
+        record.get("user_id"),
+        record.get("profile_name"),
+        record.get("helpfulness"),
+        float(record.get("score", 0)),
+        int(record.get("review_time", 0)),
+        record.get("summary"),
+        record.get("review_text")
+    )
+
+
+def resolve_durability(durability=None, pg_synchronous_commit=None, mongo_write_concern=None, commit_every=1):
+    """
+    Resolve the PostgreSQL `synchronous_commit` and MongoDB write concern to benchmark with.
+
+    :param durability: Name of a matched level from DURABILITY_LEVELS, or None for the engine defaults.
+    :param pg_synchronous_commit: Explicit `synchronous_commit` value overriding the level.
+    :param mongo_write_concern: Explicit write concern ("w0", "w1" or "journaled") overriding the level.
+    :param commit_every: Writes per group commit; MongoDB transactions do not accept the "w0" write concern,
+                         so the two cannot be combined.
+    :return: Tuple of (pg_synchronous_commit, mongo_write_concern); None keeps the engine default.
+    """
+    level = DURABILITY_LEVELS.get(durability, {}) if durability else {}
+    if durability and not level:
+        raise ValueError(f"Unknown durability level '{durability}'. Expected one of {tuple(DURABILITY_LEVELS)}.")
+    mongo_write_concern = mongo_write_concern or level.get("mongo_write_concern")
+    if mongo_write_concern == "w0" and commit_every > 1:
+        raise ValueError(f"The 'w0' write concern cannot be used with group commits (commit_every={commit_every}): "
+                         f"MongoDB transactions require acknowledged writes.")
+    return pg_synchronous_commit or level.get("pg_synchronous_commit"), mongo_write_concern
+
+
+def parse_index_spec(spec):
+    """
+    Parse a secondary index specification such as "product_id,user_id+score".
+
+    Indexes are separated by commas; the columns of a compound index are joined with "+".
+
+    :param spec: Index specification, or an empty string / None for no secondary index.
+    :return: List of column tuples, one per index.
+    """
+    indexes = []
+    for index in (spec or "").split(","):
+        columns = tuple(column.strip() for column in index.split("+") if column.strip())
+        if not columns:
+            continue
+        unknown = [column for column in columns if column not in REVIEW_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown column(s) {unknown} in index '{index.strip()}'. "
+                             f"Expected columns of {REVIEW_COLUMNS}.")
+        indexes.append(columns)
+    return indexes
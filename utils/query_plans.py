@@ -0,0 +1,76 @@
+def _walk(node):
+    """Yield every dictionary nested in a plan, depth first."""
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+def summarize_postgres_plan(explain_output):
+    """
+    Summarize the output of `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`.
+
+    Rows examined are the rows read by the scan nodes, including those removed by their filter or index
+    recheck; bitmap index scans are skipped since their rows are read again by the bitmap heap scan.
+
+    :param explain_output: Parsed JSON plan, a list holding one dictionary with a "Plan" key.
+    :return: Dictionary with rows returned and examined, the indexes and scan types used, shared buffer
+             hits and reads, and the execution time in milliseconds.
+    """
+    explained = explain_output[0] if isinstance(explain_output, list) else explain_output
+    plan = explained["Plan"]
+    rows_examined = 0
+    indexes, node_types = [], []
+    for node in _walk(plan):
+        node_type = node.get("Node Type")
+        if node_type is None:
+            continue
+        node_types.append(node_type)
+        if node.get("Index Name") and node["Index Name"] not in indexes:
+            indexes.append(node["Index Name"])
+        if node_type.endswith("Scan") and node_type != "Bitmap Index Scan":
+            rows = (node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)
+                    + node.get("Rows Removed by Index Recheck", 0))
+            rows_examined += rows * node.get("Actual Loops", 1)
+    return {
+        "rows_returned": plan.get("Actual Rows", 0) * plan.get("Actual Loops", 1),
+        "rows_examined": rows_examined,
+        "keys_examined": None,
+        "indexes": indexes,
+        "full_scan": "Seq Scan" in node_types,
+        "buffer_hits": plan.get("Shared Hit Blocks"),
+        "buffer_reads": plan.get("Shared Read Blocks"),
+        "execution_time_ms": explained.get("Execution Time"),
+    }
+
+
+def summarize_mongo_plan(explain_output):
+    """
+    Summarize the output of a MongoDB `explain` command run with the "executionStats" verbosity.
+
+    For aggregations the statistics are those of the query feeding the pipeline. MongoDB does not report
+    cache hits per query, so the buffer fields are None.
+
+    :param explain_output: Explain command result.
+    :return: Dictionary with the same keys as `summarize_postgres_plan`.
+    """
+    stats = next((node["executionStats"] for node in _walk(explain_output) if "executionStats" in node), {})
+    indexes, stages = [], []
+    for node in _walk(explain_output):
+        if node.get("stage"):
+            stages.append(node["stage"])
+        if node.get("indexName") and node["indexName"] not in indexes:
+            indexes.append(node["indexName"])
+    return {
+        "rows_returned": stats.get("nReturned"),
+        "rows_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "indexes": indexes,
+        "full_scan": "COLLSCAN" in stages,
+        "buffer_hits": None,
+        "buffer_reads": None,
+        "execution_time_ms": stats.get("executionTimeMillis"),
+    }
@@ -0,0 +1,73 @@
+import json
+import os
+import time
+
+DEFAULT_RESULTS_FILE = "results/benchmark_results.jsonl"
+
+
+def summarize_times(individual_times):
+    """
+    Summarize a list of individual operation times.
+
+    :param individual_times: List of per-operation (or per-bulk) times in seconds.
+    :return: Dictionary with count, mean, min, max and p50/p95/p99 latencies.
+    """
+    times = sorted(t for t in (individual_times or []) if t is not None)
+    if not times:
+        return {"count": 0}
+
+    def percentile(fraction):
+        return times[min(len(times) - 1, int(fraction * len(times)))]
+
+    return {
+        "count": len(times),
+        "mean": sum(times) / len(times),
+        "min": times[0],
+        "max": times[-1],
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+    }
+
+
+def record_result(engine, operation, total_time, individual_times, file_path=DEFAULT_RESULTS_FILE, **parameters):
+    """
+    Append a benchmark result, together with the parameters it ran with, to a JSON Lines file.
+
+    :param engine: Name of the database (e.g., "PostgreSQL" or "MongoDB").
+    :param operation: Name of the operation (e.g., "Insertion (Bulk)").
+    :param total_time: Total time for the operation in seconds.
+    :param individual_times: List of times for individual operations.
+    :param file_path: Path of the results file.
+    :param parameters: Benchmark parameters to store with the result (bulk size, strategy, ...).
+    :return: The recorded entry.
+    """
+    entry = {
+        "timestamp": time.time(),
+        "engine": engine,
+        "operation": operation,
+        "total_time": total_time,
+        "summary": summarize_times(individual_times),
+        "parameters": parameters,
+    }
+
+    try:
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(file_path, "a") as file:
+            file.write(json.dumps(entry, default=str) + "\n")
+    except OSError as e:
+        print(f"Error recording result to {file_path}: {e}")
+
+    return entry
+
+
+def load_results(file_path=DEFAULT_RESULTS_FILE):
+    """Load all recorded benchmark results from a JSON Lines file."""
+    if not os.path.exists(file_path):
+        print(f"Results file not found: {file_path}")
+        return []
+
+    with open(file_path, "r") as file:
+        return [json.loads(line) for line in file if line.strip()]
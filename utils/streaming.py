@@ -0,0 +1,93 @@
+import queue
+import threading
+
+from utils.db_utils import ReviewRecord
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+def prefetch(iterable, queue_size=4):
+    """
+    Iterate `iterable` in a background thread, handing its items over through a bounded queue.
+
+    The producer blocks once `queue_size` items are waiting, so a slow consumer holds back the
+    producer instead of letting items pile up in memory. Exceptions raised by the producer are
+    re-raised in the consumer. Closing the returned generator early stops the producer.
+
+    :param iterable: Items to produce, e.g. a record generator or a generator of batches.
+    :param queue_size: Maximum number of items produced ahead of the consumer.
+    :return: Generator of the items of `iterable`, in order.
+    """
+    items = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except Exception as e:
+            put(_Failure(e))
+        put(_DONE)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    def consume():
+        try:
+            while True:
+                item = items.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            stopped.set()
+            producer.join()
+
+    return consume()
+
+
+def batched(iterable, batch_size):
+    """Group items into lists of `batch_size`, or a single list when `batch_size` is -1 or None."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if batch_size not in (-1, None) and len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def normalized_batches(records, batch_size, queue_size=4):
+    """
+    Stream normalized records (ReviewRecords) in batches through a two-stage producer/consumer pipeline.
+
+    One thread reads (parses) the raw records and groups them into batches, a second one normalizes each
+    batch, and the caller writes the batches to the database. The stages are connected by queues of at
+    most `queue_size` batches, so memory use depends on `batch_size` and `queue_size` rather than on the
+    number of records, and the next batches are parsed while the current one is being written.
+
+    :param records: Iterable of raw (or already normalized) records.
+    :param batch_size: Records per batch, -1 for a single batch.
+    :param queue_size: Maximum number of batches waiting between two stages.
+    :return: Generator of lists of ReviewRecords.
+    """
+    raw_batches = prefetch(batched(records, batch_size), queue_size)
+    return prefetch(([ReviewRecord.from_record(record) for record in batch] for batch in raw_batches), queue_size)
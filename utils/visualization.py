@@ -1,14 +1,14 @@
 from matplotlib import pyplot as plt
 
 
-def plot_operation_comparison(times, number_of_records, operation_name, use_persistent_connection):
+def plot_operation_comparison(times, number_of_records, operation_name, connection_mode):
     """
     Plot a bar chart comparing operation times (e.g., insertion, update, deletion) for different databases.
 
     :param times: Dictionary containing operation times for each database (e.g., {'PostgreSQL': 10, 'MongoDB': 8}).
     :param number_of_records: Number of records processed during the operation.
     :param operation_name: Name of the operation being compared (e.g., "Insertion", "Update", "Deletion").
-    :param use_persistent_connection: Whether a persistent connection was used (boolean).
+    :param connection_mode: Connection strategy used ("per_op", "persistent" or "pooled").
     """
     dbs = list(times.keys())
     durations = list(times.values())
@@ -23,7 +23,7 @@ def plot_operation_comparison(times, number_of_records, operation_name, use_pers
     # Label axes and add title
     plt.xlabel("Database")
     plt.ylabel(f"{operation_name} Time (seconds) for {number_of_records} records")
-    plt.title(f"Database {operation_name} Time Comparison (Persistent connection: {use_persistent_connection})")
+    plt.title(f"Database {operation_name} Time Comparison (Connection mode: {connection_mode})")
 
     # Annotate bars with durations
     for bar, duration in zip(bars, durations):
@@ -34,28 +34,28 @@ def plot_operation_comparison(times, number_of_records, operation_name, use_pers
     plt.show(block=True)
 
 
-def plot_operation_times(record_times, db_name, operation_name, use_persistent_connection):
+def plot_operation_times(record_times, db_name, operation_name, connection_mode):
     """
     Plot the time taken for each database operation.
 
     :param record_times: List of times for each record operation (insertion, update, deletion, etc.).
     :param db_name: Name of the database (e.g., "PostgreSQL", "MongoDB").
     :param operation_name: Name of the operation (e.g., "Insertion", "Update", "Deletion").
-    :param use_persistent_connection: Whether a persistent connection was used (boolean).
+    :param connection_mode: Connection strategy used ("per_op", "persistent" or "pooled").
     """
     plt.figure(figsize=(10, 6))
     plt.plot(record_times, label=f"{db_name} ({operation_name})", marker='o')
     plt.xlabel("Record Number")
     plt.ylabel(f"{operation_name} Time (seconds)")
     plt.title(
-        f"Individual Record {operation_name} Times for {db_name} \n(Persistent connection: {use_persistent_connection})")
+        f"Individual Record {operation_name} Times for {db_name} \n(Connection mode: {connection_mode})")
     plt.legend()
     plt.grid()
     plt.show(block=True)
 
 
 def plot_results(postgres_time, postgres_times, mongo_time, mongo_times, operation_name, bulk_size=None,
-                 use_persistent_connection=False):
+                 connection_mode=None):
     """
     Plot the results for operation performance comparison.
 
@@ -65,7 +65,7 @@ def plot_results(postgres_time, postgres_times, mongo_time, mongo_times, operati
     :param mongo_times: List of times for individual operations in MongoDB.
     :param operation_name: Name of the operation (e.g., "Insertion", "Update", "Deletion").
     :param bulk_size: Bulk size for bulk operations (optional).
-    :param use_persistent_connection: Whether a persistent connection was used (boolean).
+    :param connection_mode: Connection strategy used ("per_op", "persistent" or "pooled").
     """
     # Plot total operation comparison
     times = {"PostgreSQL": postgres_time, "MongoDB": mongo_time}
@@ -77,7 +77,7 @@ def plot_results(postgres_time, postgres_times, mongo_time, mongo_times, operati
         times=times,
         number_of_records=number_of_records,
         operation_name=operation_display_name,
-        use_persistent_connection=use_persistent_connection
+        connection_mode=connection_mode
     )
 
     # Plot individual operation times
@@ -86,11 +86,53 @@ def plot_results(postgres_time, postgres_times, mongo_time, mongo_times, operati
         record_times=postgres_times,
         db_name="PostgreSQL",
         operation_name=operation_display_name,
-        use_persistent_connection=use_persistent_connection
+        connection_mode=connection_mode
     )
     plot_operation_times(
         record_times=mongo_times,
         db_name="MongoDB",
         operation_name=operation_display_name,
-        use_persistent_connection=use_persistent_connection
+        connection_mode=connection_mode
     )
+
+
+def plot_parameter_comparison(results, operation_name, parameter="connection_mode"):
+    """
+    Plot a grouped bar chart of recorded results for one operation, grouped by a run parameter.
+
+    :param results: List of recorded results (see utils.results_recorder.load_results).
+    :param operation_name: Name of the operation to compare (e.g., "Insertion").
+    :param parameter: Run parameter to group by (e.g., "connection_mode", "pg_insert_strategy").
+    """
+    latest = {}
+    for result in results:
+        if result["operation"] != operation_name or result.get("total_time") is None:
+            continue
+        value = str(result["parameters"].get(parameter))
+        # Later runs with the same parameter value replace earlier ones
+        latest[(result["engine"], value)] = result["total_time"]
+
+    if not latest:
+        print(f"No recorded results for '{operation_name}' to compare by '{parameter}'.")
+        return
+
+    values = sorted({value for _, value in latest})
+    engines = sorted({engine for engine, _ in latest})
+    width = 0.8 / len(engines)
+    colors = ['blue', 'green', 'orange', 'red']
+
+    plt.figure(figsize=(10, 6))
+    for index, engine in enumerate(engines):
+        positions = [i + index * width for i in range(len(values))]
+        durations = [latest.get((engine, value), 0) for value in values]
+        bars = plt.bar(positions, durations, width=width, label=engine, color=colors[index % len(colors)])
+        for bar, duration in zip(bars, durations):
+            plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height(),
+                     f'{duration:.2f}', ha='center', va='bottom')
+
+    plt.xticks([i + width * (len(engines) - 1) / 2 for i in range(len(values))], values)
+    plt.xlabel(parameter)
+    plt.ylabel(f"{operation_name} Time (seconds)")
+    plt.title(f"{operation_name} Time by {parameter}")
+    plt.legend(title="Databases")
+    plt.show(block=True)